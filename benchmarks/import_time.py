@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Cold import time of the integration's modules, and config entry setup time.
+
+Each module is imported in a fresh interpreter, --repeat times, and the
+median wall time, the number of modules the import loaded and any heavy
+dependencies it pulled in are reported. Modules that need Home Assistant
+are skipped when it is not installed; the API client and simulator are
+imported without it, the way mspa_cli.py loads them.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 20 --top 10
+    python benchmarks/import_time.py --setup
+
+--setup also times async_setup_entry, platforms included, in a test Home
+Assistant (needs pytest-homeassistant-custom-component). The entry talks to
+the simulated tub (custom_components/mspa/simulator.py) instead of the
+cloud, so no account is needed; the simulated cloud answers each request
+after at least 20 ms, and the request count is reported alongside.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_DIR = os.path.join(ROOT, "custom_components", "mspa")
+
+# (module, needs Home Assistant); "" is the integration's __init__
+TARGETS = (
+    ("mspa_api", False),
+    ("simulator", False),
+    ("", True),
+    ("config_flow", True),
+    ("coordinator", True),
+    ("sensor", True),
+    ("switch", True),
+    ("number", True),
+    ("climate", True),
+    ("diagnostics", True),
+)
+
+# Dependencies worth knowing about when they load
+HEAVY = ("requests", "urllib3", "paho", "numpy", "homeassistant.components.recorder")
+
+PROBE = """
+import json, sys, time, types
+sys.path.insert(0, {root!r})
+before = set(sys.modules)
+started = time.perf_counter()
+{import_code}
+elapsed = time.perf_counter() - started
+loaded = set(sys.modules) - before
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "modules": len(loaded),
+    "heavy": sorted(name for name in {heavy!r} if name in loaded),
+    "platforms": sorted(name for name in loaded if name.count(".") == 2 and name.startswith("homeassistant.components.")),
+}}))
+"""
+
+HA_IMPORT = "import custom_components.mspa{suffix}"
+CLIENT_IMPORT = (
+    "package = types.ModuleType('mspa_client'); package.__path__ = [{package_dir!r}]; "
+    "sys.modules['mspa_client'] = package\n"
+    "import mspa_client.{module}"
+)
+
+
+def have_home_assistant():
+    try:
+        importlib.import_module("homeassistant")
+    except ImportError:
+        return False
+    return True
+
+
+def probe(module, needs_ha, top):
+    """Import module in a fresh interpreter; return the probe's report and the slowest imports."""
+    if needs_ha:
+        import_code = HA_IMPORT.format(suffix=f".{module}" if module else "")
+    else:
+        import_code = CLIENT_IMPORT.format(package_dir=PACKAGE_DIR, module=module)
+    code = PROBE.format(root=ROOT, import_code=import_code, heavy=HEAVY)
+    command = [sys.executable, "-X", "importtime", "-c", code] if top else [sys.executable, "-c", code]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=ROOT, check=False)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    report = json.loads(result.stdout)
+    slowest = []
+    if top:
+        # "import time: self [us] | cumulative | imported package"
+        for line in result.stderr.splitlines():
+            parts = line.split("|")
+            if line.startswith("import time:") and parts[0].split(":")[1].strip().isdigit():
+                slowest.append((int(parts[0].split(":")[1]), parts[2].strip()))
+        slowest = [f"{name} {us / 1000:.1f}ms" for us, name in sorted(slowest, reverse=True)[:top]]
+    return report, slowest
+
+
+def bench_imports(repeat, top):
+    ha = have_home_assistant()
+    results = []
+    for module, needs_ha in TARGETS:
+        name = module or "__init__"
+        if needs_ha and not ha:
+            results.append({"module": name, "skipped": "homeassistant is not installed"})
+            continue
+        times = []
+        report = slowest = None
+        for run in range(repeat):
+            report, run_slowest = probe(module, needs_ha, top if run == 0 else 0)
+            times.append(report["ms"])
+            slowest = slowest if slowest is not None else run_slowest
+        results.append({
+            "module": name,
+            "median_ms": round(statistics.median(times), 1),
+            "min_ms": round(min(times), 1),
+            "modules_loaded": report["modules"],
+            "heavy": report["heavy"],
+            "ha_components": report["platforms"],
+            "slowest": slowest,
+        })
+    return results
+
+
+async def _setup_once(simulator, mspa_api):
+    """Set up and unload one config entry; return (setup seconds, requests sent)."""
+    from homeassistant import loader
+    from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant
+
+    tub = simulator.SimulatedHotTub(seed=0, power_cut_every=0, drop_every=0)
+    tub.advance(asyncio.get_running_loop().time())
+    transport = simulator.SimulatorTransport(tub)
+    mspa_api.RequestsTransport = lambda hass=None: transport
+    async with async_test_home_assistant() as hass:
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)  # Allow custom integrations
+        entry = MockConfigEntry(
+            domain="mspa", title="MSpa", unique_id="sim-device",
+            data={"account_email": "bench@example.invalid", "password": "0" * 32, "region": "ROW"},
+        )
+        entry.add_to_hass(hass)
+        started = time.perf_counter()
+        if not await hass.config_entries.async_setup(entry.entry_id):
+            raise RuntimeError(f"setup failed: {entry.state}")
+        await hass.async_block_till_done()
+        elapsed = time.perf_counter() - started
+        await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_stop(force=True)
+    return elapsed, sum(transport.requests.values())
+
+
+def bench_setup(repeat):
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    mspa_api = importlib.import_module("custom_components.mspa.mspa_api")
+    simulator = importlib.import_module("custom_components.mspa.simulator")
+    original = mspa_api.RequestsTransport
+    runs = []
+    try:
+        for _ in range(repeat):
+            runs.append(asyncio.run(_setup_once(simulator, mspa_api)))
+    finally:
+        mspa_api.RequestsTransport = original
+    # The first setup also imports the platforms and the HA components they use
+    warm = [seconds for seconds, _ in runs[1:]] or [runs[0][0]]
+    return {
+        "first_ms": round(runs[0][0] * 1000, 1),
+        "warm_median_ms": round(statistics.median(warm) * 1000, 1),
+        "requests": runs[0][1],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports per module")
+    parser.add_argument("--setup", action="store_true", help="also time async_setup_entry (see above)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {"python": sys.version.split()[0], "imports": bench_imports(args.repeat, args.top)}
+    if args.setup:
+        results["setup"] = bench_setup(max(2, args.repeat))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"Cold imports, median of {args.repeat} (Python {results['python']})")
+    print(f"{'module':<14} {'median ms':>9} {'min ms':>7} {'modules':>7}  heavy / HA components")
+    for row in results["imports"]:
+        if "skipped" in row:
+            print(f"{row['module']:<14} skipped: {row['skipped']}")
+            continue
+        extra = ", ".join(row["heavy"] + row["ha_components"]) or "-"
+        print(f"{row['module']:<14} {row['median_ms']:>9} {row['min_ms']:>7} {row['modules_loaded']:>7}  {extra}")
+        for line in row["slowest"]:
+            print(f"{'':<16}{line}")
+    if "setup" in results:
+        setup = results["setup"]
+        print(f"\nasync_setup_entry: first {setup['first_ms']} ms, then {setup['warm_median_ms']} ms"
+              f" (median; {setup['requests']} simulated requests each)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import importlib
 import logging
 
 import voluptuous as cv
@@ -6,8 +7,17 @@ from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN
-from .coordinator import MSpaUpdateCoordinator
+from .const import (
+    DOMAIN,
+    CONF_RECORD_SESSION,
+    CONF_HEDGE_READS,
+    CONF_TRACE_LOG,
+    CONF_SAMPLE_LOG,
+    CONF_PUSH_URL,
+    CONF_PUSH_TOPIC,
+    DEFAULT_PUSH_TOPIC,
+    DISCOVERY_DATA,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,7 +37,11 @@ SERVICES = [
     "set_filter",
     "set_bubble",
     "set_jet",
-    "set_bubble_level"
+    "set_bubble_level",
+    "set_ozone",
+    "set_uvc",
+    "set_state",
+    "profile"
 ]
 
 async def async_setup(hass: HomeAssistant, config: dict):
@@ -47,19 +61,50 @@ def _unregister_services(hass):
         _LOGGER.debug('MSpa unregistered "%s" service', service)
 
 
+async def _async_set_push(coordinator, entry):
+    await coordinator.async_set_push(
+        entry.options.get(CONF_PUSH_URL) or None, entry.options.get(CONF_PUSH_TOPIC) or DEFAULT_PUSH_TOPIC
+    )
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up MSpa from a config entry."""
     # _LOGGER.setLevel(logging.DEBUG)
-    coordinator = MSpaUpdateCoordinator(hass, entry)
-    await coordinator.api.async_init()
-    await coordinator.async_config_entry_first_refresh()
+    # The coordinator brings in the API client and everything it runs; load
+    # it when an entry is set up, not whenever the integration is imported
+    # (e.g. for the config flow), and in the executor like HA does
+    coordinator_module = await hass.async_add_import_executor_job(importlib.import_module, f"{__name__}.coordinator")
+    # Right after the config flow, reuse the token and devices it found. They
+    # are only needed once, so they are not left in the stored entry
+    discovery = entry.data.get(DISCOVERY_DATA)
+    device_list = None
+    if discovery:
+        hass.config_entries.async_update_entry(
+            entry, data={key: value for key, value in entry.data.items() if key != DISCOVERY_DATA}
+        )
+        device_list = discovery["device_list"]
+        if discovery.get("token"):
+            hass.data["mspa_token"] = discovery["token"]
+            hass.data.pop("mspa_creds_hash", None)  # The token is for this entry's credentials
+    coordinator = coordinator_module.MSpaUpdateCoordinator(hass, entry)
+    try:
+        await coordinator.api.async_init(device_list)
+        await coordinator.async_config_entry_first_refresh()
+        await coordinator.energy.async_load()
+        await _async_set_push(coordinator, entry)
+        coordinator.start_watchdog()
+    except Exception:
+        # Setup will be retried with a new coordinator; stop this one's tasks
+        await coordinator.async_shutdown()
+        raise
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
     _LOGGER.debug("MSpa integration %s setup %s %s", DOMAIN, entry.title, entry.entry_id)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    # Ensure options changes cause an immediate refresh
-    entry.add_update_listener(async_options_updated)
+    # Ensure options changes cause an immediate refresh; removed on unload so
+    # reloads do not stack listeners
+    entry.async_on_unload(entry.add_update_listener(async_options_updated))
 
     _register_services(hass, coordinator)
     _LOGGER.info("MSpa integration %s setup complete", DOMAIN)
@@ -71,7 +116,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.debug("Unloading MSpa integration %s for entry %s", DOMAIN, entry.entry_id)
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if coordinator:
+            # Cancel command confirmations, shared fetches and other leftovers
+            # before a reloaded entry starts talking to the cloud
+            await coordinator.async_shutdown()
+        if coordinator and hasattr(coordinator.api.transport, "close"):
+            await hass.async_add_executor_job(coordinator.api.transport.close)
         _unregister_services(hass)
         # Clear the cached token and credentials hash to prevent reuse with new credentials
         if "mspa_token" in hass.data:
@@ -80,6 +131,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         if "mspa_creds_hash" in hass.data:
             _LOGGER.info("DIAGNOSTIC: Clearing cached credentials hash on unload")
             hass.data.pop("mspa_creds_hash", None)
+        hass.data.pop("mspa_scheduler", None)
         _LOGGER.debug("MSpa integration %s unloaded successfully for entry %s", DOMAIN, entry.entry_id)
     return unload_ok
 
@@ -87,5 +139,12 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
 async def async_options_updated(hass: HomeAssistant, entry: ConfigEntry):
     """Handle options update by refreshing coordinator data."""
     coordinator = hass.data[DOMAIN].get(entry.entry_id)
-    if coordinator:
+    if coordinator and coordinator.record_session != entry.options.get(CONF_RECORD_SESSION, False):
+        # Recording wraps the API transport, so it only changes on reload
+        await hass.config_entries.async_reload(entry.entry_id)
+    elif coordinator:
+        coordinator.api.hedge_reads = entry.options.get(CONF_HEDGE_READS, False)
+        coordinator.tracer.log_json = entry.options.get(CONF_TRACE_LOG, False)
+        await coordinator.async_set_sample_log(entry.options.get(CONF_SAMPLE_LOG, False))
+        await _async_set_push(coordinator, entry)
         await coordinator.async_request_refresh()
@@ -0,0 +1,327 @@
+"""Record and replay MSpa API sessions.
+
+A cassette is a JSON Lines file (gzip-compressed when the name ends in .gz).
+The first line is a header, every following line one request/response
+exchange:
+
+    {"t": 12.503, "ms": 241, "method": "POST", "path": "/api/device/thing_shadow/",
+     "request": {...}, "status": 200, "response": {...}}
+
+`t` is the offset in seconds from the start of the recording and `ms` the
+observed latency. A request that raised instead of getting a response
+(connection refused, timeout) has an `error` in place of `status` and
+`response`:
+
+    {..., "error": {"type": "requests.exceptions.ConnectTimeout", "message": "...", "os_error": true}}
+
+and is raised again on replay. Request headers are never written (they only carry the
+token and request signature); account details, tokens and device identifiers
+are redacted before anything reaches the disk.
+
+RecordingTransport wraps a live transport and writes a cassette as it goes.
+ReplayTransport serves a cassette back to MSpaApiClient, with the recorded
+latency and, optionally, the recorded pacing, both scaled by `time_scale`.
+Responses are validated against the JSON schemas in `schemas/` when the
+optional `jsonschema` package is installed.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+try:
+    import jsonschema
+except ImportError:  # Optional, only needed to validate recordings
+    jsonschema = None
+
+_LOGGER = logging.getLogger(__name__)
+
+CASSETTE_FORMAT = "mspa-cassette"
+CASSETTE_VERSION = 1
+
+SCHEMA_DIR = Path(__file__).parent / "schemas"
+
+# Which schema describes which part of a response, by request path
+RESPONSE_SCHEMAS = {
+    "/api/device/thing_shadow/": ("mspa_thing_shadow.schema.json", "data"),
+    "/api/enduser/devices/": ("mspa_device_list.schema.json", None),
+}
+
+# Values replaced outright
+REDACTED_KEYS = {"password", "account", "token", "registration_id", "enduser_id", "activate_ip", "email"}
+# Identifiers replaced by a stable placeholder, so one recording stays self-consistent
+PSEUDONYM_KEYS = {"device_id", "product_id", "sn", "device_uuid", "product_tub_pk"}
+REDACTED = "**REDACTED**"
+REDACTED_MAC = "000000000000"
+
+
+class CassetteError(Exception):
+    """A cassette could not be read or failed validation."""
+
+
+class CassetteExhausted(CassetteError):
+    """Replay ran out of recorded exchanges for a request."""
+
+
+class MSpaRedactor:
+    """Redact credentials and identifiers from recorded payloads."""
+
+    def __init__(self, secrets=()):
+        self._secrets = [secret for secret in secrets if secret]
+        self._pseudonyms = {}
+
+    def _pseudonym(self, key, value):
+        names = self._pseudonyms.setdefault(key, {})
+        if value not in names:
+            names[value] = f"{key}-{len(names) + 1}"
+        return names[value]
+
+    def redact(self, value, key=None):
+        if isinstance(value, dict):
+            return {k: self.redact(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.redact(item, key) for item in value]
+        if not isinstance(value, str) or not value:
+            return value
+        if key in REDACTED_KEYS:
+            return REDACTED
+        if key == "mac":
+            return REDACTED_MAC
+        if key in PSEUDONYM_KEYS:
+            return self._pseudonym(key, value)
+        if key == "desired":
+            # Commands carry their desired state as a JSON string
+            try:
+                return json.dumps(self.redact(json.loads(value)))
+            except ValueError:
+                pass
+        for secret in self._secrets:
+            value = value.replace(secret, REDACTED)
+        return value
+
+
+def _load_schema(name):
+    with open(SCHEMA_DIR / name, encoding="utf-8") as schema_file:
+        return json.load(schema_file)
+
+
+def validate_exchange(exchange, schemas=None):
+    """Return a list of schema violations in one exchange's response.
+
+    Returns an empty list when the exchange has no schema, the response
+    carries no data (an error reply) or jsonschema is not installed.
+    """
+    if jsonschema is None:
+        return []
+    target = RESPONSE_SCHEMAS.get(exchange.get("path"))
+    response = exchange.get("response")
+    if target is None or not isinstance(response, dict) or not response.get("data"):
+        return []
+    schema_name, key = target
+    schemas = schemas if schemas is not None else {}
+    if schema_name not in schemas:
+        schemas[schema_name] = _load_schema(schema_name)
+    instance = response[key] if key else response
+    validator = jsonschema.Draft202012Validator(schemas[schema_name])
+    return [f"{'/'.join(str(p) for p in error.absolute_path) or '<root>'}: {error.message}"
+            for error in validator.iter_errors(instance)]
+
+
+def _open(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def load_cassette(path, validate=True):
+    """Read a cassette and return (header, exchanges).
+
+    Raises CassetteError if the file is not a cassette or, with validate=True,
+    if any recorded response does not match its schema.
+    """
+    with _open(path, "r") as cassette:
+        lines = [line for line in cassette if line.strip()]
+    if not lines:
+        raise CassetteError(f"{path} is empty")
+    header = json.loads(lines[0])
+    if header.get("format") != CASSETTE_FORMAT:
+        raise CassetteError(f"{path} is not an MSpa cassette")
+    if header.get("version", 0) > CASSETTE_VERSION:
+        raise CassetteError(f"{path} uses cassette version {header['version']}, newest supported is {CASSETTE_VERSION}")
+    # A recording resumed into the same file starts with another header line
+    exchanges = [record for record in map(json.loads, lines[1:]) if "format" not in record]
+
+    if validate:
+        if jsonschema is None:
+            _LOGGER.warning("jsonschema is not installed, skipping cassette validation for %s", path)
+        schemas = {}
+        for index, exchange in enumerate(exchanges):
+            errors = validate_exchange(exchange, schemas)
+            if errors:
+                raise CassetteError(f"{path} exchange {index} ({exchange.get('path')}) fails schema: {'; '.join(errors)}")
+    return header, exchanges
+
+
+def recorded_error(error):
+    """Rebuild a recorded transport exception.
+
+    The recorded class is used if it is a builtin or its module is already
+    loaded; otherwise OSError stands in for network errors (all of which the
+    client retries alike) and CassetteError for anything else.
+    """
+    module, _, name = error.get("type", "").rpartition(".")
+    cls = getattr(sys.modules.get(module or "builtins"), name, None)
+    if not (isinstance(cls, type) and issubclass(cls, Exception)):
+        cls = OSError if error.get("os_error") else CassetteError
+    return cls(error.get("message", ""))
+
+
+class CassetteResponse:
+    """Replayed response with the parts of requests.Response the client uses."""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+        self.text = json.dumps(body)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class RecordingTransport:
+    """Wrap a transport and append every exchange to a cassette file.
+
+    Exchanges are validated and written in executor threads, several of
+    which may finish at once; a lock keeps the file to one header and whole
+    lines.
+    """
+
+    def __init__(self, transport, path, secrets=()):
+        self.transport = transport
+        self.path = path
+        self.redactor = MSpaRedactor(secrets)
+        self._started = time.monotonic()
+        self._file = None
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def _write(self, record):
+        with self._lock:
+            errors = validate_exchange(record, self._schemas)
+            if errors:
+                _LOGGER.warning("Recorded %s response does not match its schema: %s", record["path"], "; ".join(errors))
+            self._write_line(record)
+
+    def _write_line(self, record):
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = _open(self.path, "a")
+            self._file.write(json.dumps({
+                "format": CASSETTE_FORMAT,
+                "version": CASSETTE_VERSION,
+                "recorded": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }, separators=(",", ":")) + "\n")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        sent = time.monotonic()
+        record = {
+            "t": round(sent - self._started, 3),
+            "method": method,
+            "path": urlsplit(url).path,
+            "request": self.redactor.redact(json) if json is not None else None,
+        }
+        try:
+            response = await self.transport.request(method, url, headers=headers, json=json, timeout=timeout)
+        except Exception as err:
+            record["ms"] = round((time.monotonic() - sent) * 1000)
+            error_type = type(err)
+            record["error"] = {
+                "type": error_type.__qualname__ if error_type.__module__ == "builtins"
+                else f"{error_type.__module__}.{error_type.__qualname__}",
+                "message": self.redactor.redact(str(err)),
+                "os_error": isinstance(err, OSError),
+            }
+            await asyncio.get_running_loop().run_in_executor(None, self._write, record)
+            raise
+        record["ms"] = round((time.monotonic() - sent) * 1000)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {"raw": response.text}
+
+        record["status"] = response.status_code
+        record["response"] = self.redactor.redact(body)
+        await asyncio.get_running_loop().run_in_executor(None, self._write, record)
+        return response
+
+    def reset(self):
+        if hasattr(self.transport, "reset"):
+            self.transport.reset()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if hasattr(self.transport, "close"):
+            self.transport.close()
+
+
+class ReplayTransport:
+    """Serve recorded exchanges back in order, per request method and path.
+
+    time_scale multiplies all recorded delays: 1.0 replays the original
+    latency, 0.01 runs a hundred times faster and 0 returns immediately. With
+    pace=True a response is also held back until its recorded offset from the
+    start of the session, so a caller polling faster than the recording sees
+    the device change at the original (scaled) moments.
+    """
+
+    def __init__(self, exchanges, time_scale=1.0, pace=False):
+        self.time_scale = time_scale
+        self.pace = pace
+        self._queues = defaultdict(deque)
+        for exchange in exchanges:
+            self._queues[(exchange["method"], exchange["path"])].append(exchange)
+        self._started = None
+        self.requests = []
+
+    @classmethod
+    def from_file(cls, path, time_scale=1.0, pace=False, validate=True):
+        _, exchanges = load_cassette(path, validate=validate)
+        return cls(exchanges, time_scale=time_scale, pace=pace)
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        loop = asyncio.get_running_loop()
+        if self._started is None:
+            self._started = loop.time()
+        path = urlsplit(url).path
+        queue = self._queues.get((method, path))
+        if not queue:
+            raise CassetteExhausted(f"No recorded exchange left for {method} {path}")
+        exchange = queue.popleft()
+        self.requests.append((method, path, json))
+
+        delay = exchange.get("ms", 0) / 1000 * self.time_scale
+        if self.pace:
+            due = self._started + exchange.get("t", 0) * self.time_scale + delay
+            delay = max(delay, due - loop.time())
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if "error" in exchange:
+            raise recorded_error(exchange["error"])
+        return CassetteResponse(exchange["status"], exchange["response"])
+
+    @property
+    def remaining(self):
+        return sum(len(queue) for queue in self._queues.values())
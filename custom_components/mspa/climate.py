@@ -1,12 +1,13 @@
-from homeassistant.components.climate import ClimateEntity
 from homeassistant.components.climate.const import (
     ClimateEntityFeature,
     HVACMode,
     HVACAction,
 )
-from homeassistant.const import PRECISION_HALVES
-from .const import DOMAIN, TEMP_UNIT, MAX_TEMP, MIN_TEMP
-from .entity import MSpaClimateEntity
+from homeassistant.components.climate import ClimateEntity
+from homeassistant.const import PRECISION_HALVES, UnitOfTemperature
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import DOMAIN, MAX_TEMP, MIN_TEMP
+from .entity import MSpaBaseEntity
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -14,6 +15,10 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities([MSpaClimate(coordinator)])
 
 
+class MSpaClimateEntity(MSpaBaseEntity, CoordinatorEntity, ClimateEntity):
+    pass
+
+
 class MSpaClimate(MSpaClimateEntity):
     """Representation of the MSpa climate control entity."""
     name = "Heater Control"
@@ -21,7 +26,7 @@ class MSpaClimate(MSpaClimateEntity):
     _attr_precision = PRECISION_HALVES
     _attr_min_temp = MIN_TEMP
     _attr_max_temp = MAX_TEMP
-    _attr_temperature_unit = TEMP_UNIT
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
 
     def __init__(self, coordinator):
         super().__init__(coordinator)
@@ -1,4 +1,5 @@
 """Config flow for MSpa Hot Tub integration."""
+import asyncio
 import logging
 import voluptuous as vol
 from homeassistant import config_entries
@@ -10,14 +11,23 @@ from .const import (
     CONF_TRACK_TEMPERATURE_UNIT,
     CONF_RESTORE_STATE,
     CONF_ALWAYS_ENFORCE_UNIT,
+    CONF_RECORD_SESSION,
+    CONF_HEDGE_READS,
+    CONF_TRACE_LOG,
+    CONF_SAMPLE_LOG,
+    CONF_PUSH_URL,
+    CONF_PUSH_TOPIC,
+    DEFAULT_PUSH_TOPIC,
     DEFAULT_REGION,
     REGIONS,
     COUNTRY_TO_REGION,
     DEFAULT_PUMP_POWER,
     DEFAULT_BUBBLE_POWER,
     DEFAULT_HEATER_POWER_PREHEAT,
-    DEFAULT_HEATER_POWER_HEAT
+    DEFAULT_HEATER_POWER_HEAT,
+    DISCOVERY_DATA,
 )
+from .errors import MSpaApiError, MSpaAuthError, MSpaInvalidCredentials
 import hashlib
 
 _LOGGER = logging.getLogger(__name__)
@@ -44,6 +54,48 @@ def detect_region_from_hass(hass) -> Tuple[str, Optional[str]]:
     _LOGGER.info("Using default region 'ROW' (Europe/Rest of World)")
     return DEFAULT_REGION, None
 
+class NoDevicesFound(Exception):
+    """The credentials work but the account has no hot tub."""
+
+
+async def async_discover(hass, email: str, password_hash: str, region: str) -> Tuple[str, dict, dict]:
+    """Log in and list the account's devices, trying the other regions if needed.
+
+    The selected region is tried first. If it rejects the credentials or has
+    no device for them, the other regions are tried in parallel, since
+    accounts only exist in the region where they were created.
+
+    Returns (region, device list, client store holding the token). Raises
+    the selected region's error if no region has a device.
+    """
+    # Imported here so loading the config flow does not load the API client
+    from .mspa_api import MSpaApiClient
+
+    async def probe(candidate):
+        store = {}
+        client = MSpaApiClient(hass, email, password_hash, None, region=candidate, store=store)
+        await client.authenticate()
+        device_list = await client.get_device_list()
+        if not (isinstance(device_list, dict) and device_list.get("list")):
+            raise NoDevicesFound(f"No devices on the account in region {candidate}")
+        return candidate, device_list, store
+
+    try:
+        return await probe(region)
+    except (MSpaAuthError, MSpaInvalidCredentials, NoDevicesFound) as err:
+        error = err
+    others = [candidate for candidate in REGIONS if candidate != region]
+    _LOGGER.info("No MSpa device for these credentials in region %s (%s), trying %s",
+                 region, error, ", ".join(others))
+    results = await asyncio.gather(*(probe(candidate) for candidate in others), return_exceptions=True)
+    for candidate, result in zip(others, results):
+        if isinstance(result, BaseException):
+            _LOGGER.debug("Region %s: %s", candidate, result)
+        else:
+            return result
+    raise error
+
+
 class MSpaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for MSpa Hot Tub."""
 
@@ -96,16 +148,44 @@ class MSpaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             
             _LOGGER.info(f"Using region: {region} (detected: {detected_region}, user selected: {user_input.get(CONF_REGION)})")
 
-            return self.async_create_entry(
-                title="MSpa Hot Tub",
-                data={
-                    "account_email": email,
-                    "password": password_hash,
-                    "region": region,
-                    # "device_id": user_input[CONF_DEVICE_ID],
-                    # "product_id": user_input[CONF_PRODUCT_ID],
-                }
-            )
+            # Check the credentials now, so a wrong password or region is
+            # reported here instead of failing setup later
+            try:
+                found_region, device_list, store = await async_discover(self.hass, email, password_hash, region)
+            except (MSpaAuthError, MSpaInvalidCredentials):
+                errors["base"] = "invalid_auth"
+            except NoDevicesFound:
+                errors["base"] = "no_devices"
+            except (MSpaApiError, OSError, TimeoutError) as err:
+                _LOGGER.warning("Could not reach the MSpa cloud: %s", err)
+                errors["base"] = "cannot_connect"
+            except Exception:  # noqa: BLE001 - shown to the user as an unknown error
+                _LOGGER.exception("Unexpected error validating MSpa credentials")
+                errors["base"] = "unknown"
+            else:
+                device = device_list["list"][0]
+                await self.async_set_unique_id(device.get("device_id"))
+                self._abort_if_unique_id_configured()
+                if found_region != region:
+                    _LOGGER.info("MSpa account found in region %s instead of %s", found_region, region)
+
+                return self.async_create_entry(
+                    title="MSpa Hot Tub",
+                    data={
+                        "account_email": email,
+                        "password": password_hash,
+                        "region": found_region,
+                        CONF_DEVICE_ID: device.get("device_id"),
+                        CONF_PRODUCT_ID: device.get("product_id"),
+                        # Hand the token and device list to the first setup,
+                        # so it does not log in and discover again; setup
+                        # removes them from the entry
+                        DISCOVERY_DATA: {
+                            "token": store.get("mspa_token"),
+                            "device_list": device_list,
+                        },
+                    }
+                )
 
         # Pre-populate form with detected region
         data_schema=vol.Schema({
@@ -168,6 +248,36 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 default=self.config_entry.options.get(CONF_RESTORE_STATE, False),
                 description="Restore previous states after power outage (heater, temperature, filter, etc.)"
             ): bool,
+            vol.Optional(
+                CONF_RECORD_SESSION,
+                default=self.config_entry.options.get(CONF_RECORD_SESSION, False),
+                description="Record redacted API requests and responses for offline replay"
+            ): bool,
+            vol.Optional(
+                CONF_HEDGE_READS,
+                default=self.config_entry.options.get(CONF_HEDGE_READS, False),
+                description="Send a second status request when the first is slower than usual"
+            ): bool,
+            vol.Optional(
+                CONF_TRACE_LOG,
+                default=self.config_entry.options.get(CONF_TRACE_LOG, False),
+                description="Log the phase timings of every update as one JSON line"
+            ): bool,
+            vol.Optional(
+                CONF_SAMPLE_LOG,
+                default=self.config_entry.options.get(CONF_SAMPLE_LOG, False),
+                description="Append every decoded status sample to a compact binary log"
+            ): bool,
+            vol.Optional(
+                CONF_PUSH_URL,
+                default=self.config_entry.options.get(CONF_PUSH_URL, ""),
+                description="MQTT over WebSocket broker delivering shadow updates (ws:// or wss://)"
+            ): str,
+            vol.Optional(
+                CONF_PUSH_TOPIC,
+                default=self.config_entry.options.get(CONF_PUSH_TOPIC, DEFAULT_PUSH_TOPIC),
+                description="Topic carrying the shadow updates"
+            ): str,
         })
 
         return self.async_show_form(step_id="init", data_schema=data_schema)
\ No newline at end of file
@@ -1,11 +1,64 @@
 """Constants for the MSpa Hot Tub integration."""
-from homeassistant.const import  UnitOfTemperature
 
 DOMAIN = "mspa"
 DEFAULT_SCAN_INTERVAL = 60
 RAPID_SCAN_INTERVAL = 1  # Polling interval in seconds when waiting for changes
 RAPID_POLL_TIMEOUT = 15  # Maximum time in seconds to poll rapidly
 RAPID_POLL_MAX_ATTEMPTS = 15  # Maximum number of rapid polls
+OFFLINE_SCAN_INTERVAL = 300  # Heartbeat polling interval in seconds while the tub is offline
+OFFLINE_BURST_INTERVAL = 30  # Polling interval in seconds at the start of an outage, when most end
+OFFLINE_BURST_DURATION = 1800  # Seconds after going offline before slowing to the heartbeat
+OPTIMISTIC_STATE_MARGIN = 5  # Seconds a commanded value is shown past its fields' confirmation deadline
+SHADOW_CACHE_TTL = 2  # Seconds a fetched thing_shadow is considered fresh
+REQUEST_BUDGET_RATE = 2.0  # Sustained API requests per second, account-wide
+REQUEST_BUDGET_BURST = 10  # Requests allowed back to back before the rate applies
+TRANSIENT_RETRY_DELAY = 2  # Seconds before the one retry of a transient API failure
+UNCLASSIFIED_FAILURES_BEFORE_REAUTH = 3  # Consecutive unrecognised failures that force a new login
+EMPTY_REPLIES_BEFORE_REAUTH = 3  # Consecutive accepted replies without data that force one new login
+
+# Deadlines in seconds for a whole API operation, including its retry and any re-login
+DEADLINE_SHADOW = 10
+DEADLINE_COMMAND = 15
+DEADLINE_AUTH = 30
+DEADLINE_DEVICE_LIST = 30
+LATENCY_SAMPLES = 50  # Recent replies per request path kept for latency percentiles
+HEDGE_MIN_SAMPLES = 20  # Replies needed before the p95 is trusted for hedging
+HEDGE_MIN_DELAY = 0.3  # Never hedge a read sooner than this, in seconds
+TRACE_HISTORY = 50  # Update traces kept for diagnostics
+HTTP_CONCURRENCY = 4  # HTTP calls (executor threads) one config entry may have in flight
+SHUTDOWN_TIMEOUT = 5  # Seconds unload waits for cancelled tasks before reporting them as leaked
+
+# Command confirmation timing, learned per field (latency_model.py)
+CONFIRM_FIRST_POLL = 3  # Seconds after a command reply before the first confirmation poll, until learned
+CONFIRM_POLL_INTERVAL = 3  # Seconds between later confirmation polls
+CONFIRM_DEADLINE = 15  # Seconds after which an unconfirmed command is given up, until learned
+CONFIRM_MIN_SAMPLES = 5  # Confirmations of a field before its learned timing is used
+CONFIRM_POLL_MIN = 1  # Never poll for a confirmation sooner than this
+CONFIRM_DEADLINE_MARGIN = 1.5  # The learned deadline is the p95 latency times this
+CONFIRM_DEADLINE_MIN = 5
+CONFIRM_DEADLINE_MAX = 60
+CONFIRM_OBSERVE_WINDOW = 120  # Seconds after a command a late confirmation is still timed
+
+# Coordinator health watchdog (watchdog.py)
+WATCHDOG_INTERVAL = 30  # Seconds between health checks, and between the first recovery steps
+WATCHDOG_FAILURES = 3  # Consecutive failed updates that trigger recovery
+WATCHDOG_STALL_INTERVALS = 3  # Update intervals without a successful update that count as a stall
+WATCHDOG_STALL_MIN = 180  # Seconds without a successful update that never count as a stall
+WATCHDOG_STUCK_REQUEST = 60  # Seconds an HTTP call or shared status read may run before it counts as stuck
+WATCHDOG_BACKOFF_MAX = 1800  # Longest wait between repeats of the last recovery step
+
+# Push channel for shadow updates (push.py)
+PUSH_CONSISTENCY_INTERVAL = 900  # Seconds between full status polls while the push channel is connected
+PUSH_SAMPLE_INTERVAL = 300  # Seconds between updates from the last pushed shadow; under ENERGY_MAX_SAMPLE_GAP
+PUSH_CONFIRM_TIMEOUT = 10  # Seconds a command waits for a pushed confirmation before polling for it
+PUSH_CONNECT_TIMEOUT = 15  # Seconds allowed for connecting and subscribing
+PUSH_RECONNECT_DELAY = 5  # Seconds before the first reconnect; doubles up to PUSH_RECONNECT_MAX
+PUSH_RECONNECT_MAX = 300
+DEFAULT_PUSH_TOPIC = "mspa/{device_id}/shadow"  # {device_id} and {product_id} are filled in
+
+# mspa.profile service defaults
+PROFILE_DEFAULT_DURATION = 60  # Seconds
+PROFILE_DEFAULT_TOP = 20  # Functions and allocation sites listed in the summary
 
 # Configuration
 CONF_PRODUCT_ID = "product_id"
@@ -13,6 +66,22 @@ CONF_REGION = "region"
 CONF_TRACK_TEMPERATURE_UNIT = "track_temperature_unit"
 CONF_RESTORE_STATE = "restore_state"
 CONF_ALWAYS_ENFORCE_UNIT = "always_enforce_unit"
+CONF_RECORD_SESSION = "record_api_session"
+CONF_HEDGE_READS = "hedge_status_reads"
+CONF_TRACE_LOG = "log_update_traces"
+CONF_SAMPLE_LOG = "log_shadow_samples"
+CONF_PUSH_URL = "push_url"
+CONF_PUSH_TOPIC = "push_topic"
+
+# Config entry data key for the token and device list found by the config flow, used once by the first setup
+DISCOVERY_DATA = "mspa_discovery"
+
+# Directory (under the HA config dir) for recorded API sessions
+CASSETTE_DIR = "mspa_cassettes"
+
+# Directory (under the HA config dir) for the binary shadow sample log
+SAMPLE_LOG_DIR = "mspa_samples"
+SAMPLE_LOG_FLUSH_INTERVAL = 300  # Seconds between appends of buffered samples to disk
 
 # Region configuration
 # ROW = Rest of World (Europe, Africa, Middle East, Oceania, etc.)
@@ -68,7 +137,6 @@ SERVICE_SET_JET = "set_jet"
 SERVICE_SET_FILTER = "set_filter"
 
 # Default values
-TEMP_UNIT = UnitOfTemperature.CELSIUS
 MAX_TEMP = 40
 MIN_TEMP = 20
 
@@ -77,4 +145,25 @@ MIN_TEMP = 20
 DEFAULT_PUMP_POWER = 60  # Filter pump: 2000l/t, 60W, 12V
 DEFAULT_BUBBLE_POWER = 900  # Bubble generator: 900W (1.2HP)
 DEFAULT_HEATER_POWER_PREHEAT = 1500  # Heating element: 1500W (preheat mode)
-DEFAULT_HEATER_POWER_HEAT = 2000  # Heating element in active heating (estimated)
\ No newline at end of file
+DEFAULT_HEATER_POWER_HEAT = 2000  # Heating element in active heating (estimated)
+
+# Desired-state reconciliation (restore after power cut, unit enforcement)
+RECONCILE_BACKOFF_BASE = 15  # Seconds before re-sending a command the device ignored
+RECONCILE_BACKOFF_MAX = 600  # Upper bound for the re-send backoff
+RECONCILE_MAX_ATTEMPTS = 5  # Ignored attempts before one-shot targets are given up
+
+# Energy accounting
+ENERGY_MAX_SAMPLE_GAP = 600  # Seconds between samples beyond which power is not integrated
+ENERGY_STATE_UPDATE_INTERVAL = 300  # Minimum seconds between Total Energy state writes
+
+# Rolling statistics (duty cycle, runtimes, energy and water temperature over a window)
+ROLLING_STATS_WINDOW = 86400  # Seconds covered by the rolling sensors
+ROLLING_STATS_RESOLUTION = 60  # Seconds; shorter sample intervals are merged into segments up to this long
+ROLLING_STATS_CAPACITY = 4096  # Segments kept; merging needs at most 2880 for a day, the rest absorbs gaps
+
+# Minimum change before a new value is written to the state machine
+WRITE_THRESHOLD_TEMPERATURE = 0.5  # °C, one step of the shadow's resolution (raw value / 2)
+WRITE_THRESHOLD_POWER = 10  # W
+WRITE_THRESHOLD_PERCENT = 1.0  # Duty cycle, percentage points
+WRITE_THRESHOLD_HOURS = 0.1  # Runtimes
+WRITE_THRESHOLD_ENERGY = 0.05  # kWh
@@ -2,6 +2,20 @@
 import logging
 from datetime import timedelta
 from .mspa_api import MSpaApiClient
+from .energy import MSpaEnergyStatistics
+from .request_scheduler import MSpaRequestPreempted
+from .supervisor import MSpaTaskSupervisor
+from .tracing import MSpaTracer, span
+from .polling import MSpaPollingPolicy
+from .power_cycle import MSpaPowerCycleDetector
+from .shadow import CORE_FIELDS, desired_state, expected_changes, is_device_offline
+from .rolling_stats import MSpaRollingStats
+from .sample_log import MSpaSampleLog
+from .events import EVENT_POWER_CYCLE, shadow_transitions
+from .push import MqttPushChannel
+from .watchdog import STEP_REAUTHENTICATE, STEP_REDISCOVER, STEP_RESET_CONNECTIONS, MSpaWatchdog
+from .reconciler import MSpaStateReconciler
+from .update_cycle import async_update_cycle
 
 from typing import Any, Dict
 import asyncio
@@ -16,12 +30,20 @@ from homeassistant.const import UnitOfTemperature
 from .const import (
     DOMAIN,
     DEFAULT_SCAN_INTERVAL,
-    RAPID_SCAN_INTERVAL,
-    RAPID_POLL_TIMEOUT,
     RAPID_POLL_MAX_ATTEMPTS,
-    CONF_TRACK_TEMPERATURE_UNIT,
-    CONF_RESTORE_STATE,
-    CONF_ALWAYS_ENFORCE_UNIT,
+    OPTIMISTIC_STATE_MARGIN,
+    SHADOW_CACHE_TTL,
+    CONF_RECORD_SESSION,
+    CONF_HEDGE_READS,
+    CONF_TRACE_LOG,
+    CONF_SAMPLE_LOG,
+    PROFILE_DEFAULT_DURATION,
+    PROFILE_DEFAULT_TOP,
+    CASSETTE_DIR,
+    SAMPLE_LOG_DIR,
+    SAMPLE_LOG_FLUSH_INTERVAL,
+    DEFAULT_PUSH_TOPIC,
+    WATCHDOG_INTERVAL,
 )
 
 from homeassistant.const import ATTR_STATE, ATTR_TEMPERATURE
@@ -60,86 +82,200 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
         self.region = self.config.get("region", "ROW")  # Default to ROW for safety
 
         self._last_data = {}
+        self._last_status = {}  # Last raw shadow, stands in while the cloud reports the tub offline
+
+        # Optionally record the API session as a cassette for offline replay
+        self.record_session = config_entry.options.get(CONF_RECORD_SESSION, False)
+        record_path = None
+        if self.record_session:
+            from datetime import datetime
+            record_path = hass.config.path(CASSETTE_DIR, datetime.now().strftime("session_%Y%m%d_%H%M%S.jsonl.gz"))
+
+        self.supervisor = MSpaTaskSupervisor(config_entry.title or DOMAIN)
         self.api = MSpaApiClient(
             hass=hass,
             account_email=self.account_email,
             password=self.password,
             coordinator=self,
             region=self.region,
+            record_path=record_path,
+            hedge_reads=config_entry.options.get(CONF_HEDGE_READS, False),
+            supervisor=self.supervisor,
         )
+        self.energy = MSpaEnergyStatistics(hass, config_entry)
+        self.rolling = MSpaRollingStats()
         self._update_lock = asyncio.Lock()
-        self._rapid_poll_until = None  # Timestamp when to stop rapid polling
-        self._pending_changes = {}  # Track expected changes
-        self._last_heat_state = None  # Track heat state changes
-        self._last_is_online = None  # Track power on/off transitions
-        self._saved_state = {}  # Store state before power off for restoration
-        self._last_snapshot = {}  # Store last known state for change detection
-        self._power_cycle_detected = False  # Flag to track if we just detected a power cycle
+        self.polling = MSpaPollingPolicy()
+        self.power_cycle = MSpaPowerCycleDetector()
+        self.reconciler = MSpaStateReconciler(self.api)
+        self.tracked_entities = {}  # entity_id -> entity, for diagnostics
+        self.shadow_fields = CORE_FIELDS  # Fields decoded on every update; others on access
+        self._optimistic = {}  # key -> (value shown until confirmed, deadline, seconds allowed)
+        self.tracer = MSpaTracer(log_json=config_entry.options.get(CONF_TRACE_LOG, False))
+        self.sample_log = None
+        self._sample_log_flushed = 0.0
+        if config_entry.options.get(CONF_SAMPLE_LOG, False):
+            self.sample_log = MSpaSampleLog(hass.config.path(SAMPLE_LOG_DIR))
+        self._push_config = None  # (url, topic) of the running push channel
+        self._pushed_status = None  # Shadow pushed since the last update
+        self.watchdog = MSpaWatchdog()
 
 
     async def async_request_refresh(self) -> None:
         await super().async_request_refresh()
 
+    async def async_shutdown(self) -> None:
+        """Stop polling and cancel every task and request still running."""
+        await super().async_shutdown()
+        await self.async_set_push(None)
+        await self.async_set_sample_log(False)
+        await self.supervisor.async_shutdown()
+
+    async def async_set_sample_log(self, enabled: bool) -> None:
+        """Start or stop the on-disk shadow sample log, writing what is buffered."""
+        if enabled and self.sample_log is None:
+            self.sample_log = MSpaSampleLog(self.hass.config.path(SAMPLE_LOG_DIR))
+        elif not enabled and self.sample_log is not None:
+            sample_log, self.sample_log = self.sample_log, None
+            await sample_log.async_flush()
+
+    async def async_set_push(self, url: str | None, topic: str = DEFAULT_PUSH_TOPIC) -> None:
+        """Connect, change or drop the push channel for shadow updates."""
+        config = (url, topic) if url else None
+        if config == self._push_config:
+            return
+        self._push_config = None
+        await self.api.async_stop_push()
+        self.polling.push_connected = False
+        self._pushed_status = None
+        if config is None:
+            return
+        if not MqttPushChannel.available():
+            _LOGGER.warning("MSpa push updates need the paho-mqtt package; polling instead")
+            return
+        self._push_config = config
+        self.api.push = MqttPushChannel(
+            url, topic.format(device_id=self.api.device_id, product_id=self.api.product_id),
+            client_id=f"mspa-{self.api.device_id}",
+        )
+        self.api.start_push(self._handle_push_update, self._handle_push_state)
+
+    def start_watchdog(self) -> None:
+        """Check the coordinator's health in the background until unload."""
+        self.watchdog.start(self.hass.loop.time())
+        self.supervisor.create_task(self._async_watchdog(), "watchdog")
+
+    async def _async_watchdog(self) -> None:
+        while True:
+            await asyncio.sleep(WATCHDOG_INTERVAL)
+            if self.api.adopt_shared_token():
+                _LOGGER.info("MSpa token was replaced by another login, using the new one")
+                self.watchdog.stats["stale_tokens"] += 1
+            now = self.hass.loop.time()
+            step = self.watchdog.check(now, self.update_interval.total_seconds(), self.api.oldest_request_age(now))
+            if step is None:
+                continue
+            _LOGGER.warning("MSpa looks stuck (%s), recovering: %s", self.watchdog.problem[1], step)
+            try:
+                await self._async_recover(step)
+            except Exception as err:  # noqa: BLE001 - the next check escalates
+                self.watchdog.stats["recovery_errors"] += 1
+                _LOGGER.warning("MSpa recovery step %s failed: %s", step, err)
+            # Try an update now instead of at the next interval
+            self.supervisor.create_task(self.async_request_refresh(), "watchdog refresh")
+
+    async def _async_recover(self, step: str) -> None:
+        """Take one recovery step chosen by the watchdog."""
+        if step == STEP_RESET_CONNECTIONS:
+            await self.api.async_reset_connections()
+        elif step == STEP_REAUTHENTICATE:
+            await self.api.async_reset_connections()
+            await self.api.async_reauthenticate()
+        elif step == STEP_REDISCOVER:
+            device_id = self.api.device_id
+            await self.api.async_init()
+            if self.api.device_id != device_id and self._push_config is not None:
+                # The push topic names the device
+                config, self._push_config = self._push_config, None
+                await self.async_set_push(*config)
+
+    def _handle_push_update(self, status: dict) -> None:
+        """Process a pushed shadow through the normal update cycle."""
+        self._pushed_status = status
+        self.supervisor.create_task(self.async_request_refresh(), "push refresh")
+
+    def _handle_push_state(self, connected: bool) -> None:
+        """Poll slowly while push works; poll normally, and right away, when it stops."""
+        if connected == self.polling.push_connected:
+            return
+        self.polling.push_connected = connected
+        if not connected:
+            self._pushed_status = None
+            self.update_interval = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+            # Catch up on anything missed while the channel was failing
+            self.supervisor.create_task(self.async_request_refresh(), "push fallback refresh")
+
     async def _async_update_data(self) -> Dict[str, Any]:
         """Update data via direct function call."""
-        try:
-            # Use cached status if available
-            if self.api._last_status is not None:
-                status_data = self.api._last_status
-                self.api._last_status = None  # Clear after use
-            else:
-                status_data = await self.api.get_hot_tub_status()
-
-            fault_value = status_data.get("fault", "")
-            transformed_data = {
-                "water_temperature": float(status_data.get("water_temperature", 0))/2,
-                "target_temperature": float(status_data.get("temperature_setting", 0))/2,
-                "heater": "on" if status_data.get("heater_state", 0) else "off",
-                "filter": "on" if status_data.get("filter_state", 0) else "off",
-                "bubble": "on" if status_data.get("bubble_state", 0) else "off",
-                "jet": "on" if status_data.get("jet_state", 0) else "off",
-                "ozone": "on" if status_data.get("ozone_state", 0) else "off",
-                "uvc": "on" if status_data.get("uvc_state", 0) else "off",
-                "bubble_level": status_data.get("bubble_level", 1),
-                "fault": fault_value if fault_value else "OK",
-                # Diagnostic sensors
-                "wifivertion": status_data.get("wifivertion"),
-                "otastatus": status_data.get("otastatus"),
-                "mcuversion": status_data.get("mcuversion"),
-                "ConnectType": status_data.get("ConnectType"),
-                "temperature_unit": status_data.get("temperature_unit"),
-                "auto_inflate": status_data.get("auto_inflate"),
-                "filter_current": status_data.get("filter_current"),
-                "safety_lock": status_data.get("safety_lock"),
-                "heat_time_switch": status_data.get("heat_time_switch"),
-                "heat_state": status_data.get("heat_state"),
-                "multimcuotainfo": status_data.get("multimcuotainfo"),
-                "heat_time": status_data.get("heat_time"),
-                "filter_life": status_data.get("filter_life"),
-                "trdversion": status_data.get("trdversion"),
-                "is_online": status_data.get("is_online"),
-                "warning": status_data.get("warning"),
-                "device_heat_perhour": status_data.get("device_heat_perhour"),
-            }
-
-            self._last_data = transformed_data
-            _LOGGER.debug("Fetched MSpa transformed data: %s", transformed_data)
-            
-            # Check for power cycle and restore state if enabled
-            await self._check_power_cycle(transformed_data)
-            
-            # Handle temperature unit enforcement (if always_enforce_unit is enabled)
-            await self._enforce_temperature_unit(transformed_data)
-            
-            # Check if we need to adjust polling based on heat state or pending changes
-            await self._check_adaptive_polling(transformed_data)
-            
-            return transformed_data
+        with self.tracer.trace("update", interval=self.update_interval.total_seconds()):
+            try:
+                # Served from the API client's shadow cache when a fetch for a
+                # command confirmation or a concurrent refresh just completed.
+                # Never accept data older than half the poll interval, so rapid
+                # polling still sees every change.
+                max_age = min(SHADOW_CACHE_TTL, self.update_interval.total_seconds() / 2)
+                pushed, self._pushed_status = self._pushed_status, None
+                # Fetch, decode, power cycle handling, reconciliation and the
+                # next interval; shared with the simulator (update_cycle.py)
+                _, transformed_data, interval = await async_update_cycle(
+                    self.api, self.polling, self.power_cycle, self.reconciler,
+                    self.config_entry.options, self._ha_temperature_unit(),
+                    self._last_status, pushed, max_age, self.shadow_fields,
+                    on_data=self._async_process_data, on_power_cycle=self._fire_power_cycle_event,
+                )
+                if interval != self.update_interval.total_seconds():
+                    self.update_interval = timedelta(seconds=interval)
 
-        except Exception as err:
-            _LOGGER.error("Error updating MSpa data: %s", str(err))
-            raise UpdateFailed(f"Update failed: {str(err)}")
+                self.watchdog.update_succeeded(self.hass.loop.time())
+                return transformed_data
+
+            except MSpaRequestPreempted:
+                # A user command took this poll's slot; keep the current data, the
+                # command triggers its own refresh when it completes
+                _LOGGER.debug("MSpa status poll pre-empted by a command")
+                if self._last_data:
+                    return self._last_data
+                raise UpdateFailed("Update pre-empted by a command")
+            except Exception as err:
+                _LOGGER.error("Error updating MSpa data: %s", str(err))
+                self.watchdog.update_failed(self.hass.loop.time())
+                raise UpdateFailed(f"Update failed: {str(err)}")
+
+    async def _async_process_data(self, status_data: dict, transformed_data) -> None:
+        """Record a decoded shadow: events, optimistic state, energy and samples."""
+        self._last_status = status_data
 
+        # Fault, filter, temperature and preheat transitions as bus events
+        self._fire_events(shadow_transitions(self._last_data, transformed_data))
+        self._last_data = transformed_data
+        _LOGGER.debug("Fetched MSpa transformed data: %s", transformed_data)
+        self._reconcile_optimistic(transformed_data)
+
+        # Energy and the rolling statistics are integrated here on every
+        # sample, independent of how often their sensors write state
+        self.energy.add_sample(transformed_data)
+        power = sum(self.energy.current_power.values())
+        self.rolling.add_sample(transformed_data, power, self.hass.loop.time())
+        if self.sample_log is None:
+            return
+        self.sample_log.add(transformed_data, power)
+        if self.hass.loop.time() - self._sample_log_flushed >= SAMPLE_LOG_FLUSH_INTERVAL:
+            self._sample_log_flushed = self.hass.loop.time()
+            with span("sample_log", samples=self.sample_log.pending):
+                try:
+                    await self.sample_log.async_flush()
+                except OSError as err:
+                    _LOGGER.warning("Could not write MSpa shadow samples: %s", err)
 
     # Map of features to their respective API methods
     FEATURE_API_MAP = {
@@ -159,6 +295,10 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
                 raise ValueError("State must be 'on' or 'off'")
             numerical_state = 1 if state.lower() == "on" else 0
             api_method = getattr(self.api, self.FEATURE_API_MAP[feature])
+            # An explicit user choice overrides any pending restore target
+            self.reconciler.discard_fields([f"{feature}_state"])
+            # Show the new state right away; confirmed or rolled back by later polls
+            self._set_optimistic({feature: state.lower()}, [f"{feature}_state"])
             
             # Bubble state requires level parameter
             if feature == "bubble":
@@ -171,6 +311,7 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
             await self.async_request_refresh()
         except Exception as err:
             _LOGGER.error("Failed to set %s to %s: %s", feature, state, str(err))
+            self._rollback_optimistic([feature], err)
             raise
 
     async def set_temperature(self, service: ServiceCall) -> None:
@@ -178,6 +319,8 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
         try:
             temperature = service.data.get(ATTR_TEMPERATURE)
             _LOGGER.debug("Setting temperature to %s", temperature)
+            self.reconciler.discard_fields(["temperature_setting"])
+            self._set_optimistic({"target_temperature": float(temperature)}, ["temperature_setting"])
             await self.api.set_temperature_setting(temperature)
             
             # Enable rapid polling to quickly detect the change
@@ -185,6 +328,7 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
             await self.async_request_refresh()
         except Exception as err:
             _LOGGER.error("Failed to set temperature: %s", str(err))
+            self._rollback_optimistic(["target_temperature"], err)
             raise
 
     async def set_bubble(self, service: ServiceCall) -> None:
@@ -193,6 +337,8 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
             bubble_state = service.data.get(ATTR_STATE)
             _LOGGER.debug("Setting bubble state to %s", bubble_state)
             numerical_state = 1 if bubble_state.lower() == "on" else 0
+            self.reconciler.discard_fields(["bubble_state"])
+            self._set_optimistic({"bubble": bubble_state.lower()}, ["bubble_state", "bubble_level"])
             await self.api.set_bubble_state(numerical_state, self._last_data.get("bubble_level", 1))
             
             # Enable rapid polling to quickly detect the change
@@ -200,12 +346,15 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
             await self.async_request_refresh()
         except Exception as err:
             _LOGGER.error("Failed to set bubble state: %s", str(err))
+            self._rollback_optimistic(["bubble"], err)
             raise
 
     async def set_bubble_level(self, service: ServiceCall) -> None:
         try:
             bubble_level = service.data.get("level")
             _LOGGER.debug("Setting bubble level to %s", bubble_level)
+            self.reconciler.discard_fields(["bubble_level"])
+            self._set_optimistic({"bubble_level": bubble_level}, ["bubble_level"])
             await self.api.set_bubble_level(bubble_level)
             
             # Enable rapid polling to quickly detect the change
@@ -213,12 +362,41 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
             await self.async_request_refresh()
         except Exception as err:
             _LOGGER.error("Failed to set bubble level: %s", str(err))
+            self._rollback_optimistic(["bubble_level"], err)
+            raise
+
+    async def set_state(self, service: ServiceCall) -> None:
+        """Apply any subset of fields as a single command with one confirmation."""
+        desired = desired_state(service.data, self._last_data.get("bubble_level", 1))
+
+        _LOGGER.debug("Setting MSpa state %s", desired)
+        changes = expected_changes(desired)
+        try:
+            self.reconciler.discard_fields(list(desired))
+            self._set_optimistic(changes, desired)
+            await self.api.send_device_command(desired)
+
+            # Enable rapid polling to quickly detect the change
+            self._enable_rapid_polling(changes)
+            await self.async_request_refresh()
+        except Exception as err:
+            _LOGGER.error("Failed to set MSpa state %s: %s", desired, str(err))
+            self._rollback_optimistic(list(changes), err)
             raise
 
+    async def profile(self, service: ServiceCall) -> None:
+        """Profile the integration in the background for the requested window."""
+        from .profiler import async_profile
+
+        duration = float(service.data.get("duration", PROFILE_DEFAULT_DURATION))
+        top = int(service.data.get("top", PROFILE_DEFAULT_TOP))
+        self.supervisor.create_task(async_profile(self.hass, duration, top), "profile")
+
     async def set_temperature_unit(self, unit: int) -> None:
         """Set temperature unit (0=Celsius, 1=Fahrenheit)."""
         try:
             _LOGGER.debug("Setting temperature unit to %s", unit)
+            self.reconciler.discard_fields(["temperature_unit"])
             await self.api.set_temperature_unit(unit)
             
             # Enable rapid polling to quickly detect the change
@@ -243,284 +421,95 @@ class MSpaUpdateCoordinator(DataUpdateCoordinator):
     set_ozone = handle_feature_service
     set_uvc = handle_feature_service
 
-    async def _check_adaptive_polling(self, data: dict) -> None:
-        """Check if we should enable or disable rapid polling."""
-        from datetime import datetime
-        import time
-        
-        current_time = time.time()
-        should_rapid_poll = False
-        
-        # Check if any pending changes have been confirmed
-        if self._pending_changes:
-            confirmed = []
-            for key, expected_value in list(self._pending_changes.items()):
-                if data.get(key) == expected_value:
-                    _LOGGER.debug(f"Pending change confirmed: {key} = {expected_value}")
-                    confirmed.append(key)
-            
-            # Remove confirmed changes
-            for key in confirmed:
-                del self._pending_changes[key]
-            
-            # Continue rapid polling if there are still pending changes
-            if self._pending_changes:
-                should_rapid_poll = True
-                _LOGGER.debug(f"Still waiting for changes: {self._pending_changes}")
-        
-        # Check if we're in preheat mode (heat_state == 2)
-        current_heat_state = data.get("heat_state")
-        if current_heat_state == 2 and data.get("heater") == "on":
-            _LOGGER.debug("Preheat mode detected, enabling rapid polling")
-            should_rapid_poll = True
-        
-        # Track heat state transitions
-        if self._last_heat_state != current_heat_state:
-            _LOGGER.debug(f"Heat state changed: {self._last_heat_state} -> {current_heat_state}")
-            self._last_heat_state = current_heat_state
-        
-        # Check if rapid poll timeout has expired
-        if self._rapid_poll_until and current_time > self._rapid_poll_until:
-            _LOGGER.debug("Rapid poll timeout expired, returning to normal polling")
-            self._rapid_poll_until = None
-            should_rapid_poll = False
-        
-        # Adjust polling interval
-        if should_rapid_poll and not self._rapid_poll_until:
-            # Start rapid polling
-            self._rapid_poll_until = current_time + RAPID_POLL_TIMEOUT
-            self.update_interval = timedelta(seconds=RAPID_SCAN_INTERVAL)
-            _LOGGER.info("Enabled rapid polling (1s interval) for up to 15 seconds")
-        elif not should_rapid_poll and self.update_interval.total_seconds() < DEFAULT_SCAN_INTERVAL:
-            # Return to normal polling
-            self._rapid_poll_until = None
-            self.update_interval = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
-            _LOGGER.info("Returned to normal polling (60s interval)")
-    
-    def _enable_rapid_polling(self, expected_changes: dict) -> None:
-        """Enable rapid polling and track expected changes."""
-        import time
-        
-        self._pending_changes.update(expected_changes)
-        self._rapid_poll_until = time.time() + RAPID_POLL_TIMEOUT
-        self.update_interval = timedelta(seconds=RAPID_SCAN_INTERVAL)
-        _LOGGER.debug(f"Rapid polling enabled, waiting for changes: {expected_changes}")
-    
-    async def _check_power_cycle(self, data: dict) -> None:
-        """Check for power cycle and restore state if enabled.
-        
-        Uses multiple detection methods:
-        1. is_online transition from False to True
-        2. Multiple simultaneous parameter changes indicating a reset
-        3. Temperature unit reverting to default (typically F/1)
-        """
-        current_is_online = data.get("is_online", True)
-        power_cycle_detected = False
-        detection_method = ""
-        
-        # Method 1: Track is_online transitions
-        if self._last_is_online is not None:
-            # Detect power off transition (True → False)
-            if self._last_is_online and not current_is_online:
-                _LOGGER.info("🔌 MSpa power OFF detected (is_online: True → False)")
-                # Save current state before power off
-                self._saved_state = {
-                    "heater": data.get("heater"),
-                    "target_temperature": data.get("target_temperature"),
-                    "filter": data.get("filter"),
-                    "temperature_unit": data.get("temperature_unit"),
-                    "ozone": data.get("ozone"),
-                    "uvc": data.get("uvc"),
-                }
-                _LOGGER.info(f"💾 Saved state for restoration: {self._saved_state}")
-            
-            # Detect power on transition (False → True)
-            elif not self._last_is_online and current_is_online:
-                power_cycle_detected = True
-                detection_method = "is_online transition (False → True)"
-                _LOGGER.info(f"⚡ MSpa power ON detected via {detection_method}")
-        
-        # Method 2: Detect multiple simultaneous changes suggesting a reset
-        # This helps catch quick power cycles that we might miss with is_online
-        if self._last_snapshot and not power_cycle_detected:
-            changes_detected = []
-            
-            # Check for key parameters reverting to defaults
-            if self._last_snapshot.get("temperature_unit") == 0 and data.get("temperature_unit") == 1:
-                changes_detected.append("temp_unit_reset_to_F")
-            
-            if self._last_snapshot.get("heater") == "on" and data.get("heater") == "off":
-                changes_detected.append("heater_off")
-            
-            if self._last_snapshot.get("filter") == "on" and data.get("filter") == "off":
-                changes_detected.append("filter_off")
-            
-            if self._last_snapshot.get("ozone") == "on" and data.get("ozone") == "off":
-                changes_detected.append("ozone_off")
-            
-            if self._last_snapshot.get("uvc") == "on" and data.get("uvc") == "off":
-                changes_detected.append("uvc_off")
-            
-            # If multiple things turned off simultaneously, it's likely a power cycle
-            if len(changes_detected) >= 2:
-                power_cycle_detected = True
-                detection_method = f"multiple simultaneous changes: {', '.join(changes_detected)}"
-                _LOGGER.warning(f"⚡ Possible power cycle detected via {detection_method}")
-                _LOGGER.info("💡 TIP: If this is a false positive, please report it with the changes detected")
-        
-        # Store current state as snapshot for next comparison
-        self._last_snapshot = {
-            "temperature_unit": data.get("temperature_unit"),
-            "heater": data.get("heater"),
-            "filter": data.get("filter"),
-            "ozone": data.get("ozone"),
-            "uvc": data.get("uvc"),
-            "target_temperature": data.get("target_temperature"),
-        }
-        
-        # Handle power cycle restoration
-        if power_cycle_detected:
-            self._power_cycle_detected = True
-            
-            # Check config options
-            track_unit = self.config_entry.options.get(CONF_TRACK_TEMPERATURE_UNIT, False)
-            restore_enabled = self.config_entry.options.get(CONF_RESTORE_STATE, False)
-            
-            _LOGGER.info(f"🔧 Config: track_temperature_unit={track_unit}, restore_state={restore_enabled}")
-            
-            # Handle temperature unit tracking (independent of restore_state)
-            if track_unit:
-                # Set temperature unit based on HA unit system
-                ha_unit = self.hass.config.units.temperature_unit
-                desired_unit = 1 if ha_unit == UnitOfTemperature.FAHRENHEIT else 0
-                current_unit = data.get("temperature_unit", 0)
-                
-                if current_unit != desired_unit:
-                    unit_name = "Fahrenheit" if desired_unit == 1 else "Celsius"
-                    _LOGGER.info(f"🌡️ Setting MSpa temperature unit to {unit_name} to match HA system")
-                    try:
-                        await self.set_temperature_unit(desired_unit)
-                    except Exception as err:
-                        _LOGGER.error(f"❌ Failed to set temperature unit: {err}")
-            
-            # Handle state restoration (independent of track_unit)
-            if restore_enabled:
-                if self._saved_state:
-                    _LOGGER.info("♻️ Starting state restoration after power cycle")
-                    await self._restore_saved_state()
-                else:
-                    _LOGGER.warning("⚠️ No saved state available for restoration (device may have been off during HA restart)")
-        
-        # Update last is_online state
-        self._last_is_online = current_is_online
-    
-    async def _restore_saved_state(self) -> None:
-        """Restore saved state after power cycle."""
-        try:
-            restored_items = []
-            failed_items = []
-            
-            # Small delay to allow temperature unit to be set first
-            await asyncio.sleep(2)
-            
-            _LOGGER.info(f"♻️ Restoring state from: {self._saved_state}")
-            
-            # Restore target temperature if saved
-            if "target_temperature" in self._saved_state:
-                temp = self._saved_state["target_temperature"]
-                try:
-                    _LOGGER.info(f"🌡️ Restoring target temperature to {temp}°C")
-                    await self.api.set_temperature_setting(temp)
-                    restored_items.append(f"temperature={temp}°C")
-                    await asyncio.sleep(0.5)  # Small delay between commands
-                except Exception as err:
-                    _LOGGER.error(f"❌ Failed to restore temperature: {err}")
-                    failed_items.append(f"temperature: {err}")
-            
-            # Restore heater state if saved and was on
-            if self._saved_state.get("heater") == "on":
-                try:
-                    _LOGGER.info("♨️ Restoring heater to ON")
-                    await self.set_feature_state("heater", "on")
-                    restored_items.append("heater=ON")
-                    await asyncio.sleep(0.5)
-                except Exception as err:
-                    _LOGGER.error(f"❌ Failed to restore heater: {err}")
-                    failed_items.append(f"heater: {err}")
-            
-            # Restore filter state if saved and was on
-            if self._saved_state.get("filter") == "on":
-                try:
-                    _LOGGER.info("💨 Restoring filter to ON")
-                    await self.set_feature_state("filter", "on")
-                    restored_items.append("filter=ON")
-                    await asyncio.sleep(0.5)
-                except Exception as err:
-                    _LOGGER.error(f"❌ Failed to restore filter: {err}")
-                    failed_items.append(f"filter: {err}")
-            
-            # Restore ozone if saved and was on
-            if self._saved_state.get("ozone") == "on":
-                try:
-                    _LOGGER.info("🫧 Restoring ozone to ON")
-                    await self.set_feature_state("ozone", "on")
-                    restored_items.append("ozone=ON")
-                    await asyncio.sleep(0.5)
-                except Exception as err:
-                    _LOGGER.error(f"❌ Failed to restore ozone: {err}")
-                    failed_items.append(f"ozone: {err}")
-            
-            # Restore UVC if saved and was on
-            if self._saved_state.get("uvc") == "on":
-                try:
-                    _LOGGER.info("💡 Restoring UVC to ON")
-                    await self.set_feature_state("uvc", "on")
-                    restored_items.append("uvc=ON")
-                    await asyncio.sleep(0.5)
-                except Exception as err:
-                    _LOGGER.error(f"❌ Failed to restore UVC: {err}")
-                    failed_items.append(f"uvc: {err}")
-            
-            # Summary
-            if restored_items:
-                _LOGGER.info(f"✅ State restoration completed: {', '.join(restored_items)}")
-            if failed_items:
-                _LOGGER.error(f"❌ Failed to restore some items: {', '.join(failed_items)}")
-            if not restored_items and not failed_items:
-                _LOGGER.info("ℹ️ No items to restore (all were OFF)")
-            
-        except Exception as err:
-            _LOGGER.error(f"❌ State restoration failed with error: {err}", exc_info=True)
-    
-    async def _enforce_temperature_unit(self, data: dict) -> None:
-        """Enforce temperature unit to match HA system if always_enforce_unit is enabled.
-        
-        This is useful for devices that forget temperature unit setting even without a full power cycle.
+    def _enable_rapid_polling(self, expected_changes: dict, command: dict | None = None) -> None:
+        """Enable rapid polling and track expected changes.
+
+        For an unconfirmed command, polling follows the confirmation timing
+        learned for its fields.
         """
-        always_enforce = self.config_entry.options.get(CONF_ALWAYS_ENFORCE_UNIT, False)
-        
-        if not always_enforce:
-            return
-        
-        # Don't enforce immediately after a detected power cycle (already handled there)
-        if self._power_cycle_detected:
-            self._power_cycle_detected = False
-            return
-        
-        # Get desired unit from HA system
+        timing = self.api.confirm_latency.schedule(command) if command else ()
+        interval = self.polling.expect_changes(expected_changes, self.hass.loop.time(), *timing)
+        self.update_interval = timedelta(seconds=interval)
+
+    def _fire_power_cycle_event(self, method: str, before: dict) -> None:
+        """Fire mspa_power_cycle; update_cycle.py declares the restore targets."""
+        self._fire_events([(EVENT_POWER_CYCLE, {
+            "method": method,
+            # Via is_online, the settings saved when the tub went offline
+            "previous": self.power_cycle.saved_state if method.startswith("is_online") else before,
+            "new": self.power_cycle.last_snapshot,
+        })])
+
+    def _fire_events(self, events) -> None:
+        """Fire mspa_* transition events (see events.py) on the bus."""
+        for event_type, data in events:
+            _LOGGER.debug("Firing %s: %s", event_type, data)
+            self.hass.bus.async_fire(event_type, {
+                "config_entry_id": self.config_entry.entry_id,
+                "device_id": self.api.device_id,
+                **data,
+            })
+
+    def _ha_temperature_unit(self) -> int:
+        """Return the MSpa temperature unit matching the HA unit system."""
         ha_unit = self.hass.config.units.temperature_unit
-        desired_unit = 1 if ha_unit == UnitOfTemperature.FAHRENHEIT else 0
-        current_unit = data.get("temperature_unit", 0)
-        
-        # Only enforce if there's a mismatch
-        if current_unit != desired_unit:
-            unit_name = "Fahrenheit" if desired_unit == 1 else "Celsius"
-            _LOGGER.info(f"🌡️ Enforcing temperature unit: {unit_name} (always_enforce_unit enabled)")
-            try:
-                await self.set_temperature_unit(desired_unit)
-            except Exception as err:
-                _LOGGER.error(f"❌ Failed to enforce temperature unit: {err}")
-    
+        return 1 if ha_unit == UnitOfTemperature.FAHRENHEIT else 0
+
+    is_device_offline = staticmethod(is_device_offline)
+
+    def _set_optimistic(self, changes: dict, fields) -> None:
+        """Overlay values the user just asked for on last_data and show them now.
+
+        fields are the shadow fields the command sets. The values are shown
+        until the learned confirmation deadline of the slowest one, plus a
+        margin, has passed.
+        """
+        timeout = self.api.confirm_latency.schedule(fields)[1] + OPTIMISTIC_STATE_MARGIN
+        deadline = self.hass.loop.time() + timeout
+        for key, value in changes.items():
+            self._optimistic[key] = (value, deadline, timeout)
+        self.async_update_listeners()
+
+    def _rollback_optimistic(self, keys, reason) -> None:
+        """Drop optimistic values, e.g. because the command failed."""
+        rolled_back = [key for key in keys if self._optimistic.pop(key, None) is not None]
+        if rolled_back:
+            _LOGGER.warning(f"↩️ Rolled back optimistic state for {', '.join(rolled_back)}: {reason}")
+            self.async_update_listeners()
+
+    def _reconcile_optimistic(self, data: dict) -> None:
+        """Confirm optimistic values the shadow now shows; roll back expired ones."""
+        now = self.hass.loop.time()
+        for key, (value, deadline, timeout) in list(self._optimistic.items()):
+            if data.get(key) == value:
+                _LOGGER.debug(f"Optimistic state confirmed: {key} = {value}")
+                del self._optimistic[key]
+            elif now > deadline:
+                _LOGGER.warning(
+                    f"↩️ MSpa did not confirm {key} = {value} within {timeout:.0f}s, "
+                    f"showing the reported value {data.get(key)} again"
+                )
+                del self._optimistic[key]
+
+    def update_shadow_fields(self) -> None:
+        """Decode on every update only the fields enabled entities and the coordinator read.
+
+        Called as entities are added and removed; enabling or disabling an
+        entity in the registry reloads the entry, which re-adds them.
+        """
+        fields = CORE_FIELDS.union(*(
+            getattr(entity, "shadow_fields", ()) for entity in self.tracked_entities.values()
+        ))
+        if fields != self.shadow_fields:
+            _LOGGER.debug("Decoding %d shadow field(s) on every update: %s", len(fields), sorted(fields))
+            self.shadow_fields = fields
+
     @property
     def last_data(self) -> dict:
-        return self._last_data
+        """Latest decoded shadow with any unconfirmed user changes overlaid."""
+        if not self._optimistic:
+            return self._last_data
+        overrides = {key: value for key, (value, *_) in self._optimistic.items()}
+        if hasattr(self._last_data, "overlay"):
+            return self._last_data.overlay(overrides)
+        return {**self._last_data, **overrides}
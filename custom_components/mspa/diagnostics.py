@@ -0,0 +1,70 @@
+"""Diagnostics support for the MSpa integration."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PUSH_TOPIC, CONF_PUSH_URL, DOMAIN
+
+TO_REDACT = {"account_email", "password", "token", "device_id", "product_id"}
+# The push URL can carry the broker's user and password, the topic the device id
+OPTIONS_TO_REDACT = {CONF_PUSH_URL, CONF_PUSH_TOPIC}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), OPTIONS_TO_REDACT),
+        },
+        "device": {
+            "series": getattr(coordinator, "series", None),
+            "model": getattr(coordinator, "model", None),
+            "software_version": getattr(coordinator, "software_version", None),
+            "region": coordinator.region,
+        },
+        "last_data": dict(coordinator.last_data),
+        "polling": {
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "last_update_success": coordinator.last_update_success,
+            "offline_mode": coordinator.polling.offline_mode,
+            "pending_changes": coordinator.polling.pending_changes,
+            "power_cycles_detected": [
+                {"method": method} for _, method in coordinator.power_cycle.detections
+            ],
+        },
+        "request_budget": {
+            "rate": coordinator.api.scheduler.rate,
+            "burst": coordinator.api.scheduler.burst,
+            "queued": coordinator.api.scheduler.queued,
+            "lanes": coordinator.api.scheduler.stats,
+        },
+        "api_responses": dict(coordinator.api.response_stats),
+        "api_latency": {
+            "paths": coordinator.api.latency_stats(),
+            "hedging": coordinator.api.hedge_reads,
+            "hedges": dict(coordinator.api.hedge_stats),
+            "confirmation": coordinator.api.confirm_latency.as_dict(),
+        },
+        "update_traces": {
+            "phases": coordinator.tracer.phase_summary(),
+            "history": list(coordinator.tracer.traces),
+        },
+        "tasks": coordinator.supervisor.as_dict(),
+        "push": coordinator.api.push.as_dict() if coordinator.api.push is not None else None,
+        "watchdog": coordinator.watchdog.as_dict(),
+        "rolling_stats": coordinator.rolling.as_dict(),
+        "reconciler": {
+            "targets": coordinator.reconciler.targets,
+            "commands_sent": coordinator.reconciler.commands_sent,
+        },
+        "entity_writes": {
+            entity_id: {
+                "writes_per_hour": entity.writes_per_hour,
+                "writes_suppressed": entity.writes_suppressed,
+            }
+            for entity_id, entity in coordinator.tracked_entities.items()
+        },
+    }
@@ -0,0 +1,210 @@
+"""Energy accounting for the MSpa integration.
+
+The coordinator feeds every decoded shadow into MSpaEnergyStatistics, which
+integrates the estimated power of each component (pump, bubble, heater) and
+pushes exact hourly totals into the recorder as external long-term statistics.
+The Total Energy sensor reads its running total from here, so it no longer has
+to write state on every poll to keep the Energy dashboard accurate, and
+keeps the total and the unfinished hour across restarts (restore_data()).
+
+Only importing into the recorder needs Home Assistant.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+from .const import (
+    DOMAIN,
+    DEFAULT_PUMP_POWER,
+    DEFAULT_BUBBLE_POWER,
+    DEFAULT_HEATER_POWER_PREHEAT,
+    DEFAULT_HEATER_POWER_HEAT,
+    ENERGY_MAX_SAMPLE_GAP,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+COMPONENTS = ("pump", "bubble", "heater")
+STATISTIC_NAMES = {
+    "pump": "MSpa pump energy",
+    "bubble": "MSpa bubble energy",
+    "heater": "MSpa heater energy",
+    "total": "MSpa total energy",
+}
+
+
+def _option_int(options, key: str, default: int) -> int:
+    try:
+        value = int(options.get(key, default))
+        if value < 0:
+            raise ValueError
+        return value
+    except (TypeError, ValueError):
+        return default
+
+
+def component_power(data: dict, options) -> dict:
+    """Return the estimated power draw in watts of each component."""
+    heater_w = 0
+    if data.get("heater") == "on":
+        heat_state = data.get("heat_state")
+        if heat_state == 2:  # Preheating
+            heater_w = _option_int(options, "heater_power_preheat", DEFAULT_HEATER_POWER_PREHEAT)
+        elif heat_state == 3:  # Active heating
+            heater_w = _option_int(options, "heater_power_heat", DEFAULT_HEATER_POWER_HEAT)
+    return {
+        "pump": _option_int(options, "pump_power", DEFAULT_PUMP_POWER) if data.get("filter") == "on" else 0,
+        "bubble": _option_int(options, "bubble_power", DEFAULT_BUBBLE_POWER) if data.get("bubble") == "on" else 0,
+        "heater": heater_w,
+    }
+
+
+def statistic_id(component: str) -> str:
+    return f"{DOMAIN}:energy_{component}"
+
+
+class MSpaEnergyStatistics:
+    """Integrate component power per hour and import it as long-term statistics."""
+
+    def __init__(self, hass, config_entry) -> None:
+        self.hass = hass
+        self.config_entry = config_entry
+        self.total_kwh = 0.0  # Running total shown by the Total Energy sensor
+        self.current_power = {component: 0 for component in COMPONENTS}
+        self._last_sample = None
+        self._hour_start = None
+        self._hour_kwh = {component: 0.0 for component in COMPONENTS}
+        self._sums = {component: 0.0 for component in (*COMPONENTS, "total")}
+        self._last_imported = None  # Start of the newest hour already in the recorder
+        self._enabled = False
+
+    async def async_load(self) -> None:
+        """Resume the cumulative sums from the recorder, if it is running."""
+        if "recorder" not in self.hass.config.components:
+            _LOGGER.info("Recorder not loaded, MSpa energy statistics import disabled")
+            return
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        for key in self._sums:
+            stat_id = statistic_id(key)
+            last = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics, self.hass, 1, stat_id, True, {"sum"}
+            )
+            if last.get(stat_id):
+                row = last[stat_id][0]
+                self._sums[key] = row.get("sum") or 0.0
+                start = row["start"]
+                start = datetime.fromtimestamp(start, timezone.utc) if isinstance(start, (int, float)) else start
+                if self._last_imported is None or start > self._last_imported:
+                    self._last_imported = start
+        self._enabled = True
+        _LOGGER.debug("Resumed MSpa energy statistics: %s (last hour %s)", self._sums, self._last_imported)
+
+    def restore_data(self) -> dict:
+        """Return what restore() needs after a restart: the total and the unfinished hour."""
+        return {
+            "total_kwh": self.total_kwh,
+            "hour_start": self._hour_start.isoformat() if self._hour_start else None,
+            "hour_kwh": dict(self._hour_kwh),
+        }
+
+    def restore(self, total_kwh: float, saved: dict | None = None) -> None:
+        """Add the energy counted before a restart to what was counted since.
+
+        saved is restore_data() from before the restart. Its hour is merged
+        into the current one if they are the same, or imported on its own if
+        the restart crossed the hour.
+        """
+        self.total_kwh += total_kwh
+        if not saved or not saved.get("hour_start"):
+            return
+        start = datetime.fromisoformat(saved["hour_start"])
+        hour_kwh = {component: float(saved.get("hour_kwh", {}).get(component, 0.0)) for component in COMPONENTS}
+        if self._hour_start is None or start == self._hour_start:
+            self._hour_start = start
+            for component in COMPONENTS:
+                self._hour_kwh[component] += hour_kwh[component]
+        elif start < self._hour_start:
+            self._finish_hour(start, hour_kwh)
+
+    def add_sample(self, data: dict, now: datetime | None = None) -> None:
+        """Account for the energy used since the previous sample."""
+        now = now or datetime.now(timezone.utc)
+        power = component_power(data, self.config_entry.options)
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+
+        if self._hour_start is None:
+            self._hour_start = hour_start
+
+        if self._last_sample is not None:
+            last_time, last_power = self._last_sample
+            elapsed = (now - last_time).total_seconds()
+            # Longer gaps (restarts, failed polls) are not integrated; the
+            # component states in between are unknown
+            if 0 < elapsed <= ENERGY_MAX_SAMPLE_GAP:
+                # Trapezoidal integration, split at the hour boundary if crossed
+                average = {c: (last_power[c] + power[c]) / 2 for c in COMPONENTS}
+                boundary = self._hour_start + timedelta(hours=1)
+                if now > boundary:
+                    before = min(elapsed, max(0.0, (boundary - last_time).total_seconds()))
+                    self._add_energy(average, before)
+                    self._close_hour(hour_start)
+                    self._add_energy(average, elapsed - before)
+                else:
+                    self._add_energy(average, elapsed)
+
+        if hour_start > self._hour_start:
+            self._close_hour(hour_start)
+
+        self._last_sample = (now, power)
+        self.current_power = power
+
+    def _add_energy(self, average_power: dict, seconds: float) -> None:
+        for component, watts in average_power.items():
+            kwh = watts * seconds / 3600 / 1000
+            self._hour_kwh[component] += kwh
+            self.total_kwh += kwh
+
+    def _close_hour(self, next_hour_start: datetime) -> None:
+        """Import the finished hour and start accumulating the next one."""
+        finished = self._hour_start
+        self._hour_start = next_hour_start
+        hour_kwh, self._hour_kwh = self._hour_kwh, {component: 0.0 for component in COMPONENTS}
+        if finished is not None:
+            self._finish_hour(finished, hour_kwh)
+
+    def _finish_hour(self, finished: datetime, hour_kwh: dict) -> None:
+        """Add a finished hour to the sums and import it, unless already imported."""
+        if self._last_imported is not None and finished <= self._last_imported:
+            return
+
+        for component in COMPONENTS:
+            self._sums[component] += hour_kwh[component]
+        self._sums["total"] += sum(hour_kwh.values())
+        self._last_imported = finished
+        if self._enabled:
+            self._import_hour(finished)
+
+    def _import_hour(self, start: datetime) -> None:
+        from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+        from homeassistant.const import UnitOfEnergy
+
+        for key, total in self._sums.items():
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=STATISTIC_NAMES[key],
+                source=DOMAIN,
+                statistic_id=statistic_id(key),
+                unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            )
+            try:
+                from homeassistant.components.recorder.models import StatisticMeanType
+                metadata["mean_type"] = StatisticMeanType.NONE
+            except ImportError:  # Recorder before 2025.6 only knows has_mean
+                pass
+            async_add_external_statistics(
+                self.hass, metadata, [StatisticData(start=start, state=total, sum=total)]
+            )
+        _LOGGER.debug("Imported MSpa energy statistics for hour starting %s: %s", start, self._sums)
@@ -1,18 +1,32 @@
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.components.switch import SwitchEntity
-from homeassistant.components.number import NumberEntity
-from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.components.climate import ClimateEntity
+import time
+from collections import deque
+
+from homeassistant.core import callback
 
 from .const import DOMAIN
+from .write_policy import significant_change, write_signature
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
 class MSpaBaseEntity:
+    """Behaviour shared by all MSpa entities.
+
+    Each platform module combines it with CoordinatorEntity and its own
+    entity class, so loading one platform does not import the others.
+    """
+
     _attr_has_entity_name = True
 
+    # Write policy: minimum change before a new value is written, keyed by
+    # "state" or attribute name (see write_policy.py). Any other change of
+    # state, availability or an attribute, recorded or not, is written.
+    _write_thresholds = {}
+
+    # Decoded shadow fields this entity reads; the coordinator decodes the
+    # union for enabled entities on every update and the rest only on access
+    shadow_fields = frozenset()
+
     def __init__(self, coordinator):
         import logging
         _LOGGER = logging.getLogger(__name__)
@@ -21,6 +35,50 @@ class MSpaBaseEntity:
         self.coordinator = coordinator
         self._attr_name = f"mspa {self.name}".strip()
         _LOGGER.debug("internal name set to: %s", self._attr_name)
+        self._last_written = None
+        self._write_times = deque()
+        self.writes_suppressed = 0
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self.coordinator.tracked_entities[self.entity_id] = self
+        self.coordinator.update_shadow_fields()
+
+    async def async_will_remove_from_hass(self):
+        self.coordinator.tracked_entities.pop(self.entity_id, None)
+        self.coordinator.update_shadow_fields()
+        await super().async_will_remove_from_hass()
+
+    def _write_signature(self) -> dict:
+        """Return what a state write would show for this entity."""
+        available = self.available
+        if not available:
+            return write_signature(False, None, {})
+        attributes = {**(self.state_attributes or {}), **(self.extra_state_attributes or {})}
+        return write_signature(True, self.state, attributes)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if something recorded changed significantly."""
+        signature = self._write_signature()
+        if not significant_change(self._last_written, signature, self._write_thresholds):
+            self.writes_suppressed += 1
+            return
+        self._last_written = signature
+        self.async_write_ha_state()
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        self._write_times.append(time.monotonic())
+        super().async_write_ha_state()
+
+    @property
+    def writes_per_hour(self) -> int:
+        """Number of state writes in the last hour."""
+        horizon = time.monotonic() - 3600
+        while self._write_times and self._write_times[0] < horizon:
+            self._write_times.popleft()
+        return len(self._write_times)
 
     @property
     def device_info(self):
@@ -44,28 +102,8 @@ class MSpaBaseEntity:
         if not self.coordinator.last_update_success:
             return False
         
-        # Check if device is online based on is_online flag or ConnectType
-        is_online = self.coordinator._last_data.get("is_online", True)
-        connect_type = self.coordinator._last_data.get("ConnectType", "")
-        
         # Device is unavailable if explicitly offline or if ConnectType is "offline"
-        if is_online is False or connect_type == "offline":
+        if self.coordinator.is_device_offline(self.coordinator._last_data):
             return False
         
         return True
-
-
-class MSpaSensorEntity(MSpaBaseEntity, CoordinatorEntity, SensorEntity):
-    pass
-
-class MSpaClimateEntity(MSpaBaseEntity, CoordinatorEntity, ClimateEntity):
-    pass
-
-class MSpaBinarySensorEntity(MSpaBaseEntity, CoordinatorEntity, BinarySensorEntity):
-    pass
-
-class MSpaSwitchEntity(MSpaBaseEntity, CoordinatorEntity, SwitchEntity):
-    pass
-
-class MSpaNumberEntity(MSpaBaseEntity, CoordinatorEntity, NumberEntity):
-    pass
\ No newline at end of file
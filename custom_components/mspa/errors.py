@@ -0,0 +1,122 @@
+"""Classification of MSpa cloud API failures.
+
+Every API response is sorted into one class, and each class has its own
+handling in MSpaApiClient:
+
+- ok: the request did what was asked
+- auth_expired: the token is missing or no longer valid; log in again and retry once
+- transient: network trouble, throttling or a server error; retry once after a pause
+- device_offline: the cloud answered but the tub is not connected; no retry,
+  and no login unless several accepted replies in a row carried no data,
+  which is also how the cloud answers a token it silently dropped
+- fatal: the request was rejected for any other reason; no retry, no login
+
+The MSpa API does not document its error codes. Only 16019 (wrong password)
+is confirmed from field logs, so token and offline failures are recognised
+from the HTTP status and the message text.
+"""
+
+RESPONSE_OK = "ok"
+RESPONSE_AUTH_EXPIRED = "auth_expired"
+RESPONSE_TRANSIENT = "transient"
+RESPONSE_DEVICE_OFFLINE = "device_offline"
+RESPONSE_FATAL = "fatal"
+
+RESPONSE_CLASSES = (
+    RESPONSE_OK,
+    RESPONSE_AUTH_EXPIRED,
+    RESPONSE_TRANSIENT,
+    RESPONSE_DEVICE_OFFLINE,
+    RESPONSE_FATAL,
+)
+
+INVALID_CREDENTIALS_CODES = {16019}
+AUTH_HTTP_STATUSES = {401, 403}
+TRANSIENT_HTTP_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+AUTH_MESSAGE_HINTS = ("token", "unauthorized", "not logged", "login", "expired")
+OFFLINE_MESSAGE_HINTS = ("offline", "not online", "not connected")
+
+
+class MSpaApiError(RuntimeError):
+    """A request to the MSpa cloud failed."""
+
+    response_class = RESPONSE_FATAL
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class MSpaAuthError(MSpaApiError):
+    """The token was rejected and logging in again did not help."""
+
+    response_class = RESPONSE_AUTH_EXPIRED
+
+
+class MSpaInvalidCredentials(MSpaApiError):
+    """The account email or password is wrong."""
+
+
+class MSpaTransientError(MSpaApiError):
+    """Network trouble, throttling or a server error that outlasted the retry."""
+
+    response_class = RESPONSE_TRANSIENT
+
+
+class MSpaDeviceOfflineError(MSpaApiError):
+    """The cloud reports the hot tub as not connected."""
+
+    response_class = RESPONSE_DEVICE_OFFLINE
+
+
+ERRORS_BY_CLASS = {
+    RESPONSE_AUTH_EXPIRED: MSpaAuthError,
+    RESPONSE_TRANSIENT: MSpaTransientError,
+    RESPONSE_DEVICE_OFFLINE: MSpaDeviceOfflineError,
+    RESPONSE_FATAL: MSpaApiError,
+}
+
+
+def classify_response(status_code, body, expect_data=False) -> str:
+    """Return the response class of one API reply.
+
+    body is the decoded JSON, or None if the reply was not JSON. With
+    expect_data, a successful reply must also carry a non-empty `data`.
+    """
+    if status_code in AUTH_HTTP_STATUSES:
+        return RESPONSE_AUTH_EXPIRED
+    if status_code in TRANSIENT_HTTP_STATUSES or not isinstance(body, dict):
+        return RESPONSE_TRANSIENT
+
+    code = body.get("code")
+    message = str(body.get("message") or "").lower()
+    if code in INVALID_CREDENTIALS_CODES:
+        return RESPONSE_FATAL
+    if is_accepted(body):
+        if not expect_data or body.get("data"):
+            return RESPONSE_OK
+        # Accepted but nothing to return: the cloud has no shadow for an
+        # unconnected device
+        return RESPONSE_DEVICE_OFFLINE
+    if any(hint in message for hint in OFFLINE_MESSAGE_HINTS):
+        return RESPONSE_DEVICE_OFFLINE
+    if any(hint in message for hint in AUTH_MESSAGE_HINTS):
+        return RESPONSE_AUTH_EXPIRED
+    if status_code >= 500:
+        return RESPONSE_TRANSIENT
+    return RESPONSE_FATAL
+
+
+def is_accepted(body) -> bool:
+    """True if a decoded reply says the request succeeded, whether or not it carries data."""
+    return isinstance(body, dict) and (
+        body.get("code") in (0, None) or str(body.get("message") or "").lower() == "success"
+    )
+
+
+def classify_exception(err) -> str:
+    """Return the response class of a request that raised instead of replying."""
+    # requests' ConnectionError and Timeout, like asyncio timeouts, are OSErrors
+    if isinstance(err, OSError):
+        return RESPONSE_TRANSIENT
+    return RESPONSE_FATAL
@@ -0,0 +1,63 @@
+"""State transition events for the MSpa integration.
+
+The coordinator compares each decoded shadow with the previous one and
+fires an event on the Home Assistant bus for every transition below.
+Automations can trigger on these instead of re-evaluating templates on
+every state change. Each event has the config entry and device ids, plus
+"previous" and "new" values.
+
+- mspa_fault / mspa_fault_cleared: fault code appeared or changed / back to OK
+- mspa_filter_dirty / mspa_filter_clean: filter warning (A0) raised / cleared
+- mspa_target_temperature_reached: water reached the target while heating
+- mspa_preheat_finished: heat_state left preheat (2) with the heater still on
+- mspa_power_cycle: power cycle detected (fired from
+  _fire_power_cycle_event); previous and new hold the settings before and
+  after, plus "method"
+
+Nothing is fired while the tub is offline, since its values are stale then.
+"""
+from .shadow import is_device_offline
+
+EVENT_FAULT = "mspa_fault"
+EVENT_FAULT_CLEARED = "mspa_fault_cleared"
+EVENT_FILTER_DIRTY = "mspa_filter_dirty"
+EVENT_FILTER_CLEAN = "mspa_filter_clean"
+EVENT_TARGET_TEMPERATURE_REACHED = "mspa_target_temperature_reached"
+EVENT_PREHEAT_FINISHED = "mspa_preheat_finished"
+EVENT_POWER_CYCLE = "mspa_power_cycle"
+
+FILTER_DIRTY_WARNING = "A0"
+HEAT_STATE_PREHEAT = 2
+
+
+def shadow_transitions(previous, current) -> list:
+    """Return [(event type, data)] for the transitions from previous to current."""
+    if not previous or is_device_offline(previous) or is_device_offline(current):
+        return []
+    events = []
+
+    old_fault, fault = previous.get("fault", "OK"), current.get("fault", "OK")
+    if fault != old_fault:
+        event_type = EVENT_FAULT_CLEARED if fault == "OK" else EVENT_FAULT
+        events.append((event_type, {"previous": old_fault, "new": fault}))
+
+    old_warning, warning = previous.get("warning"), current.get("warning")
+    if (old_warning == FILTER_DIRTY_WARNING) != (warning == FILTER_DIRTY_WARNING):
+        event_type = EVENT_FILTER_DIRTY if warning == FILTER_DIRTY_WARNING else EVENT_FILTER_CLEAN
+        events.append((event_type, {"previous": old_warning, "new": warning}))
+
+    target = current.get("target_temperature")
+    old_temperature, temperature = previous.get("water_temperature"), current.get("water_temperature")
+    if (
+        current.get("heater") == "on"
+        and target is not None and old_temperature is not None and temperature is not None
+        and old_temperature < target <= temperature
+    ):
+        events.append((EVENT_TARGET_TEMPERATURE_REACHED,
+                       {"previous": old_temperature, "new": temperature, "target_temperature": target}))
+
+    old_heat_state, heat_state = previous.get("heat_state"), current.get("heat_state")
+    if old_heat_state == HEAT_STATE_PREHEAT and heat_state != HEAT_STATE_PREHEAT and current.get("heater") == "on":
+        events.append((EVENT_PREHEAT_FINISHED, {"previous": old_heat_state, "new": heat_state}))
+
+    return events
@@ -0,0 +1,204 @@
+"""Learned command confirmation latency for the MSpa integration.
+
+A command is accepted by the cloud long before the tub reports the change
+in its shadow, and how long that takes depends on the field: a bubble level
+shows up within a second or two, the heater or the temperature unit can
+take much longer. The API client records, per shadow field, the time from
+a command's reply to the first shadow showing the commanded value, and
+keeps streaming quantile estimates of it (the P² algorithm, five markers per
+quantile, no samples stored).
+
+From those it schedules each confirmation: the first poll at the low
+quantile, when the change may first be visible, and the give-up deadline
+at a margin over the p95. Fields seen fewer than CONFIRM_MIN_SAMPLES times
+use the fixed defaults. A poll only bounds the latency, so a polled
+confirmation is recorded halfway between the last poll that did not show it
+and the one that did; pushed deltas are exact.
+It has no Home Assistant dependency, so the simulator runs the same model.
+"""
+from bisect import bisect_right, insort
+
+from .const import (
+    CONFIRM_DEADLINE,
+    CONFIRM_DEADLINE_MARGIN,
+    CONFIRM_DEADLINE_MAX,
+    CONFIRM_DEADLINE_MIN,
+    CONFIRM_FIRST_POLL,
+    CONFIRM_MIN_SAMPLES,
+    CONFIRM_OBSERVE_WINDOW,
+    CONFIRM_POLL_MIN,
+)
+
+FIRST_POLL_QUANTILE = 0.1
+DEADLINE_QUANTILE = 0.95
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile (Jain & Chlamtac, 1985)."""
+
+    def __init__(self, quantile: float) -> None:
+        self.quantile = quantile
+        self.count = 0
+        self._heights = []  # Marker heights; the first five samples, sorted, until then
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5]
+        self._increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            insort(heights, value)
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = bisect_right(heights, value) - 1
+        positions = self._positions
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            offset = self._desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (
+                        positions[i + step] - positions[i]
+                    )
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        h, n = self._heights, self._positions
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float | None:
+        """The current estimate, exact while there are five samples or fewer."""
+        if not self.count:
+            return None
+        if self.count <= 5:
+            return self._heights[round(self.quantile * (self.count - 1))]
+        return self._heights[2]
+
+
+class _FieldLatency:
+    def __init__(self) -> None:
+        self.first_poll = P2Quantile(FIRST_POLL_QUANTILE)
+        self.median = P2Quantile(0.5)
+        self.deadline = P2Quantile(DEADLINE_QUANTILE)
+
+    def add(self, latency: float) -> None:
+        for estimate in (self.first_poll, self.median, self.deadline):
+            estimate.add(latency)
+
+    @property
+    def count(self) -> int:
+        return self.median.count
+
+
+class MSpaConfirmationModel:
+    """Learn per field how long commands take to show up, and schedule confirmations.
+
+    One model belongs to one API client, so its estimates are for that
+    client's region.
+    """
+
+    def __init__(self, region: str = "ROW") -> None:
+        self.region = region
+        self._fields = {}  # shadow field -> _FieldLatency
+        self._pending = {}  # shadow field -> [commanded value, reply time, last time seen without it]
+        self.unconfirmed = 0  # Commanded values never seen within CONFIRM_OBSERVE_WINDOW
+
+    def command_sent(self, desired: dict, now: float, shadow: dict | None = None) -> None:
+        """Start timing the fields of a command whose reply arrived at now.
+
+        Fields the last known shadow already shows are skipped; their
+        "confirmation" would say nothing about the tub.
+        """
+        for field, value in desired.items():
+            if shadow is not None and shadow.get(field) == value:
+                self._pending.pop(field, None)
+                continue
+            self._pending[field] = [value, now, now]
+
+    def observe(self, shadow: dict, now: float, exact: bool = False) -> None:
+        """Record the fields a shadow read (polled at now, or pushed if exact) confirms."""
+        if not self._pending:
+            return
+        for field, pending in list(self._pending.items()):
+            value, sent, last_miss = pending
+            if now < sent:
+                continue  # Read before the command took effect
+            if shadow.get(field) == value:
+                seen = now if exact else (last_miss + now) / 2
+                self._fields.setdefault(field, _FieldLatency()).add(seen - sent)
+                del self._pending[field]
+            elif now - sent > CONFIRM_OBSERVE_WINDOW:
+                self.unconfirmed += 1
+                del self._pending[field]
+            elif field in shadow:
+                pending[2] = now
+
+    def _learned(self, field: str):
+        latency = self._fields.get(field)
+        return latency if latency is not None and latency.count >= CONFIRM_MIN_SAMPLES else None
+
+    def first_poll(self, field: str) -> float:
+        latency = self._learned(field)
+        if latency is None:
+            return CONFIRM_FIRST_POLL
+        return max(CONFIRM_POLL_MIN, latency.first_poll.value)
+
+    def deadline(self, field: str) -> float:
+        latency = self._learned(field)
+        if latency is None:
+            return CONFIRM_DEADLINE
+        return min(CONFIRM_DEADLINE_MAX, max(CONFIRM_DEADLINE_MIN, latency.deadline.value * CONFIRM_DEADLINE_MARGIN))
+
+    def schedule(self, fields) -> tuple[float, float]:
+        """Return (first poll, deadline) in seconds after the reply for a command setting fields.
+
+        The command is confirmed when all its fields are, so both follow
+        the slowest field.
+        """
+        fields = list(fields)
+        if not fields:
+            return CONFIRM_FIRST_POLL, CONFIRM_DEADLINE
+        deadline = max(self.deadline(field) for field in fields)
+        return min(deadline, max(self.first_poll(field) for field in fields)), deadline
+
+    def as_dict(self) -> dict:
+        """Learned timing per field in seconds, for diagnostics."""
+        fields = {}
+        for field, latency in sorted(self._fields.items()):
+            fields[field] = {
+                "samples": latency.count,
+                "p10_s": round(latency.first_poll.value, 2),
+                "p50_s": round(latency.median.value, 2),
+                "p95_s": round(latency.deadline.value, 2),
+                "first_poll_s": round(self.first_poll(field), 2),
+                "deadline_s": round(self.deadline(field), 2),
+                "learned": self._learned(field) is not None,
+            }
+        return {
+            "region": self.region,
+            "fields": fields,
+            "pending": sorted(self._pending),
+            "unconfirmed": self.unconfirmed,
+        }
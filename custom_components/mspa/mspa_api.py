@@ -3,12 +3,57 @@ import hashlib
 import time
 import random
 import string
-import requests
 import json
 
 import logging
 import functools
-
+from collections import defaultdict, deque
+
+from .const import (
+    SHADOW_CACHE_TTL,
+    REQUEST_BUDGET_RATE,
+    REQUEST_BUDGET_BURST,
+    TRANSIENT_RETRY_DELAY,
+    UNCLASSIFIED_FAILURES_BEFORE_REAUTH,
+    EMPTY_REPLIES_BEFORE_REAUTH,
+    DEADLINE_AUTH,
+    DEADLINE_COMMAND,
+    DEADLINE_DEVICE_LIST,
+    DEADLINE_SHADOW,
+    HEDGE_MIN_DELAY,
+    HEDGE_MIN_SAMPLES,
+    LATENCY_SAMPLES,
+    PUSH_CONFIRM_TIMEOUT,
+    CONFIRM_POLL_INTERVAL,
+)
+from .errors import (
+    ERRORS_BY_CLASS,
+    INVALID_CREDENTIALS_CODES,
+    RESPONSE_AUTH_EXPIRED,
+    RESPONSE_CLASSES,
+    RESPONSE_DEVICE_OFFLINE,
+    RESPONSE_FATAL,
+    RESPONSE_OK,
+    RESPONSE_TRANSIENT,
+    MSpaApiError,
+    MSpaInvalidCredentials,
+    MSpaTransientError,
+    classify_exception,
+    classify_response,
+    is_accepted,
+)
+from .latency_model import MSpaConfirmationModel
+from .supervisor import MSpaSupervisorClosed, MSpaTaskSupervisor
+from .tracing import span
+from .transport import RequestsTransport
+from .request_scheduler import (
+    MSpaRequestPreempted,
+    MSpaRequestScheduler,
+    PRIORITY_COMMAND,
+    PRIORITY_CONFIRM,
+    PRIORITY_POLL,
+    request_priority,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,7 +65,18 @@ app_secret = "87025c9ecd18906d27225fe79cb68349"
 
 
 class MSpaApiClient:
-    def __init__(self, hass, account_email, password, coordinator, region="ROW", token=None):
+    """Client for the MSpa cloud API.
+
+    hass and coordinator are optional so the client also runs outside Home
+    Assistant (see mspa_cli.py). The token and request budget live in `store`,
+    which defaults to hass.data, or a private dict without hass; clients
+    passed the same store share them. An optional push channel (push.py)
+    keeps the cached shadow current between polls.
+    """
+
+    def __init__(self, hass, account_email, password, coordinator, region="ROW", token=None,
+                 transport=None, record_path=None, hedge_reads=False, base_url=None, store=None, supervisor=None,
+                 push=None):
         self.account_email = account_email
         self.password = password
         self.app_id = app_id
@@ -28,28 +84,52 @@ class MSpaApiClient:
         self.hass = hass
         self.coordinator = coordinator
         self.region = region if region in ["ROW", "US", "CH"] else "ROW"  # Safe fallback
+        if store is None:
+            store = hass.data if hass is not None else {}
+        self._store = store
 
         # Clear any existing cached token when creating a new API client
         # This ensures we don't reuse old tokens with new credentials
         # We also store the credentials hash to detect if they've changed
         current_creds_hash = hashlib.md5(f"{account_email}:{password}".encode("utf-8")).hexdigest()
-        stored_creds_hash = hass.data.get("mspa_creds_hash")
+        stored_creds_hash = store.get("mspa_creds_hash")
 
         if stored_creds_hash and stored_creds_hash != current_creds_hash:
             _LOGGER.info("DIAGNOSTIC: Credentials have changed - clearing old token")
-            hass.data.pop("mspa_token", None)
-        elif "mspa_token" in hass.data:
-            old_token = hass.data.get("mspa_token")
+            store.pop("mspa_token", None)
+        elif "mspa_token" in store:
+            old_token = store.get("mspa_token")
             if old_token:
                 _LOGGER.info("DIAGNOSTIC: Found cached token from previous session (first 20 chars: %s...), will validate it", old_token[:20] if len(old_token) >= 20 else old_token)
 
         # Store the current credentials hash for future comparison
-        hass.data["mspa_creds_hash"] = current_creds_hash
+        store["mspa_creds_hash"] = current_creds_hash
 
         self._token = token
+
+        # HTTP goes through a pluggable transport; record_path wraps it so every
+        # exchange is written, redacted, to a replayable cassette file
+        self.transport = transport or RequestsTransport(hass)
+        if record_path:
+            from .cassette import RecordingTransport
+            self.transport = RecordingTransport(self.transport, record_path, secrets=[account_email, password])
+            _LOGGER.info("DIAGNOSTIC: Recording MSpa API session to %s", record_path)
+
+        # Background tasks, command operations and HTTP calls are cancelled
+        # through the supervisor when the config entry unloads
+        self.supervisor = supervisor or MSpaTaskSupervisor()
+
+        # One request budget per account, shared by every client using it
+        self.scheduler = store.setdefault(
+            "mspa_scheduler", MSpaRequestScheduler(REQUEST_BUDGET_RATE, REQUEST_BUDGET_BURST)
+        )
+
         self.product_id = None
         self.device_id = None
         
+        # Overrides the regional endpoint, e.g. to test against a local stand-in server
+        self._base_url_override = base_url.rstrip("/") if base_url else None
+
         # Regional API endpoints with rock-solid fallback to ROW (Europe)
         self._api_endpoints = {
             "ROW": "https://api.iot.the-mspa.com",
@@ -62,7 +142,32 @@ class MSpaApiClient:
         self.model = None
         self.software_version = None
         self.product_pic_url = None
-        self._last_status = None
+
+        # Short-lived thing_shadow cache; concurrent fetches share one request
+        self._shadow_cache = None
+        self._shadow_cache_time = 0.0
+        self._shadow_fetch = None
+        self._shadow_fetch_started = 0.0
+        self._shadow_base = None  # Last full shadow, fetched or updated by push
+        self._shadow_waiters = []  # (desired values, future) resolved by pushed deltas
+
+        # Optional push channel delivering shadow deltas between polls
+        self.push = push
+
+        # Replies seen per response class (errors.py), for diagnostics
+        self.response_stats = {response_class: 0 for response_class in RESPONSE_CLASSES}
+        self._unclassified_failures = 0
+        self._empty_replies = 0  # Consecutive accepted replies without data
+
+        # Per-path latency of recent replies; with hedge_reads, slow shadow
+        # reads get a second request once they pass the observed p95
+        self.hedge_reads = hedge_reads
+        self._latency = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+        self.hedge_stats = {"sent": 0, "won": 0}
+
+        # Learned time from a command reply to the shadow showing it, per
+        # field; schedules confirmation polls
+        self.confirm_latency = MSpaConfirmationModel(self.region)
         
         _LOGGER.info("DIAGNOSTIC: MSpa API initialized for region: %s, endpoint: %s", 
                      self.region, self.base_url)
@@ -70,11 +175,21 @@ class MSpaApiClient:
     @property
     def base_url(self):
         """Get the base URL for the current region with fallback to ROW."""
+        if self._base_url_override:
+            return self._base_url_override
         return self._api_endpoints.get(self.region, self._api_endpoints["ROW"])
 
-    async def async_init(self):
+    async def async_init(self, device_list=None):
+        """Select the first device on the account.
+
+        device_list is the result of get_device_list() when the caller already
+        has it, e.g. from the config flow; otherwise it is fetched.
+        """
         _LOGGER.info("DIAGNOSTIC: Starting MSpaApiClient initialization")
-        device_list = await self.get_device_list()
+        if device_list is None:
+            device_list = await self.get_device_list()
+        else:
+            _LOGGER.info("DIAGNOSTIC: Using the device list discovered during configuration")
         _LOGGER.info("DIAGNOSTIC: device_list result: %s", device_list)
 
         if not device_list:
@@ -105,6 +220,8 @@ class MSpaApiClient:
         self.product_pic_url = devices[0]["url"] if "url" in devices[0] else None
 
         self.device_alias = devices[0]["device_alias"] if "device_alias" in devices[0] else None
+        if self.coordinator is None:
+            return
         self.coordinator.model = self.model
         self.coordinator.series = self.series
         self.coordinator.software_version = self.software_version
@@ -130,12 +247,48 @@ class MSpaApiClient:
 
 
     def get_token_from_hass(self):
-        return self.hass.data.get("mspa_token")
+        return self._store.get("mspa_token")
 
     def set_token_in_hass(self, token):
-        self.hass.data["mspa_token"] = token
+        self._store["mspa_token"] = token
         self._token = token
 
+    def adopt_shared_token(self):
+        """Switch to the account's token in the store if another client logged in since.
+
+        A login replaces the account's token, so the one this client holds
+        is stale; returns True if it was replaced.
+        """
+        shared = self.get_token_from_hass()
+        if shared and self._token and shared != self._token:
+            self._token = shared
+            return True
+        return False
+
+    async def async_reauthenticate(self):
+        """Forget the token, this client's and the shared one, and log in again."""
+        self._token = None
+        self._store.pop("mspa_token", None)
+        return await self.authenticate(PRIORITY_POLL)
+
+    def oldest_request_age(self, now):
+        """Return how long the oldest HTTP call or shared status read has been running."""
+        age = self.supervisor.oldest_http_call(now)
+        if self._shadow_fetch is not None:
+            age = max(age, now - self._shadow_fetch_started)
+        return age
+
+    async def async_reset_connections(self):
+        """Drop the shared status read in flight and the transport's open connections."""
+        # Later reads start a new fetch; a stuck one ends at its deadline
+        self._shadow_fetch = None
+        self.invalidate_status_cache()
+        if hasattr(self.transport, "reset"):
+            if self.hass is not None:
+                await self.hass.async_add_executor_job(self.transport.reset)
+            else:
+                await asyncio.get_running_loop().run_in_executor(None, self.transport.reset)
+
     def _obfuscate_response(self, response_data):
         """Recursively obfuscate email addresses in response data for logging."""
         if not self.account_email:
@@ -156,22 +309,228 @@ class MSpaApiClient:
         return json.loads(data_str)
 
 
-    async def authenticate(self):
+    def _build_headers(self, token=None):
+        """Return signed request headers; token=None for the login request."""
         nonce = self.generate_nonce()
         ts = self.current_ts()
-        sign = self.build_signature(nonce, ts)
-        headers = {
+        return {
             "push_type": "Android",
-            "authorization": "token",
+            "authorization": "token" if token is None else "token " + token,
             "appid": self.app_id,
             "nonce": nonce,
             "ts": ts,
             "lan_code": "de",
-            "sign": sign,
+            "sign": self.build_signature(nonce, ts),
             "content-type": "application/json; charset=UTF-8",
             "accept-encoding": "gzip",
             "user-agent": "okhttp/4.9.0"
         }
+
+    def _count_response(self, response_class):
+        self.response_stats[response_class] = self.response_stats.get(response_class, 0) + 1
+
+    async def _send(self, method, path, payload=None, priority=None, timeout=None, token=None,
+                    expect_data=False, acquired=False, preemptible=False):
+        """Send one request and return (response class, decoded body, HTTP response).
+
+        timeout bounds the whole call, including the wait for a request slot,
+        and raises TimeoutError when it runs out. preemptible lets a user
+        command cancel the request (see request_scheduler.py); only for reads.
+        """
+        url = f"{self.base_url}{path}"
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with span(f"{method} {path}") as request_span:
+            try:
+                async with asyncio.timeout(timeout):
+                    async with self.scheduler.slot(priority, acquired=acquired, preemptible=preemptible):
+                        sent = loop.time()
+                        async with self.supervisor.http_call(f"{method} {path}"):
+                            response = await self.transport.request(
+                                method, url, headers=self._build_headers(token), json=payload,
+                                timeout=max(0.1, timeout - (sent - started)) if timeout else None,
+                            )
+                        self._latency[path].append(loop.time() - sent)
+            except (MSpaRequestPreempted, MSpaSupervisorClosed):
+                raise
+            except Exception as err:
+                self._count_response(classify_exception(err))
+                raise
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            response_class = classify_response(response.status_code, body, expect_data)
+            self._count_response(response_class)
+            if request_span:
+                request_span.set(status=response.status_code, result=response_class,
+                                 queued_ms=round((sent - started) * 1000, 1))
+            return response_class, body, response
+
+    async def _send_hedged(self, method, path, payload=None, priority=None, timeout=None, token=None,
+                           expect_data=False, preemptible=False):
+        """Send an idempotent read, and a second copy if the first is slow.
+
+        The copy goes out once the first request has taken longer than the
+        observed p95 latency for this path, and only if the request budget
+        has a token free right now. The first good reply wins; the other
+        request is cancelled.
+        """
+        delay = self.hedge_delay(path)
+        if delay is None or (timeout is not None and delay >= timeout):
+            return await self._send(method, path, payload, priority, timeout, token, expect_data,
+                                    preemptible=preemptible)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        primary = self.supervisor.create_task(
+            self._send(method, path, payload, priority, timeout, token, expect_data, preemptible=preemptible),
+            f"{method} {path}",
+        )
+        pending = {primary}
+        try:
+            await asyncio.wait(pending, timeout=delay)
+            if primary.done() or not self.scheduler.try_acquire(priority if priority is not None else PRIORITY_POLL):
+                return await primary
+            _LOGGER.debug("Hedging %s after %.2fs", path, delay)
+            self.hedge_stats["sent"] += 1
+            remaining = timeout - (loop.time() - started) if timeout is not None else None
+            hedge = self.supervisor.create_task(
+                self._send(method, path, payload, priority, remaining, token, expect_data, acquired=True,
+                           preemptible=preemptible),
+                f"{method} {path} (hedge)",
+            )
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None and task.result()[0] == RESPONSE_OK:
+                        if task is hedge:
+                            self.hedge_stats["won"] += 1
+                        return task.result()
+            # Neither reply was good; report the first request's outcome
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def hedge_delay(self, path):
+        """Return the observed p95 latency for path, or None if not hedging it."""
+        samples = self._latency.get(path)
+        if not self.hedge_reads or not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return max(HEDGE_MIN_DELAY, ordered[int(0.95 * (len(ordered) - 1))])
+
+    def latency_stats(self):
+        """Return p50/p95 latency in ms and the sample count per request path."""
+        stats = {}
+        for path, samples in self._latency.items():
+            if samples:
+                ordered = sorted(samples)
+                stats[path] = {
+                    "p50_ms": round(ordered[len(ordered) // 2] * 1000),
+                    "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000),
+                    "samples": len(ordered),
+                }
+        return stats
+
+    async def _api_request(self, method, path, payload=None, priority=None, deadline=None, expect_data=False,
+                           hedge=False):
+        """Send an authorised request and return the decoded reply.
+
+        Failures are handled by response class (see errors.py): only an expired
+        token leads to a new login, transient failures are retried once, and
+        everything else raises the matching MSpaApiError without a retry.
+        deadline, in seconds, covers the whole operation including that retry
+        and the login; MSpaTransientError is raised once it has passed.
+        hedge=True marks an idempotent read: it may be hedged (see _send_hedged)
+        and, in a background lane, pre-empted by a user command. Logins and
+        commands are never pre-empted.
+        """
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline if deadline else None
+        send = self._send_hedged if hedge else self._send
+        reauthenticated = retried = False
+        # No token yet, e.g. after a restart: log in first rather than rely on
+        # how the cloud rejects an empty one
+        login = not self.get_former_token()
+        if login:
+            _LOGGER.info("DIAGNOSTIC: No token for %s, authenticating first", path)
+        while True:
+            error = None
+            remaining = deadline_at - loop.time() if deadline_at else None
+            if remaining is not None and remaining <= 0:
+                raise MSpaTransientError(f"{method} {path} did not complete within its {deadline}s deadline")
+            if login:
+                login = False
+                reauthenticated = True
+                try:
+                    await self.authenticate(priority, timeout=remaining if remaining is not None else DEADLINE_AUTH)
+                except TimeoutError as err:
+                    raise MSpaTransientError(
+                        f"{method} {path} did not complete within its {deadline or DEADLINE_AUTH}s deadline "
+                        "while logging in"
+                    ) from err
+                continue
+            try:
+                response_class, body, _ = await send(
+                    method, path, payload, priority, remaining,
+                    token=self.get_former_token(), expect_data=expect_data, preemptible=hedge,
+                )
+            except MSpaRequestPreempted:
+                raise
+            except Exception as err:
+                if classify_exception(err) != RESPONSE_TRANSIENT:
+                    raise
+                response_class, body, error = RESPONSE_TRANSIENT, None, err
+
+            if response_class == RESPONSE_OK:
+                self._unclassified_failures = 0
+                self._empty_replies = 0
+                return body
+
+            if response_class == RESPONSE_FATAL:
+                self._unclassified_failures += 1
+                if self._unclassified_failures >= UNCLASSIFIED_FAILURES_BEFORE_REAUTH and not reauthenticated:
+                    # Safety valve: the cloud may report an expired token in a
+                    # way the taxonomy does not recognise
+                    _LOGGER.warning("DIAGNOSTIC: %d consecutive unrecognised API failures, logging in again",
+                                    self._unclassified_failures)
+                    self._unclassified_failures = 0
+                    response_class = RESPONSE_AUTH_EXPIRED
+
+            if response_class == RESPONSE_DEVICE_OFFLINE and is_accepted(body):
+                # Accepted without data: the tub is offline, or the cloud dropped
+                # the token without saying so. Log in once to tell them apart;
+                # if that does not help, the tub is offline until data comes back
+                self._empty_replies += 1
+                if self._empty_replies == EMPTY_REPLIES_BEFORE_REAUTH and not reauthenticated:
+                    _LOGGER.warning("DIAGNOSTIC: %d consecutive replies without data, logging in again",
+                                    self._empty_replies)
+                    response_class = RESPONSE_AUTH_EXPIRED
+
+            if response_class == RESPONSE_AUTH_EXPIRED and not reauthenticated:
+                _LOGGER.info("DIAGNOSTIC: Token rejected for %s, re-authenticating", path)
+                login = True
+                continue
+            if response_class == RESPONSE_TRANSIENT and not retried and (
+                deadline_at is None or deadline_at - loop.time() > TRANSIENT_RETRY_DELAY
+            ):
+                _LOGGER.debug("Transient failure for %s (%s), retrying in %ss", path, error or body, TRANSIENT_RETRY_DELAY)
+                retried = True
+                await asyncio.sleep(TRANSIENT_RETRY_DELAY)
+                continue
+
+            code = body.get("code") if isinstance(body, dict) else None
+            message = body.get("message") if isinstance(body, dict) else str(error or "invalid response") or repr(error)
+            if response_class == RESPONSE_DEVICE_OFFLINE and is_accepted(body):
+                message = "no data returned"
+            raise ERRORS_BY_CLASS[response_class](
+                f"{method} {path} failed ({response_class}): {message}", code
+            ) from error
+
+    async def authenticate(self, priority=None, timeout=DEADLINE_AUTH):
         payload = {
             "account": self.account_email,
             "app_id": self.app_id,
@@ -192,19 +551,20 @@ class MSpaApiClient:
         _LOGGER.info("DIAGNOSTIC: Password hash length: %d, first 6 chars: %s", len(self.password), self.password[:6] if self.password else "None")
 
         try:
-            response = await self.hass.async_add_executor_job(
-                functools.partial(requests.post, token_request_url, headers=headers, json=payload, timeout=30)
+            response_class, response_json, response = await self._send(
+                "POST", "/api/enduser/get_token/", payload, priority, timeout, expect_data=True
             )
             _LOGGER.info("DIAGNOSTIC: Authentication HTTP status code: %s", response.status_code)
+            _LOGGER.info("DIAGNOSTIC: Authentication raw response: %s", response.text.replace(self.account_email, obfuscated_email) if self.account_email in response.text else response.text)
 
-            response_json = response.json()
+            if response_json is None:
+                raise MSpaTransientError(f"Authentication returned HTTP {response.status_code} without a JSON body")
 
             # Obfuscate sensitive data in response for logging
             safe_response = self._obfuscate_response(response_json)
-            _LOGGER.info("DIAGNOSTIC: Authentication raw response: %s", response.text.replace(self.account_email, obfuscated_email) if self.account_email in response.text else response.text)
             _LOGGER.info("DIAGNOSTIC: Authentication parsed response: %s", safe_response)
 
-            token = response_json.get("data", {}).get("token")
+            token = (response_json.get("data") or {}).get("token")
             if token is not None:
                 _LOGGER.info("DIAGNOSTIC: Token successfully received (length: %d)", len(token))
                 self.set_token_in_hass(token)
@@ -214,75 +574,90 @@ class MSpaApiClient:
                 error_code = response_json.get("code")
                 error_message = response_json.get("message", "")
 
-                if error_code == 16019 or "password" in error_message.lower():
+                if error_code in INVALID_CREDENTIALS_CODES or "password" in error_message.lower():
                     _LOGGER.error("DIAGNOSTIC: Password authentication failed!")
                     _LOGGER.error("DIAGNOSTIC: API error code: %s, message: %s", error_code, error_message)
                     _LOGGER.error("DIAGNOSTIC: Please verify:")
                     _LOGGER.error("DIAGNOSTIC:   1. You are using the SAME password you use in the MSpa mobile app")
                     _LOGGER.error("DIAGNOSTIC:   2. Your password does not contain special characters that might cause encoding issues")
                     _LOGGER.error("DIAGNOSTIC:   3. Try resetting your password in the MSpa app and using a simple password (letters and numbers only)")
-                    raise RuntimeError(f"Authentication failed: {error_message}. Please check your password in the MSpa mobile app.")
+                    raise MSpaInvalidCredentials(f"Authentication failed: {error_message}. Please check your password in the MSpa mobile app.", error_code)
 
-                _LOGGER.warning("DIAGNOSTIC: No token in response. Response data: %s", response_json.get("data"))
-                _LOGGER.warning("DIAGNOSTIC: Full response: %s", response_json)
+                _LOGGER.warning("DIAGNOSTIC: No token in response (%s). Response data: %s", response_class, response_json.get("data"))
+                _LOGGER.warning("DIAGNOSTIC: Full response: %s", safe_response)
                 return self.get_token_from_hass()
-        except requests.exceptions.Timeout:
-            _LOGGER.error("DIAGNOSTIC: Authentication request timed out after 30 seconds")
+        except MSpaApiError:
             raise
-        except requests.exceptions.ConnectionError as e:
-            _LOGGER.error("DIAGNOSTIC: Connection error during authentication: %s", str(e))
+        except OSError as e:
+            _LOGGER.error("DIAGNOSTIC: Network error during authentication: %s", str(e))
             raise
         except Exception as e:
             _LOGGER.error("DIAGNOSTIC: Unexpected error during authentication: %s", str(e), exc_info=True)
             raise
 
-    async def send_device_command(self, desired_dict, retry=False):
-        _LOGGER.debug("send_device_command: %s, retry %s", desired_dict, retry)
-        token = self.get_former_token()
-        nonce = self.generate_nonce()
-        ts = self.current_ts()
-        sign = self.build_signature(nonce, ts)
-        headers = {
-            "push_type": "Android",
-            "authorization": "token " + token,
-            "appid": self.app_id,
-            "nonce": nonce,
-            "ts": ts,
-            "lan_code": "de",
-            "sign": sign,
-            "content-type": "application/json; charset=UTF-8",
-            "accept-encoding": "gzip",
-            "user-agent": "okhttp/4.9.0"
-        }
+    async def send_device_command(self, desired_dict, priority=None, confirm=True):
+        """Send desired shadow values to the device.
+
+        With confirm=True, poll until the shadow shows the change, on the
+        schedule confirm_latency has learned for the fields (by default from
+        3 s to 15 s after the reply), and then refresh the coordinator; callers that follow up through their own
+        polling pass confirm=False. The whole operation, confirmation
+        included, is cancelled if the config entry unloads meanwhile.
+        """
+        async with self.supervisor.operation("command"):
+            return await self._send_device_command(desired_dict, priority, confirm)
+
+    async def _send_device_command(self, desired_dict, priority, confirm):
+        if priority is None:
+            priority = request_priority.get()
+            if priority is None:
+                priority = PRIORITY_COMMAND
+        _LOGGER.debug("send_device_command: %s", desired_dict)
         payload = {
             "device_id": self.device_id,
             "product_id": self.product_id,
             "desired": json.dumps({"state": {"desired": desired_dict}})
         }
+        with span("command", fields=sorted(desired_dict), confirm=confirm):
+            response = await self._api_request(
+                "POST", "/api/device/command", payload, priority, deadline=DEADLINE_COMMAND
+            )
 
-        url = f"{self.base_url}/api/device/command"
-        _LOGGER.debug("send_device_command: %s, url: %s", desired_dict, url)
-        response = await self.hass.async_add_executor_job(
-            functools.partial(requests.post, url, headers=headers, json=payload)
-        )
-        response = response.json()
-        if (response.get('message') != 'SUCCESS') and (not retry):
-            token = await self.authenticate()
-            return await self.send_device_command(desired_dict, True)
-
-        # Poll for expected state if provided
-        for _ in range(5):
-            await asyncio.sleep(3)
-            status = await self.get_hot_tub_status()
-            if all(status.get(k) == v for k, v in desired_dict.items()):
-                self._last_status = status  # Cache latest status
+        # Anything cached was read before this command took effect
+        self.invalidate_status_cache()
+        sent = asyncio.get_running_loop().time()
+        self.confirm_latency.command_sent(desired_dict, sent, self._shadow_base)
+
+        if not confirm:
+            if (desired_dict.get("filter_state")) == 0 and "heater_state" not in desired_dict:
+                await self.send_device_command({"heater_state": 0}, priority=priority, confirm=False)
+            return response
+
+        # With a push channel the change normally arrives as a delta; poll
+        # only if it does not. Confirmations of user commands get their own
+        # lane; background commands confirm at their own priority.
+        confirmed = False
+        if self.push_connected:
+            with span("push_confirm"):
+                confirmed = await self.wait_for_shadow(desired_dict, PUSH_CONFIRM_TIMEOUT)
+        confirm_priority = PRIORITY_CONFIRM if priority == PRIORITY_COMMAND else priority
+        poll_at, deadline = self.confirm_latency.schedule(desired_dict)
+        while not confirmed:
+            await asyncio.sleep(max(0.0, sent + poll_at - asyncio.get_running_loop().time()))
+            status = await self.get_hot_tub_status(max_age=0, priority=confirm_priority)
+            confirmed = all(status.get(k) == v for k, v in desired_dict.items())
+            if poll_at >= deadline:
+                if not confirmed:
+                    _LOGGER.debug("Command %s not confirmed within %.1fs", desired_dict, deadline)
                 break
+            poll_at = min(poll_at + CONFIRM_POLL_INTERVAL, deadline)
 
         if (desired_dict.get("filter_state")) == 0:
-            await self.set_heater_state(0)
+            await self.send_device_command({"heater_state": 0}, priority=priority)
 
         # Trigger coordinator refresh after command completes
-        await self.coordinator.async_request_refresh()
+        if self.coordinator is not None:
+            await self.coordinator.async_request_refresh()
 
         return response
 
@@ -316,74 +691,148 @@ class MSpaApiClient:
         """Set temperature unit (0=Celsius, 1=Fahrenheit)."""
         return await self.send_device_command({"temperature_unit": unit})
 
-    async def get_hot_tub_status(self, retry=False):
-        nonce = self.generate_nonce()
-        ts = self.current_ts()
-        sign = self.build_signature(nonce, ts)
-        headers = {
-            "push_type": "Android",
-            "authorization": "token " + self.get_former_token(),
-            "appid": self.app_id,
-            "nonce": nonce,
-            "ts": ts,
-            "lan_code": "de",
-            "sign": sign,
-            "content-type": "application/json; charset=UTF-8",
-            "accept-encoding": "gzip",
-            "user-agent": "okhttp/4.9.0"
-        }
+    async def get_hot_tub_status(self, max_age=SHADOW_CACHE_TTL, priority=PRIORITY_POLL):
+        """Return the device shadow, reusing one fetched up to max_age seconds ago.
+
+        Concurrent callers share a single in-flight request, sent in the lane of
+        the caller that started it. Pass max_age=0 to get a shadow whose request
+        was sent after this call (e.g. to confirm a command).
+        """
+        loop = asyncio.get_running_loop()
+        oldest_allowed = loop.time() - max_age
+        while True:
+            if self._shadow_cache is not None and self._shadow_cache_time >= oldest_allowed:
+                return self._shadow_cache
+
+            fetch = self._shadow_fetch
+            if fetch is None:
+                fetch = self.supervisor.create_task(self._fetch_hot_tub_status(priority=priority), "shadow fetch")
+                fetch.add_done_callback(functools.partial(self._shadow_fetch_done, loop.time()))
+                self._shadow_fetch = fetch
+                self._shadow_fetch_started = loop.time()
+            elif self._shadow_fetch_started < oldest_allowed:
+                # The request in flight was sent too early for this caller;
+                # let it finish, then look again
+                try:
+                    await asyncio.shield(fetch)
+                except Exception:  # noqa: BLE001 - the caller needs a newer fetch anyway
+                    pass
+                except asyncio.CancelledError:
+                    self._raise_if_unloaded(fetch)
+                    raise
+                continue
+
+            try:
+                return await asyncio.shield(fetch)
+            except MSpaRequestPreempted:
+                if priority >= PRIORITY_POLL:
+                    raise
+                # Joined a background fetch that a command pre-empted; fetch again in our own lane
+            except asyncio.CancelledError:
+                self._raise_if_unloaded(fetch)
+                raise
+
+    def _raise_if_unloaded(self, fetch):
+        """Turn the cancellation of a shared fetch on unload into an error for its waiters."""
+        if fetch.cancelled() and self.supervisor.closed and not asyncio.current_task().cancelling():
+            raise MSpaSupervisorClosed("Shadow fetch cancelled: the MSpa integration is unloading") from None
+
+    def _shadow_fetch_done(self, started, fetch):
+        """Store a completed shadow fetch in the cache."""
+        if self._shadow_fetch is fetch:
+            self._shadow_fetch = None
+        if fetch.cancelled() or fetch.exception() is not None:
+            return
+        shadow = fetch.result()
+        if self.push_connected and self._shadow_base is not None:
+            missed = sorted(key for key, value in shadow.items() if self._shadow_base.get(key) != value)
+            if missed:
+                # The poll saw changes the push channel never delivered
+                self.push.stats["drift"] += 1
+                _LOGGER.debug("Status poll found changes not pushed: %s", ", ".join(missed))
+        self._shadow_cache = self._shadow_base = shadow
+        self._shadow_cache_time = started
+        self.confirm_latency.observe(shadow, started)
+
+    @property
+    def push_connected(self):
+        """True while a push channel is delivering shadow deltas."""
+        return self.push is not None and self.push.connected
+
+    def start_push(self, on_update=None, on_state=None):
+        """Start the push channel; on_update(shadow) gets the merged shadow after each delta."""
+        def deliver(delta):
+            shadow = self.apply_shadow_delta(delta)
+            if shadow is not None and on_update is not None:
+                on_update(shadow)
+
+        self.push.start(self.supervisor, deliver, on_state)
+
+    async def async_stop_push(self):
+        """Disconnect and drop the push channel, if any."""
+        push, self.push = self.push, None
+        if push is not None:
+            await push.async_stop()
+
+    def apply_shadow_delta(self, delta):
+        """Merge pushed reported values into the cached shadow and return it.
+
+        Returns None until a full shadow has been fetched once, since a delta
+        alone does not describe the device.
+        """
+        if self._shadow_base is None:
+            return None
+        shadow = self._shadow_base = {**self._shadow_base, **delta}
+        self._shadow_cache = shadow
+        self._shadow_cache_time = asyncio.get_running_loop().time()
+        self.confirm_latency.observe(shadow, self._shadow_cache_time, exact=True)
+        for desired, waiter in self._shadow_waiters:
+            if not waiter.done() and all(shadow.get(k) == v for k, v in desired.items()):
+                waiter.set_result(True)
+        return shadow
+
+    async def wait_for_shadow(self, desired, timeout):
+        """Wait until a pushed delta shows the desired values; False on timeout."""
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (desired, waiter)
+        self._shadow_waiters.append(entry)
+        try:
+            async with asyncio.timeout(timeout):
+                return await waiter
+        except TimeoutError:
+            return False
+        finally:
+            self._shadow_waiters.remove(entry)
+
+    def invalidate_status_cache(self):
+        """Drop the cached shadow so the next read goes to the cloud."""
+        self._shadow_cache = None
+
+    async def _fetch_hot_tub_status(self, priority=PRIORITY_POLL):
         payload = {
             "device_id": self.device_id,
             "product_id": self.product_id
         }
-        url = f"{self.base_url}/api/device/thing_shadow/"
-        response = await self.hass.async_add_executor_job(
-            functools.partial(requests.post, url, headers=headers, json=payload)
+        response = await self._api_request(
+            "POST", "/api/device/thing_shadow/", payload, priority,
+            deadline=DEADLINE_SHADOW, expect_data=True, hedge=True,
         )
-        response = response.json()
-        if not response.get("data") and not retry:
-            await self.authenticate()
-            return await self.get_hot_tub_status(True)
         data = response["data"]
         _LOGGER.debug("get_hot_tub_status %s", data)
         return data
 
-    async def get_device_list(self, retry=False):
-        nonce = self.generate_nonce()
-        ts = self.current_ts()
-        sign = self.build_signature(nonce, ts)
-        headers = {
-            "push_type": "Android",
-            "authorization": "token " + self.get_former_token(),
-            "appid": self.app_id,
-            "nonce": nonce,
-            "ts": ts,
-            "lan_code": "de",
-            "sign": sign,
-            "content-type": "application/json; charset=UTF-8",
-            "accept-encoding": "gzip",
-            "user-agent": "okhttp/4.9.0"
-        }
+    async def get_device_list(self):
         url = f"{self.base_url}/api/enduser/devices/"
 
-        _LOGGER.info("DIAGNOSTIC: Attempting to get device list from %s (retry=%s)", url, retry)
+        _LOGGER.info("DIAGNOSTIC: Attempting to get device list from %s", url)
         _LOGGER.info("DIAGNOSTIC: Using token (first 20 chars): %s...", self.get_former_token()[:20] if self.get_former_token() else "None")
 
         try:
-            response = await self.hass.async_add_executor_job(
-                functools.partial(requests.get, url, headers=headers, timeout=30)
+            response_json = await self._api_request(
+                "GET", "/api/enduser/devices/", deadline=DEADLINE_DEVICE_LIST, expect_data=True
             )
-            _LOGGER.info("DIAGNOSTIC: Device list HTTP status code: %s", response.status_code)
-            _LOGGER.info("DIAGNOSTIC: Device list raw response: %s", response.text)
-
-            response_json = response.json()
             _LOGGER.info("DIAGNOSTIC: Device list parsed response: %s", response_json)
 
-            if not response_json.get("data") and not retry:
-                _LOGGER.warning("DIAGNOSTIC: No data in device list response, re-authenticating...")
-                await self.authenticate()
-                return await self.get_device_list(True)
-
             data = response_json["data"]
             device_count = len(data.get("list", [])) if isinstance(data, dict) else 0
             _LOGGER.info("DIAGNOSTIC: Device list returned successfully. Number of devices: %d", device_count)
@@ -394,11 +843,11 @@ class MSpaApiClient:
                 _LOGGER.info("DIAGNOSTIC: First device info: %s", data.get("list", [])[0] if data.get("list") else "No list key")
 
             return data
-        except requests.exceptions.Timeout:
-            _LOGGER.error("DIAGNOSTIC: Device list request timed out after 30 seconds")
+        except MSpaApiError as e:
+            _LOGGER.error("DIAGNOSTIC: Device list request failed (%s): %s", e.response_class, str(e))
             raise
-        except requests.exceptions.ConnectionError as e:
-            _LOGGER.error("DIAGNOSTIC: Connection error getting device list: %s", str(e))
+        except OSError as e:
+            _LOGGER.error("DIAGNOSTIC: Network error getting device list: %s", str(e))
             raise
         except Exception as e:
             _LOGGER.error("DIAGNOSTIC: Unexpected error getting device list: %s", str(e), exc_info=True)
@@ -1,16 +1,26 @@
 import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.components.number import NumberEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
-from .entity import MSpaNumberEntity, MSpaBaseEntity
-from .coordinator import MSpaUpdateCoordinator
+from .entity import MSpaBaseEntity
+
+if TYPE_CHECKING:
+    from .coordinator import MSpaUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    coordinator: MSpaUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator: "MSpaUpdateCoordinator" = hass.data[DOMAIN][entry.entry_id]
     async_add_entities([MspaBubbleLevelNumber(coordinator)])
 
+
+class MSpaNumberEntity(MSpaBaseEntity, CoordinatorEntity, NumberEntity):
+    pass
+
 class MspaBubbleLevelNumber(MSpaNumberEntity):
     """Representation of the MSpa bubble level number entity."""
 
@@ -28,7 +38,7 @@ class MspaBubbleLevelNumber(MSpaNumberEntity):
 
     @property
     def native_value(self):
-        return self.coordinator._last_data.get("bubble_level", 1)
+        return self.coordinator.last_data.get("bubble_level", 1)
 
     async def async_set_native_value(self, value: int):
         value = max(self._attr_native_min_value, min(self._attr_native_max_value, int(value)))
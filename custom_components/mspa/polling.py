@@ -0,0 +1,160 @@
+"""Adaptive polling policy for the MSpa integration.
+
+Decides the coordinator's update interval from each decoded shadow: rapid
+polling while a commanded change is awaited or the heater is preheating, the
+normal interval otherwise, and a slow heartbeat while the tub is offline.
+Most outages are short, so for the first OFFLINE_BURST_DURATION of one it
+polls every OFFLINE_BURST_INTERVAL instead, to see the tub come back (and
+detect the power cycle) promptly.
+While a push channel delivers shadow deltas, changes need no polling to be
+seen, so it only polls every PUSH_CONSISTENCY_INTERVAL to check for missed
+deltas. In between it still updates every PUSH_SAMPLE_INTERVAL from the last
+pushed shadow, so energy and runtimes keep being sampled while nothing
+changes.
+It has no Home Assistant dependency, so the simulator runs the same policy.
+"""
+import logging
+
+from .const import (
+    DEFAULT_SCAN_INTERVAL,
+    OFFLINE_BURST_DURATION,
+    OFFLINE_BURST_INTERVAL,
+    OFFLINE_SCAN_INTERVAL,
+    PUSH_CONSISTENCY_INTERVAL,
+    PUSH_SAMPLE_INTERVAL,
+    RAPID_POLL_TIMEOUT,
+    RAPID_SCAN_INTERVAL,
+)
+from .shadow import is_device_offline
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MSpaPollingPolicy:
+    """Choose the poll interval in seconds after every update."""
+
+    def __init__(self) -> None:
+        self.interval = DEFAULT_SCAN_INTERVAL
+        self.offline_mode = False  # Polling for the tub to come back
+        self.offline_since = None  # Time of the first update that found the tub offline
+        self.pending_changes = {}  # Track expected changes
+        self.rapid_poll_until = None  # Time when to stop rapid polling
+        self.last_heat_state = None  # Track heat state changes
+        self.push_connected = False  # Shadow deltas arrive by push
+        self.last_poll = None  # Time of the last update that fetched the shadow
+
+    def poll_due(self, now: float) -> bool:
+        """True if the next update must fetch the shadow rather than use a pushed one."""
+        return (
+            not self.push_connected
+            or self.last_poll is None
+            or now - self.last_poll >= PUSH_CONSISTENCY_INTERVAL
+        )
+
+    def expect_changes(self, expected_changes: dict, now: float, first_poll: float = RAPID_SCAN_INTERVAL,
+                       deadline: float = RAPID_POLL_TIMEOUT) -> float:
+        """Poll rapidly until the expected changes show up or the deadline passes.
+
+        The first poll waits first_poll seconds, for commands whose learned
+        latency (latency_model.py) says they cannot show up sooner.
+        """
+        self.pending_changes.update(expected_changes)
+        if self.push_connected:
+            # The confirmation arrives by push
+            return self.interval
+        self.rapid_poll_until = now + deadline
+        self.interval = first_poll
+        _LOGGER.debug(f"Rapid polling enabled, waiting for changes: {expected_changes}")
+        return self.interval
+
+    def update(self, data: dict, now: float, polled: bool = True) -> float:
+        """Return the interval to use after an update that decoded to data.
+
+        polled is False when the update used a pushed shadow, or the last
+        one again, instead of fetching one.
+        """
+        should_rapid_poll = False
+        if polled:
+            self.last_poll = now
+
+        # While the tub is powered off or disconnected nothing can change, so
+        # only poll at a slow heartbeat until it comes back
+        if is_device_offline(data):
+            if not self.offline_mode:
+                _LOGGER.info(
+                    f"🔌 MSpa is offline, polling every {OFFLINE_BURST_INTERVAL}s for {OFFLINE_BURST_DURATION}s, "
+                    f"then every {OFFLINE_SCAN_INTERVAL}s until it reconnects"
+                )
+                self.offline_mode = True
+                self.offline_since = now
+            self.pending_changes.clear()
+            self.rapid_poll_until = None
+            if now - self.offline_since < OFFLINE_BURST_DURATION:
+                self.interval = OFFLINE_BURST_INTERVAL
+            else:
+                self.interval = OFFLINE_SCAN_INTERVAL
+            return self.interval
+        if self.offline_mode:
+            _LOGGER.info(f"⚡ MSpa is back online, returning to normal polling ({DEFAULT_SCAN_INTERVAL}s interval)")
+            self.offline_mode = False
+            self.offline_since = None
+            self.interval = DEFAULT_SCAN_INTERVAL
+
+        if self.push_connected:
+            for key, expected_value in list(self.pending_changes.items()):
+                if data.get(key) == expected_value:
+                    del self.pending_changes[key]
+            self.rapid_poll_until = None
+            until_poll = PUSH_CONSISTENCY_INTERVAL - (now - (self.last_poll or now))
+            self.interval = max(RAPID_SCAN_INTERVAL, min(PUSH_SAMPLE_INTERVAL, until_poll))
+            return self.interval
+
+        # Check if any pending changes have been confirmed
+        if self.pending_changes:
+            confirmed = []
+            for key, expected_value in list(self.pending_changes.items()):
+                if data.get(key) == expected_value:
+                    _LOGGER.debug(f"Pending change confirmed: {key} = {expected_value}")
+                    confirmed.append(key)
+
+            # Remove confirmed changes
+            for key in confirmed:
+                del self.pending_changes[key]
+
+            # Continue rapid polling if there are still pending changes
+            if self.pending_changes:
+                should_rapid_poll = True
+                _LOGGER.debug(f"Still waiting for changes: {self.pending_changes}")
+
+        # Check if we're in preheat mode (heat_state == 2)
+        current_heat_state = data.get("heat_state")
+        if current_heat_state == 2 and data.get("heater") == "on":
+            _LOGGER.debug("Preheat mode detected, enabling rapid polling")
+            should_rapid_poll = True
+
+        # Track heat state transitions
+        if self.last_heat_state != current_heat_state:
+            _LOGGER.debug(f"Heat state changed: {self.last_heat_state} -> {current_heat_state}")
+            self.last_heat_state = current_heat_state
+
+        # Check if rapid poll timeout has expired
+        if self.rapid_poll_until and now > self.rapid_poll_until:
+            _LOGGER.debug("Rapid poll timeout expired, returning to normal polling")
+            self.rapid_poll_until = None
+            should_rapid_poll = False
+
+        # Adjust polling interval
+        if should_rapid_poll and not self.rapid_poll_until:
+            # Start rapid polling
+            self.rapid_poll_until = now + RAPID_POLL_TIMEOUT
+            self.interval = RAPID_SCAN_INTERVAL
+            _LOGGER.info("Enabled rapid polling (1s interval) for up to 15 seconds")
+        elif should_rapid_poll:
+            # Past a delayed first poll of expect_changes()
+            self.interval = RAPID_SCAN_INTERVAL
+        elif not should_rapid_poll and self.interval < DEFAULT_SCAN_INTERVAL:
+            # Return to normal polling
+            self.rapid_poll_until = None
+            self.interval = DEFAULT_SCAN_INTERVAL
+            _LOGGER.info("Returned to normal polling (60s interval)")
+        return self.interval
@@ -0,0 +1,115 @@
+"""Power cycle detection for the MSpa integration.
+
+The MSpa resets to Fahrenheit and default settings after losing power. The
+detector watches decoded shadows for that, saving the state the tub had
+before it went offline so the coordinator can restore it. It has no Home
+Assistant dependency, so the simulator can measure its accuracy.
+
+Detection methods:
+1. is_online transition from False to True
+2. Multiple simultaneous parameter changes indicating a reset
+   (including the temperature unit reverting to its default, F/1)
+"""
+import logging
+from collections import deque
+
+_LOGGER = logging.getLogger(__name__)
+
+DETECTION_HISTORY = 20
+
+
+class MSpaPowerCycleDetector:
+    """Detect power cycles from consecutive decoded shadows."""
+
+    def __init__(self) -> None:
+        self.last_is_online = None  # Track power on/off transitions
+        self.saved_state = {}  # Store state before power off for restoration
+        self.last_snapshot = {}  # Store last known state for change detection
+        self.detections = deque(maxlen=DETECTION_HISTORY)  # (time, method)
+
+    def update(self, data: dict, now: float | None = None) -> str | None:
+        """Feed one decoded shadow; return the detection method on a power cycle."""
+        current_is_online = data.get("is_online", True)
+        power_cycle_detected = False
+        detection_method = ""
+
+        # Method 1: Track is_online transitions
+        if self.last_is_online is not None:
+            # Detect power off transition (True → False)
+            if self.last_is_online and not current_is_online:
+                _LOGGER.info("🔌 MSpa power OFF detected (is_online: True → False)")
+                # Save current state before power off
+                self.saved_state = {
+                    "heater": data.get("heater"),
+                    "target_temperature": data.get("target_temperature"),
+                    "filter": data.get("filter"),
+                    "temperature_unit": data.get("temperature_unit"),
+                    "ozone": data.get("ozone"),
+                    "uvc": data.get("uvc"),
+                }
+                _LOGGER.info(f"💾 Saved state for restoration: {self.saved_state}")
+
+            # Detect power on transition (False → True)
+            elif not self.last_is_online and current_is_online:
+                power_cycle_detected = True
+                detection_method = "is_online transition (False → True)"
+                _LOGGER.info(f"⚡ MSpa power ON detected via {detection_method}")
+
+        # Method 2: Detect multiple simultaneous changes suggesting a reset
+        # This helps catch quick power cycles that we might miss with is_online
+        if self.last_snapshot and not power_cycle_detected:
+            changes_detected = []
+
+            # Check for key parameters reverting to defaults
+            if self.last_snapshot.get("temperature_unit") == 0 and data.get("temperature_unit") == 1:
+                changes_detected.append("temp_unit_reset_to_F")
+
+            if self.last_snapshot.get("heater") == "on" and data.get("heater") == "off":
+                changes_detected.append("heater_off")
+
+            if self.last_snapshot.get("filter") == "on" and data.get("filter") == "off":
+                changes_detected.append("filter_off")
+
+            if self.last_snapshot.get("ozone") == "on" and data.get("ozone") == "off":
+                changes_detected.append("ozone_off")
+
+            if self.last_snapshot.get("uvc") == "on" and data.get("uvc") == "off":
+                changes_detected.append("uvc_off")
+
+            # If multiple things turned off simultaneously, it's likely a power cycle
+            if len(changes_detected) >= 2:
+                power_cycle_detected = True
+                detection_method = f"multiple simultaneous changes: {', '.join(changes_detected)}"
+                _LOGGER.warning(f"⚡ Possible power cycle detected via {detection_method}")
+                _LOGGER.info("💡 TIP: If this is a false positive, please report it with the changes detected")
+
+        # Store current state as snapshot for next comparison
+        self.last_snapshot = {
+            "temperature_unit": data.get("temperature_unit"),
+            "heater": data.get("heater"),
+            "filter": data.get("filter"),
+            "ozone": data.get("ozone"),
+            "uvc": data.get("uvc"),
+            "target_temperature": data.get("target_temperature"),
+        }
+
+        # Update last is_online state
+        self.last_is_online = current_is_online
+
+        if not power_cycle_detected:
+            return None
+        self.detections.append((now, detection_method))
+        return detection_method
+
+    def restore_target(self) -> dict:
+        """Translate the saved state into shadow values to restore.
+
+        As before, only features that were on are switched back on.
+        """
+        target = {}
+        if self.saved_state.get("target_temperature") is not None:
+            target["temperature_setting"] = int(round(self.saved_state["target_temperature"] * 2))
+        for feature in ("heater", "filter", "ozone", "uvc"):
+            if self.saved_state.get(feature) == "on":
+                target[f"{feature}_state"] = 1
+        return target
@@ -0,0 +1,141 @@
+"""On-demand profiling of the MSpa integration.
+
+The mspa.profile service runs cProfile and tracemalloc for a chosen window
+on the event loop thread, where the coordinator update, the entity state
+writes and the API client's request handling all run. cProfile sees every
+coroutine on the loop, other integrations included: the full profile written
+to the config directory for snakeviz or pstats covers the whole loop. The
+summary written next to it and logged lists this integration's functions
+only; their cumulative times include whatever they call.
+
+tracemalloc records one frame per allocation, and its snapshots are taken
+and filtered to this integration's files in an executor thread, so a busy
+instance's allocations are not copied on the event loop.
+
+HTTP requests themselves run in executor threads and are not profiled; the
+time the API client spends waiting on them shows up as wall time only.
+"""
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Functions reported on their own in the summary
+HOT_PATHS = (
+    "_async_update_data",
+    "_handle_coordinator_update",
+    "async_write_ha_state",
+    "_api_request",
+    "get_hot_tub_status",
+    "send_device_command",
+)
+
+TRACE_FRAMES = 1  # Frames tracemalloc keeps per allocation
+
+_running = False
+
+
+def _package_snapshot():
+    """Snapshot tracemalloc's traces, keeping only allocations in this integration."""
+    package_filter = [tracemalloc.Filter(True, os.path.join(PACKAGE_DIR, "*"))]
+    return tracemalloc.take_snapshot().filter_traces(package_filter)
+
+
+def _summarize(profile, snapshot_before, snapshot_after, duration, top):
+    """Return the summary text of one profiling window."""
+    stats = pstats.Stats(profile)
+    package_calls = 0
+    package_time = 0.0
+    hot_paths = {}
+    for (filename, _, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        if not filename.startswith(PACKAGE_DIR):
+            continue
+        package_calls += ncalls
+        package_time += tottime
+        if function in HOT_PATHS:
+            calls, cumulative = hot_paths.get(function, (0, 0.0))
+            hot_paths[function] = (calls + ncalls, cumulative + cumtime)
+
+    lines = [
+        f"MSpa profile: {duration:.0f} s window, {package_calls} calls in integration code, "
+        f"{package_time * 1000:.1f} ms own time on the event loop",
+        "",
+        "Hot paths (calls, cumulative ms):",
+    ]
+    for function in HOT_PATHS:
+        calls, cumulative = hot_paths.get(function, (0, 0.0))
+        lines.append(f"  {function:<28} {calls:>6} {cumulative * 1000:>10.1f}")
+
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(PACKAGE_DIR.replace("\\", "/"), top)
+    lines += ["", f"Top {top} integration functions by cumulative time:", stream.getvalue().strip()]
+
+    lines += ["", f"Top {top} allocation sites in integration code (size change):"]
+    if snapshot_before is None:
+        # Tracing started with the window, so everything traced is new
+        differences = snapshot_after.statistics("lineno")
+    else:
+        differences = snapshot_after.compare_to(snapshot_before, "lineno")
+    for difference in differences[:top]:
+        lines.append(f"  {difference}")
+    return "\n".join(lines) + "\n"
+
+
+async def async_profile(hass, duration: float, top: int = 20) -> str | None:
+    """Profile the event loop for duration seconds and return the summary path.
+
+    Returns None if a profile is already running or another profiler holds
+    the interpreter's profiling hook.
+    """
+    global _running
+    if _running:
+        _LOGGER.warning("MSpa profile already running, ignoring request")
+        return None
+
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as err:  # Another profiler (e.g. HA's profiler integration) is active
+        _LOGGER.error("Cannot start MSpa profile: %s", err)
+        return None
+    _running = True
+    started_tracing = not tracemalloc.is_tracing()
+    snapshot_before = None
+    _LOGGER.info("MSpa profile started for %.0f seconds", duration)
+    try:
+        if started_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        else:
+            # Someone else is tracing; compare against what is already traced
+            snapshot_before = await hass.async_add_executor_job(_package_snapshot)
+        await asyncio.sleep(duration)
+        snapshot_after = await hass.async_add_executor_job(_package_snapshot)
+    finally:
+        profile.disable()
+        if started_tracing:
+            tracemalloc.stop()
+        _running = False
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    profile_path = hass.config.path(f"mspa_profile_{stamp}.prof")
+    summary_path = hass.config.path(f"mspa_profile_{stamp}.txt")
+
+    def _write():
+        summary = _summarize(profile, snapshot_before, snapshot_after, duration, top)
+        profile.dump_stats(profile_path)
+        with open(summary_path, "w", encoding="utf-8") as summary_file:
+            summary_file.write(summary)
+        return summary
+
+    summary = await hass.async_add_executor_job(_write)
+    _LOGGER.info("MSpa profile written to %s and %s\n%s", profile_path, summary_path,
+                 "\n".join(summary.splitlines()[:4 + len(HOT_PATHS)]))
+    return summary_path
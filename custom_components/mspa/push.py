@@ -0,0 +1,303 @@
+"""Push channels for shadow updates in the MSpa integration.
+
+The API client normally learns about shadow changes by polling thing_shadow.
+A push channel keeps a subscription open instead and hands every reported
+delta to the client, which merges it into its cached shadow and wakes
+anything waiting for a command to take effect. While a channel is connected
+the coordinator only polls now and then, to check that nothing was missed.
+
+The MSpa cloud does not document a push endpoint, so nothing connects by
+default. Two channels are provided:
+- LoopbackPushChannel subscribes to a LoopbackBroker in the same process.
+  Tests and the simulator publish deltas through it.
+- MqttPushChannel subscribes to an MQTT broker over WebSocket, for example a
+  local bridge, given a ws:// or wss:// URL and a topic. It needs paho-mqtt.
+
+A channel reconnects with exponential backoff after any failure. Until it
+is connected again the coordinator polls as usual.
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import unquote, urlsplit
+
+from .const import PUSH_CONNECT_TIMEOUT, PUSH_RECONNECT_DELAY, PUSH_RECONNECT_MAX
+
+_LOGGER = logging.getLogger(__name__)
+
+_DISCONNECTED = object()  # Queued by a broker or client when the connection drops
+
+
+def reported_delta(message) -> dict | None:
+    """Return the reported shadow values in a push message, or None.
+
+    Accepts JSON text or bytes, or an already decoded dict, shaped as
+    {"state": {"reported": {...}}}, {"reported": {...}} or a flat dict.
+    """
+    if isinstance(message, (bytes, bytearray)):
+        message = message.decode("utf-8", "replace")
+    if isinstance(message, str):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            return None
+    if not isinstance(message, dict):
+        return None
+    state = message.get("state", message)
+    if not isinstance(state, dict):
+        return None
+    reported = state.get("reported", state)
+    return reported if isinstance(reported, dict) and reported else None
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """Match an MQTT topic against a filter with + and # wildcards."""
+    filter_levels = topic_filter.split("/")
+    levels = topic.split("/")
+    for index, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if index >= len(levels) or (level != "+" and level != levels[index]):
+            return False
+    return len(filter_levels) == len(levels)
+
+
+class MSpaPushChannel:
+    """Keep a shadow subscription open and deliver each delta to a callback.
+
+    Subclasses implement _connect(), _messages() and _close().
+    """
+
+    name = "push"
+
+    def __init__(self) -> None:
+        self.connected = False
+        self.last_message = None  # Loop time of the last delta received
+        self.stats = {"connects": 0, "disconnects": 0, "messages": 0, "invalid": 0, "drift": 0}
+        self.last_error = None
+        self._on_delta = None
+        self._on_state = None
+        self._task = None
+
+    def start(self, supervisor, on_delta, on_state=None) -> None:
+        """Connect in a supervised background task; on_delta(dict) gets every delta."""
+        self._on_delta = on_delta
+        self._on_state = on_state
+        self._task = supervisor.create_task(self._run(), f"{self.name} channel")
+
+    async def async_stop(self) -> None:
+        """Disconnect and stop reconnecting, without calling the state callback."""
+        self._on_state = None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._set_connected(False)
+
+    async def _run(self) -> None:
+        delay = PUSH_RECONNECT_DELAY
+        while True:
+            try:
+                async with asyncio.timeout(PUSH_CONNECT_TIMEOUT):
+                    await self._connect()
+                self._set_connected(True)
+                delay = PUSH_RECONNECT_DELAY
+                async for message in self._messages():
+                    self._deliver(message)
+                raise ConnectionError("subscription ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:  # noqa: BLE001 - any failure means reconnect
+                self.last_error = f"{type(err).__name__}: {err}"
+                _LOGGER.debug("MSpa %s channel failed (%s), reconnecting in %ss", self.name, self.last_error, delay)
+            finally:
+                self._set_connected(False)
+                await self._close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PUSH_RECONNECT_MAX)
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected == self.connected:
+            return
+        self.connected = connected
+        self.stats["connects" if connected else "disconnects"] += 1
+        _LOGGER.info("MSpa %s channel %s", self.name, "connected" if connected else "disconnected")
+        if self._on_state is not None:
+            self._on_state(connected)
+
+    def _deliver(self, message) -> None:
+        delta = reported_delta(message)
+        if delta is None:
+            self.stats["invalid"] += 1
+            return
+        self.stats["messages"] += 1
+        self.last_message = asyncio.get_running_loop().time()
+        self._on_delta(delta)
+
+    async def _connect(self) -> None:
+        raise NotImplementedError
+
+    def _messages(self):
+        raise NotImplementedError
+
+    async def _close(self) -> None:
+        """Release the connection; must be safe to call when not connected."""
+
+    def as_dict(self) -> dict:
+        return {
+            "channel": self.name,
+            "connected": self.connected,
+            "last_error": self.last_error,
+            **self.stats,
+        }
+
+
+class LoopbackBroker:
+    """In-process stand-in for a push broker, for tests and the simulator."""
+
+    def __init__(self) -> None:
+        self.online = True
+        self._subscriptions = []  # (topic filter, queue)
+        self.published = 0
+
+    def subscribe(self, topic_filter: str) -> asyncio.Queue:
+        if not self.online:
+            raise ConnectionError("loopback broker is offline")
+        queue = asyncio.Queue()
+        self._subscriptions.append((topic_filter, queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscriptions = [(topic, q) for topic, q in self._subscriptions if q is not queue]
+
+    def publish(self, topic: str, payload) -> None:
+        """Queue payload for every subscription matching topic."""
+        if not self.online:
+            return
+        self.published += 1
+        for topic_filter, queue in self._subscriptions:
+            if topic_matches(topic_filter, topic):
+                queue.put_nowait(payload)
+
+    def set_online(self, online: bool) -> None:
+        """Take the broker down, dropping every subscriber, or bring it back."""
+        self.online = online
+        if not online:
+            subscriptions, self._subscriptions = self._subscriptions, []
+            for _, queue in subscriptions:
+                queue.put_nowait(_DISCONNECTED)
+
+
+class _QueueChannel(MSpaPushChannel):
+    """A channel whose messages arrive on an asyncio queue."""
+
+    _queue = None
+
+    async def _messages(self):
+        while True:
+            message = await self._queue.get()
+            if message is _DISCONNECTED:
+                raise ConnectionError("connection lost")
+            yield message
+
+
+class LoopbackPushChannel(_QueueChannel):
+    """Subscribe to a LoopbackBroker."""
+
+    name = "loopback push"
+
+    def __init__(self, broker: LoopbackBroker, topic: str) -> None:
+        super().__init__()
+        self.broker = broker
+        self.topic = topic
+
+    async def _connect(self) -> None:
+        self._queue = self.broker.subscribe(self.topic)
+
+    async def _close(self) -> None:
+        if self._queue is not None:
+            self.broker.unsubscribe(self._queue)
+            self._queue = None
+
+
+class MqttPushChannel(_QueueChannel):
+    """Subscribe to an MQTT broker over WebSocket with paho-mqtt.
+
+    url is ws://[user:password@]host[:port][/path] or wss://...; paho runs
+    its network loop in its own thread and hands messages to the event loop.
+    """
+
+    name = "MQTT push"
+
+    def __init__(self, url: str, topic: str, client_id: str | None = None) -> None:
+        super().__init__()
+        self.url = url
+        self.topic = topic
+        self.client_id = client_id or ""
+        self._client = None
+
+    @staticmethod
+    def available() -> bool:
+        """True if paho-mqtt is installed."""
+        try:
+            import paho.mqtt.client  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    async def _connect(self) -> None:
+        import paho.mqtt.client as mqtt
+
+        loop = asyncio.get_running_loop()
+        parts = urlsplit(self.url)
+        if parts.scheme not in ("ws", "wss"):
+            raise ValueError(f"Push URL must start with ws:// or wss://, not {parts.scheme}://")
+        queue = self._queue = asyncio.Queue()
+        connected = loop.create_future()
+
+        def resolve(result):
+            if not connected.done():
+                connected.set_result(result)
+
+        def on_connect(client, userdata, flags, reason_code, *args):
+            loop.call_soon_threadsafe(resolve, reason_code)
+
+        def on_disconnect(client, userdata, *args):
+            loop.call_soon_threadsafe(resolve, "disconnected")
+            loop.call_soon_threadsafe(queue.put_nowait, _DISCONNECTED)
+
+        def on_message(client, userdata, message):
+            loop.call_soon_threadsafe(queue.put_nowait, message.payload)
+
+        if hasattr(mqtt, "CallbackAPIVersion"):  # paho-mqtt 2.x
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=self.client_id, transport="websockets")
+        else:
+            client = mqtt.Client(client_id=self.client_id, transport="websockets")
+        client.on_connect = on_connect
+        client.on_disconnect = on_disconnect
+        client.on_message = on_message
+        client.ws_set_options(path=parts.path or "/mqtt")
+        if parts.username:
+            client.username_pw_set(unquote(parts.username), unquote(parts.password or ""))
+        self._client = client
+
+        if parts.scheme == "wss":
+            await loop.run_in_executor(None, client.tls_set)
+        port = parts.port or (443 if parts.scheme == "wss" else 80)
+        await loop.run_in_executor(None, client.connect, parts.hostname, port)
+        client.loop_start()
+        result = await connected
+        if result == "disconnected" or getattr(result, "is_failure", result != 0):
+            raise ConnectionError(f"broker refused the connection: {result}")
+        client.subscribe(self.topic)
+
+    async def _close(self) -> None:
+        client, self._client = self._client, None
+        if client is None:
+            return
+
+        def stop():
+            client.disconnect()
+            client.loop_stop()
+
+        await asyncio.get_running_loop().run_in_executor(None, stop)
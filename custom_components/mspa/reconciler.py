@@ -0,0 +1,133 @@
+"""Desired-state reconciliation for the MSpa integration.
+
+Instead of replaying a sequence of commands after a power cut, or re-sending
+the temperature unit on every poll, the coordinator declares target values
+for shadow fields here. On every shadow the reconciler works out which
+targets the device does not yet match and sends them as one merged command.
+The one exception is the temperature unit: the device reads a temperature in
+the unit it is set to, so a unit change goes out on its own and the rest
+follows once the shadow shows it. If the device keeps ignoring a command,
+it backs off exponentially.
+
+Targets come from sources with a fixed precedence. One-shot sources (restore
+after a power cut, unit tracking on power-up) are dropped field by field once
+the device matches them; persistent sources (always-enforce unit) stay.
+"""
+import asyncio
+import logging
+
+from .const import RECONCILE_BACKOFF_BASE, RECONCILE_BACKOFF_MAX, RECONCILE_MAX_ATTEMPTS
+from .request_scheduler import PRIORITY_MAINTENANCE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Target sources, highest precedence first
+SOURCE_ENFORCE_UNIT = "enforce_unit"
+SOURCE_TRACK_UNIT = "track_unit"
+SOURCE_RESTORE = "restore"
+SOURCE_PRECEDENCE = (SOURCE_ENFORCE_UNIT, SOURCE_TRACK_UNIT, SOURCE_RESTORE)
+
+
+class MSpaStateReconciler:
+    """Drive the device shadow towards declared target values."""
+
+    def __init__(self, api) -> None:
+        self.api = api
+        self._targets = {}  # source -> {shadow field: value}
+        self._persistent = set()
+        self._last_sent = None
+        self._attempts = 0
+        self._next_attempt = 0.0
+        self.commands_sent = 0
+
+    def set_target(self, source: str, desired: dict, persistent: bool = False) -> None:
+        """Declare target shadow values for a source, replacing earlier ones."""
+        if self._targets.get(source) == desired and (source in self._persistent) == persistent:
+            return
+        _LOGGER.debug("Reconciler target %s: %s", source, desired)
+        self._targets[source] = dict(desired)
+        if persistent:
+            self._persistent.add(source)
+        else:
+            self._persistent.discard(source)
+
+    def clear_target(self, source: str) -> None:
+        self._targets.pop(source, None)
+        self._persistent.discard(source)
+
+    def discard_fields(self, fields) -> None:
+        """Let a user command win over one-shot targets for the same fields."""
+        for source, desired in list(self._targets.items()):
+            if source in self._persistent:
+                continue
+            for field in fields:
+                desired.pop(field, None)
+            if not desired:
+                del self._targets[source]
+
+    @property
+    def targets(self) -> dict:
+        return {source: dict(desired) for source, desired in self._targets.items()}
+
+    def desired_state(self) -> dict:
+        """Merge all targets, the higher-precedence source winning per field."""
+        merged = {}
+        for source in reversed(SOURCE_PRECEDENCE):
+            merged.update(self._targets.get(source, {}))
+        return merged
+
+    def _drop_satisfied(self, status: dict) -> None:
+        for source, desired in list(self._targets.items()):
+            if source in self._persistent:
+                continue
+            for field in [f for f, value in desired.items() if status.get(f) == value]:
+                del desired[field]
+            if not desired:
+                _LOGGER.info(f"✅ Reconciler target '{source}' reached")
+                del self._targets[source]
+
+    def _diff(self, status: dict) -> dict:
+        """Return the fields to send next: the unit alone if it differs, else every differing field."""
+        diff = {field: value for field, value in self.desired_state().items() if status.get(field) != value}
+        if "temperature_unit" in diff and len(diff) > 1:
+            return {"temperature_unit": diff["temperature_unit"]}
+        return diff
+
+    async def async_reconcile(self, status: dict) -> dict | None:
+        """Send one command for every field that differs from its target.
+
+        Returns the fields sent, or None if nothing was sent.
+        """
+        self._drop_satisfied(status)
+        diff = self._diff(status)
+        if not diff:
+            self._last_sent = None
+            self._attempts = 0
+            return None
+
+        if self._last_sent is not None and all(status.get(field) == value for field, value in self._last_sent.items()):
+            # The previous command took effect (e.g. the unit, sent first); send the rest now
+            self._next_attempt = 0.0
+        now = asyncio.get_running_loop().time()
+        if now < self._next_attempt:
+            return None
+
+        if diff == self._last_sent:
+            # The device ignored the previous command
+            self._attempts += 1
+            if self._attempts >= RECONCILE_MAX_ATTEMPTS:
+                _LOGGER.warning(f"⚠️ MSpa ignored {self._attempts} attempts to apply {diff}, giving up on one-shot targets")
+                self.discard_fields(diff)
+                self._attempts = 0
+                diff = self._diff(status)
+                if not diff:
+                    return None
+        else:
+            self._attempts = 0
+        self._next_attempt = now + min(RECONCILE_BACKOFF_MAX, RECONCILE_BACKOFF_BASE * 2 ** self._attempts)
+        self._last_sent = diff
+
+        _LOGGER.info(f"♻️ Reconciling MSpa state with one command: {diff}")
+        await self.api.send_device_command(diff, priority=PRIORITY_MAINTENANCE, confirm=False)
+        self.commands_sent += 1
+        return diff
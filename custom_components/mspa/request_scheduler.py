@@ -0,0 +1,138 @@
+"""Account-wide request budget for the MSpa cloud API.
+
+Every HTTP request the integration makes passes through a single token bucket.
+When the bucket is empty, requests queue by priority: user commands first, then
+command confirmations, then background polls and maintenance. A user command
+also pre-empts background status reads that are already in flight, so the
+read's caller sees MSpaRequestPreempted instead of holding up the command.
+Only requests marked pre-emptible are cancelled: a login or a command has
+already taken effect by the time its task could be, so those always finish.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+_LOGGER = logging.getLogger(__name__)
+
+# Priority lanes, lower value is served first
+PRIORITY_COMMAND = 0
+PRIORITY_CONFIRM = 1
+PRIORITY_POLL = 2
+PRIORITY_MAINTENANCE = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_COMMAND: "command",
+    PRIORITY_CONFIRM: "confirm",
+    PRIORITY_POLL: "poll",
+    PRIORITY_MAINTENANCE: "maintenance",
+}
+
+# Lane for requests issued from the current task when the call site does not
+# pick one explicitly (e.g. commands sent while restoring state after a power cut)
+request_priority: ContextVar = ContextVar("mspa_request_priority", default=None)
+
+
+class MSpaRequestPreempted(Exception):
+    """A background request was cancelled to make room for a user command."""
+
+
+class MSpaRequestScheduler:
+    """Token-bucket request budget with priority lanes."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = None
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._preemptible = {}  # task -> priority, for in-flight background reads
+        self._preempted = set()
+        self.stats = {name: {"granted": 0, "preempted": 0} for name in PRIORITY_NAMES.values()}
+
+    def _refill(self, now: float) -> None:
+        if self._updated is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _dispatch(self) -> None:
+        """Grant tokens to queued requests in priority order."""
+        loop = asyncio.get_running_loop()
+        self._wakeup = None
+        self._refill(loop.time())
+        while self._waiters:
+            if self._waiters[0][2].done():
+                heapq.heappop(self._waiters)  # Waiter was cancelled
+                continue
+            if self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                self._wakeup = loop.call_later(delay, self._dispatch)
+                return
+            self._tokens -= 1
+            priority, _, future = heapq.heappop(self._waiters)
+            future.set_result(None)
+            self.stats[PRIORITY_NAMES[priority]]["granted"] += 1
+
+    async def acquire(self, priority: int) -> None:
+        """Wait until the budget allows one request in the given lane."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if priority == PRIORITY_COMMAND:
+            self._preempt_background()
+        if self._wakeup is None:
+            self._dispatch()
+        await future
+
+    def try_acquire(self, priority: int) -> bool:
+        """Take a token only if one is free right now and nothing is queued."""
+        self._refill(asyncio.get_running_loop().time())
+        if self._waiters or self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self.stats[PRIORITY_NAMES[priority]]["granted"] += 1
+        return True
+
+    def _preempt_background(self) -> None:
+        for task, priority in self._preemptible.items():
+            if priority >= PRIORITY_POLL and task not in self._preempted and not task.done():
+                _LOGGER.debug("Pre-empting in-flight %s request for a user command", PRIORITY_NAMES[priority])
+                self._preempted.add(task)
+                self.stats[PRIORITY_NAMES[priority]]["preempted"] += 1
+                task.cancel()
+
+    @asynccontextmanager
+    async def slot(self, priority: int | None = None, acquired: bool = False, preemptible: bool = False):
+        """Hold a request slot for the duration of one HTTP call.
+
+        The lane defaults to the one set in request_priority, else poll.
+        preemptible is only for idempotent reads, which a user command may
+        cancel while they run in a background lane.
+        """
+        if priority is None:
+            priority = request_priority.get()
+            if priority is None:
+                priority = PRIORITY_POLL
+        if not acquired:
+            await self.acquire(priority)
+        task = asyncio.current_task()
+        if preemptible:
+            self._preemptible[task] = priority
+        try:
+            yield
+        except asyncio.CancelledError:
+            if task in self._preempted:
+                task.uncancel()
+                raise MSpaRequestPreempted(f"{PRIORITY_NAMES[priority]} request pre-empted by a user command") from None
+            raise
+        finally:
+            self._preemptible.pop(task, None)
+            self._preempted.discard(task)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter[2].done())
@@ -0,0 +1,195 @@
+"""Rolling statistics over a fixed time window for the MSpa integration.
+
+The coordinator adds every decoded shadow here. Samples are held until
+the next one (sample and hold), and each interval between two samples is
+stored as a segment in preallocated ring buffers (array.array). Intervals
+are merged into the previous segment while it spans no more than
+ROLLING_STATS_RESOLUTION, keeping time-weighted means and the lowest water
+temperature, so rapid polling cannot fill the ring before the window is
+covered. Memory stays fixed however long Home Assistant runs.
+
+Each aggregate is updated in O(1) as segments enter or leave the window:
+- a running integral of value x time per channel, giving heater duty
+  cycle, filter and bubble runtimes, energy and mean water temperature
+- a monotonic queue of segment numbers, giving minimum water temperature
+
+The sensors read these aggregates instead of scanning recorder history.
+Gaps longer than ENERGY_MAX_SAMPLE_GAP and offline periods are not held
+over, and samples without a water temperature are skipped. Results are
+relative to the time actually covered.
+"""
+from array import array
+from collections import deque
+
+from .const import ENERGY_MAX_SAMPLE_GAP, ROLLING_STATS_CAPACITY, ROLLING_STATS_RESOLUTION, ROLLING_STATS_WINDOW
+from .shadow import is_device_offline
+
+# Channels stored per segment
+HEATING = "heating"  # Heater element active (heat_state 3)
+FILTER = "filter"
+BUBBLE = "bubble"
+POWER = "power"  # Estimated total power in W
+WATER_TEMPERATURE = "water_temperature"
+CHANNELS = (HEATING, FILTER, BUBBLE, POWER, WATER_TEMPERATURE)
+
+
+def sample_values(data: dict, power_w: float) -> dict:
+    """Return the channel values of one decoded shadow."""
+    return {
+        HEATING: 1.0 if data.get("heater") == "on" and data.get("heat_state") == 3 else 0.0,
+        FILTER: 1.0 if data.get("filter") == "on" else 0.0,
+        BUBBLE: 1.0 if data.get("bubble") == "on" else 0.0,
+        POWER: float(power_w),
+        WATER_TEMPERATURE: float(data["water_temperature"]),
+    }
+
+
+class MSpaRollingStats:
+    """Windowed integrals and minimum over a fixed-size ring of segments."""
+
+    def __init__(self, window: float = ROLLING_STATS_WINDOW, capacity: int = ROLLING_STATS_CAPACITY,
+                 max_gap: float = ENERGY_MAX_SAMPLE_GAP, resolution: float = ROLLING_STATS_RESOLUTION) -> None:
+        self.window = window
+        self.capacity = capacity
+        self.max_gap = max_gap
+        self.resolution = resolution
+        zeros = bytes(8 * capacity)
+        self._start = array("d", zeros)
+        self._end = array("d", zeros)
+        self._values = {channel: array("d", zeros) for channel in CHANNELS}  # Time-weighted means
+        self._lowest = array("d", zeros)  # Lowest water temperature per segment
+        self._first = 0  # Sequence number of the oldest stored segment
+        self._next = 0  # Sequence number of the next segment; ring index is seq % capacity
+        self._integrals = dict.fromkeys(CHANNELS, 0.0)  # value x seconds over stored segments
+        self._covered = 0.0  # Seconds covered by stored segments
+        self._minimum = deque()  # Segment numbers with increasing water temperature
+        self._last = None  # (time, values) of the previous sample
+        self.now = None  # Time of the newest sample; results are as of this time
+
+    def add_sample(self, data: dict, power_w: float, now: float) -> None:
+        """Add one decoded shadow sampled at now (monotonic seconds)."""
+        if is_device_offline(data):
+            # Values reported while offline are stale; do not hold them over
+            self._last = None
+            return
+        if data.get("water_temperature") is None:
+            # Incomplete shadow; the previous sample stays held
+            return
+        values = sample_values(data, power_w)
+        if self._last is not None:
+            last_time, last_values = self._last
+            if 0 < now - last_time <= self.max_gap:
+                self._append(last_time, now, last_values)
+        self._last = (now, values)
+        self.now = now
+        self._expire(now - self.window)
+
+    def _append(self, start: float, end: float, values: dict) -> None:
+        duration = end - start
+        temperature = values[WATER_TEMPERATURE]
+        last = (self._next - 1) % self.capacity
+        if (
+            self._first < self._next
+            and self._end[last] == start
+            and end - self._start[last] <= self.resolution
+        ):
+            # Extend the newest segment: its values become time-weighted means
+            seq, index = self._next - 1, last
+            held = start - self._start[index]
+            for channel, value in values.items():
+                stored = self._values[channel]
+                stored[index] = (stored[index] * held + value * duration) / (held + duration)
+            self._end[index] = end
+            temperature = min(temperature, self._lowest[index])
+            if self._minimum and self._minimum[-1] == seq:
+                self._minimum.pop()
+        else:
+            if self._next - self._first == self.capacity:
+                self._evict()
+            seq = self._next
+            index = seq % self.capacity
+            self._start[index] = start
+            self._end[index] = end
+            for channel, value in values.items():
+                self._values[channel][index] = value
+            self._next = seq + 1
+        for channel, value in values.items():
+            self._integrals[channel] += value * duration
+        self._covered += duration
+        self._lowest[index] = temperature
+        while self._minimum and self._lowest[self._minimum[-1] % self.capacity] >= temperature:
+            self._minimum.pop()
+        self._minimum.append(seq)
+
+    def _evict(self) -> None:
+        seq = self._first
+        index = seq % self.capacity
+        duration = self._end[index] - self._start[index]
+        for channel in CHANNELS:
+            self._integrals[channel] -= self._values[channel][index] * duration
+        self._covered -= duration
+        if self._minimum and self._minimum[0] == seq:
+            self._minimum.popleft()
+        self._first = seq + 1
+        if self._first == self._next:
+            # Empty: drop accumulated rounding error
+            self._integrals = dict.fromkeys(CHANNELS, 0.0)
+            self._covered = 0.0
+
+    def _expire(self, cutoff: float) -> None:
+        while self._first < self._next and self._end[self._first % self.capacity] <= cutoff:
+            self._evict()
+
+    def _clipped(self) -> float:
+        """Seconds of the oldest segment that lie before the window."""
+        if self._first == self._next:
+            return 0.0
+        index = self._first % self.capacity
+        return max(0.0, self.now - self.window - self._start[index])
+
+    def covered(self) -> float:
+        """Seconds of the window covered by samples."""
+        return self._covered - self._clipped()
+
+    def integral(self, channel: str) -> float:
+        """Return value x seconds of a channel over the window."""
+        clipped = self._clipped()
+        if clipped:
+            clipped *= self._values[channel][self._first % self.capacity]
+        return self._integrals[channel] - clipped
+
+    def duty_cycle(self, channel: str = HEATING) -> float | None:
+        """Percentage of the covered time the channel was on."""
+        covered = self.covered()
+        return round(100 * self.integral(channel) / covered, 1) if covered > 0 else None
+
+    def runtime_hours(self, channel: str) -> float | None:
+        return round(self.integral(channel) / 3600, 2) if self.covered() > 0 else None
+
+    def energy_kwh(self) -> float | None:
+        return round(self.integral(POWER) / 3600 / 1000, 3) if self.covered() > 0 else None
+
+    def mean(self, channel: str = WATER_TEMPERATURE) -> float | None:
+        covered = self.covered()
+        return round(self.integral(channel) / covered, 1) if covered > 0 else None
+
+    def minimum_temperature(self) -> float | None:
+        if not self._minimum:
+            return None
+        return round(self._lowest[self._minimum[0] % self.capacity], 1)
+
+    def as_dict(self) -> dict:
+        """Return the current aggregates, for diagnostics."""
+        return {
+            "window_s": self.window,
+            "segments": self._next - self._first,
+            "capacity": self.capacity,
+            "resolution_s": self.resolution,
+            "covered_s": round(self.covered(), 1),
+            "heater_duty_cycle": self.duty_cycle(HEATING),
+            "filter_runtime_h": self.runtime_hours(FILTER),
+            "bubble_runtime_h": self.runtime_hours(BUBBLE),
+            "energy_kwh": self.energy_kwh(),
+            "water_temperature_mean": self.mean(WATER_TEMPERATURE),
+            "water_temperature_min": self.minimum_temperature(),
+        }
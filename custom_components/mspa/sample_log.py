@@ -0,0 +1,202 @@
+"""Compact on-disk log of decoded shadow samples for the MSpa integration.
+
+With the "Log shadow samples" option the coordinator appends every decoded
+shadow to a binary file under mspa_samples/ in the config directory. There
+is one file per UTC day (samples_YYYYMMDD.bin). Each file has a 16-byte
+header and then fixed-width little-endian records (RECORD_FIELDS), 31 bytes
+each, or about 45 kB a day at the normal poll interval.
+
+Records are buffered and written from an executor thread every few minutes,
+so the event loop never waits on the disk. If Home Assistant stops
+mid-write, a partial trailing record is ignored when the file is read, and
+cut off before the next write so later records stay aligned.
+
+read_samples() memory-maps the files and returns one column per field.
+With NumPy installed the columns are ndarrays, viewed straight onto the
+mapped file when only one file is read. Without it they are array.array
+objects, which NumPy and pandas accept as they are:
+
+    columns = read_samples("/config/mspa_samples", start="2025-06-01")
+    heating_hours = (columns["heat_state"] == 3).sum() * 60 / 3600
+"""
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from datetime import date, datetime, timezone
+
+_LOGGER = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MAGIC = b"MSPASMP" + bytes([FORMAT_VERSION])
+
+# (column, struct code); -1 marks an unknown value in the signed small fields
+RECORD_FIELDS = (
+    ("time", "d"),  # Unix time of the sample
+    ("water_temperature", "f"),
+    ("target_temperature", "f"),
+    ("power", "f"),  # Estimated total power in W
+    ("heater", "B"),
+    ("filter", "B"),
+    ("bubble", "B"),
+    ("jet", "B"),
+    ("ozone", "B"),
+    ("uvc", "B"),
+    ("bubble_level", "b"),
+    ("heat_state", "b"),
+    ("temperature_unit", "b"),
+    ("online", "b"),
+    ("fault", "B"),  # 1 if the tub reported a fault code
+)
+RECORD = struct.Struct("<" + "".join(code for _, code in RECORD_FIELDS))
+HEADER = struct.Struct("<8sHH4x")  # magic, record size, field count
+FILE_PREFIX = "samples_"
+FILE_SUFFIX = ".bin"
+SWITCHES = ("heater", "filter", "bubble", "jet", "ozone", "uvc")
+
+
+def numpy_dtype():
+    """Return the NumPy structured dtype of one record."""
+    import numpy as np
+
+    return np.dtype([(name, "<" + code) for name, code in RECORD_FIELDS])
+
+
+def _small(value) -> int:
+    return -1 if value is None else int(value)
+
+
+def pack_sample(data: dict, power_w: float, timestamp: float) -> bytes:
+    """Encode one decoded shadow as a record."""
+    online = data.get("is_online")
+    return RECORD.pack(
+        timestamp,
+        float(data.get("water_temperature") or 0.0),
+        float(data.get("target_temperature") or 0.0),
+        float(power_w),
+        *(1 if data.get(switch) == "on" else 0 for switch in SWITCHES),
+        _small(data.get("bubble_level")),
+        _small(data.get("heat_state")),
+        _small(data.get("temperature_unit")),
+        -1 if online is None else int(bool(online)),
+        0 if data.get("fault", "OK") == "OK" else 1,
+    )
+
+
+def file_name(day: date) -> str:
+    return f"{FILE_PREFIX}{day:%Y%m%d}{FILE_SUFFIX}"
+
+
+class MSpaSampleLog:
+    """Buffer samples and append them to daily files from an executor thread."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._pending = {}  # file name -> bytearray of records not yet written
+        self.samples = 0
+        self.bytes_written = 0
+
+    def add(self, data: dict, power_w: float, timestamp: float | None = None) -> None:
+        """Queue one decoded shadow; cheap enough to call on every update."""
+        timestamp = time.time() if timestamp is None else timestamp
+        day = datetime.fromtimestamp(timestamp, timezone.utc).date()
+        self._pending.setdefault(file_name(day), bytearray()).extend(pack_sample(data, power_w, timestamp))
+        self.samples += 1
+
+    @property
+    def pending(self) -> int:
+        return sum(len(chunk) for chunk in self._pending.values()) // RECORD.size
+
+    async def async_flush(self) -> None:
+        """Append the queued records to their files."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        await asyncio.get_running_loop().run_in_executor(None, self._write, pending)
+
+    def _write(self, pending: dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        for name, chunk in pending.items():
+            path = os.path.join(self.directory, name)
+            with open(path, "ab") as log_file:
+                size = log_file.seek(0, os.SEEK_END)
+                whole = 0 if size < HEADER.size else size - (size - HEADER.size) % RECORD.size
+                if whole != size:
+                    # Left by an interrupted write; appending after it would misalign every later record
+                    _LOGGER.warning("Dropping %d byte(s) of an incomplete write from %s", size - whole, path)
+                    log_file.truncate(whole)
+                if whole == 0:
+                    log_file.write(HEADER.pack(MAGIC, RECORD.size, len(RECORD_FIELDS)))
+                log_file.write(chunk)
+            self.bytes_written += len(chunk)
+        _LOGGER.debug("Wrote %d shadow sample(s) to %s", sum(len(c) for c in pending.values()) // RECORD.size,
+                      ", ".join(pending))
+
+
+def _day(value) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def sample_files(directory: str, start=None, end=None) -> list:
+    """Return the log files for the days from start to end (dates or ISO strings), oldest first."""
+    start, end = _day(start), _day(end)
+    files = []
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX)):
+            continue
+        day = datetime.strptime(name[len(FILE_PREFIX):-len(FILE_SUFFIX)], "%Y%m%d").date()
+        if (start is None or day >= start) and (end is None or day <= end):
+            files.append(os.path.join(directory, name))
+    return files
+
+
+def _map(path: str):
+    """Memory-map a log file and return (mmap, record count), or (None, 0) if empty."""
+    with open(path, "rb") as log_file:
+        size = os.fstat(log_file.fileno()).st_size
+        if size <= HEADER.size:
+            return None, 0
+        mapped = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, record_size, _ = HEADER.unpack_from(mapped)
+    if magic != MAGIC or record_size != RECORD.size:
+        mapped.close()
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} MSpa sample log")
+    return mapped, (size - HEADER.size) // RECORD.size
+
+
+def read_samples(directory: str, start=None, end=None) -> dict:
+    """Return {column: values} for all samples from start to end, oldest first."""
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    parts = []
+    columns = {name: array(code) for name, code in RECORD_FIELDS}
+    for path in sample_files(directory, start, end):
+        mapped, count = _map(path)
+        if not count:
+            continue
+        if np is not None:
+            # Zero-copy view; keeps the map open for as long as it is referenced
+            parts.append(np.frombuffer(mapped, dtype=numpy_dtype(), count=count, offset=HEADER.size))
+            continue
+        with mapped:
+            view = memoryview(mapped)[HEADER.size:HEADER.size + count * RECORD.size]
+            for record in RECORD.iter_unpack(view):
+                for column, value in zip(columns.values(), record):
+                    column.append(value)
+            view.release()
+
+    if np is None:
+        return columns
+    if not parts:
+        records = np.empty(0, dtype=numpy_dtype())
+    else:
+        records = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    return {name: records[name] for name, _ in RECORD_FIELDS}
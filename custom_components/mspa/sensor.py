@@ -1,24 +1,35 @@
 """Sensor platform for MSpa integration."""
 import logging
 from datetime import datetime
-from homeassistant.components.sensor import SensorStateClass, SensorDeviceClass
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass, SensorDeviceClass
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.const import UnitOfPower, UnitOfEnergy
-from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.const import PERCENTAGE, UnitOfPower, UnitOfEnergy, UnitOfTemperature, UnitOfTime
+from homeassistant.core import callback
+from homeassistant.helpers.restore_state import RestoreEntity, RestoredExtraData
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
     DEFAULT_PUMP_POWER,
     DEFAULT_BUBBLE_POWER,
     DEFAULT_HEATER_POWER_PREHEAT,
-    DEFAULT_HEATER_POWER_HEAT
+    DEFAULT_HEATER_POWER_HEAT,
+    ENERGY_STATE_UPDATE_INTERVAL,
+    WRITE_THRESHOLD_TEMPERATURE,
+    WRITE_THRESHOLD_POWER,
+    WRITE_THRESHOLD_PERCENT,
+    WRITE_THRESHOLD_HOURS,
+    WRITE_THRESHOLD_ENERGY,
 )
-from .entity import MSpaSensorEntity, MSpaBinarySensorEntity
+from .energy import component_power
+from .rolling_stats import BUBBLE, FILTER, HEATING, WATER_TEMPERATURE
+from .entity import MSpaBaseEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 SENSOR_TYPES = {
-    "water_temperature": ["Water Temperature", "°C", SensorStateClass.MEASUREMENT, SensorDeviceClass.TEMPERATURE]
+    "water_temperature": ["Water Temperature", UnitOfTemperature.CELSIUS, SensorStateClass.MEASUREMENT, SensorDeviceClass.TEMPERATURE]
 }
 
 DIAGNOSTIC_KEYS = [
@@ -28,6 +39,23 @@ DIAGNOSTIC_KEYS = [
     "warning", "device_heat_perhour"
 ]
 
+# Statistics over the last 24 hours, kept by the coordinator (see rolling_stats.py):
+# key -> [name, unit, device class, write threshold, icon, value from MSpaRollingStats]
+ROLLING_SENSOR_TYPES = {
+    "heater_duty_cycle_24h": ["Heater duty cycle 24h", PERCENTAGE, None, WRITE_THRESHOLD_PERCENT,
+                              "mdi:radiator", lambda stats: stats.duty_cycle(HEATING)],
+    "filter_runtime_24h": ["Filter runtime 24h", UnitOfTime.HOURS, SensorDeviceClass.DURATION, WRITE_THRESHOLD_HOURS,
+                           "mdi:filter", lambda stats: stats.runtime_hours(FILTER)],
+    "bubble_runtime_24h": ["Bubble runtime 24h", UnitOfTime.HOURS, SensorDeviceClass.DURATION, WRITE_THRESHOLD_HOURS,
+                           "mdi:chart-bubble", lambda stats: stats.runtime_hours(BUBBLE)],
+    "energy_24h": ["Energy 24h", UnitOfEnergy.KILO_WATT_HOUR, None, WRITE_THRESHOLD_ENERGY,
+                   "mdi:lightning-bolt", lambda stats: stats.energy_kwh()],
+    "water_temperature_mean_24h": ["Mean water temperature 24h", UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE,
+                                   WRITE_THRESHOLD_TEMPERATURE, "mdi:thermometer", lambda stats: stats.mean(WATER_TEMPERATURE)],
+    "water_temperature_min_24h": ["Minimum water temperature 24h", UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE,
+                                  WRITE_THRESHOLD_TEMPERATURE, "mdi:thermometer-low", lambda stats: stats.minimum_temperature()],
+}
+
 MEASUREMENT_KEYS = {
     "temperature_unit",
     "filter_current",
@@ -54,6 +82,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities([MSpaTotalPowerSensor(coordinator, entry)], update_before_add=True)
     # Energy sensors for Energy dashboard
     async_add_entities([MSpaTotalEnergySensor(coordinator, entry)], update_before_add=True)
+    async_add_entities([MSpaRollingStatSensor(coordinator, key) for key in ROLLING_SENSOR_TYPES])
 
     diagnostic_sensors = [
         MSpaDiagnosticSensor(coordinator, key, f"{key.replace('_', ' ').title()}")
@@ -62,6 +91,13 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities(diagnostic_sensors)
 
 
+class MSpaSensorEntity(MSpaBaseEntity, CoordinatorEntity, SensorEntity):
+    pass
+
+class MSpaBinarySensorEntity(MSpaBaseEntity, CoordinatorEntity, BinarySensorEntity):
+    pass
+
+
 class MSpaSensor(MSpaSensorEntity):
     def __init__(self, coordinator, key):
         super().__init__(coordinator)
@@ -70,12 +106,15 @@ class MSpaSensor(MSpaSensorEntity):
             _LOGGER.error("Unknown sensor key: %s", key)
             return
         self._key = key
+        self.shadow_fields = frozenset({key})
         self._attr_name = SENSOR_TYPES[key][0]
         self._attr_native_unit_of_measurement = SENSOR_TYPES[key][1]
         self._attr_unique_id = f"mspa_{key}_{getattr(coordinator, 'device_id', 'unknown')}"
         self._attr_state_class = SENSOR_TYPES[key][2]
         self._attr_device_class = SENSOR_TYPES[key][3]
         self._attr_device_info = self.device_info
+        if self._attr_device_class == SensorDeviceClass.TEMPERATURE:
+            self._write_thresholds = {"state": WRITE_THRESHOLD_TEMPERATURE}
         # Water temperature is redundant with climate entity - make it diagnostic and disabled by default
         if key == "water_temperature":
             self._attr_entity_category = EntityCategory.DIAGNOSTIC
@@ -83,7 +122,31 @@ class MSpaSensor(MSpaSensorEntity):
 
     @property
     def native_value(self):
-        return self.coordinator._last_data.get(self._key)
+        return self.coordinator.last_data.get(self._key)
+
+class MSpaRollingStatSensor(MSpaSensorEntity):
+    """A statistic over the last 24 hours, updated in O(1) on every poll."""
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator, key):
+        super().__init__(coordinator)
+        name, unit, device_class, threshold, icon, self._value = ROLLING_SENSOR_TYPES[key]
+        self._key = key
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_icon = icon
+        self._attr_unique_id = f"mspa_{key}_{getattr(coordinator, 'device_id', 'unknown')}"
+        self._attr_device_info = self.device_info
+        self._write_thresholds = {"state": threshold}
+        if device_class == SensorDeviceClass.TEMPERATURE:
+            # The shadow is always in Celsius, whatever the tub displays; Home
+            # Assistant converts to Fahrenheit, so round after converting
+            self._attr_suggested_display_precision = 1
+
+    @property
+    def native_value(self):
+        return self._value(self.coordinator.rolling)
 
 # This sensor is used for diagnostic purposes.
 # It retrieves various diagnostic information from the MSpa system.
@@ -110,6 +173,7 @@ class MSpaDiagnosticSensor(MSpaSensorEntity):
 
         self.coordinator = coordinator
         self._key = key
+        self.shadow_fields = frozenset({key})
         self._attr_name = name
         self._attr_unique_id = f"mspa_{key}"
         if key in MEASUREMENT_KEYS:
@@ -137,7 +201,7 @@ class MSpaFaultSensor(MSpaDiagnosticSensor):
 
     @property
     def state(self):
-        return self.coordinator._last_data.get("fault", "OK")
+        return self.coordinator.last_data.get("fault", "OK")
 
     @property
     def icon(self):
@@ -153,11 +217,12 @@ class MSpaFilterSensor(MSpaDiagnosticSensor):
 
     def __init__(self, coordinator):
         super().__init__(coordinator, "filter_status", "Filter status")
+        self.shadow_fields = frozenset({"warning"})
         self._attr_unique_id = f"mspa_filter_status{getattr(coordinator, 'device_id', 'unknown')}"
 
     @property
     def state(self):
-        warning = self.coordinator._last_data.get("warning", "")
+        warning = self.coordinator.last_data.get("warning", "")
         return "Dirty" if warning == "A0" else "OK"
 
     @property
@@ -166,6 +231,7 @@ class MSpaFilterSensor(MSpaDiagnosticSensor):
 
 class MSpaHeaterTimerBinarySensor(MSpaBinarySensorEntity):
     name = "Heater timer"
+    shadow_fields = frozenset({"heat_time_switch"})
 
     def __init__(self, coordinator):
         super().__init__(coordinator)
@@ -174,7 +240,7 @@ class MSpaHeaterTimerBinarySensor(MSpaBinarySensorEntity):
 
     @property
     def is_on(self):
-        return bool(self.coordinator._last_data.get("heat_time_switch", 0))
+        return bool(self.coordinator.last_data.get("heat_time_switch", 0))
 
     @property
     def icon(self):
@@ -182,6 +248,7 @@ class MSpaHeaterTimerBinarySensor(MSpaBinarySensorEntity):
 
 class MSpaHeaterTimerTimeSensor(MSpaSensorEntity):
     name = "Heater timer remaining"
+    shadow_fields = frozenset({"heat_time"})
     _attr_native_unit_of_measurement = "h"
     _attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -192,7 +259,7 @@ class MSpaHeaterTimerTimeSensor(MSpaSensorEntity):
 
     @property
     def native_value(self):
-        return self.coordinator._last_data.get("heat_time", 0)
+        return self.coordinator.last_data.get("heat_time", 0)
 
 class MSpaHeaterPowerSensor(MSpaSensorEntity):
     """Sensor to report current heater power consumption based on heat state and per-device options."""
@@ -201,6 +268,7 @@ class MSpaHeaterPowerSensor(MSpaSensorEntity):
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.POWER
     _attr_suggested_display_precision = 0
+    _write_thresholds = {"state": WRITE_THRESHOLD_POWER}
 
     def __init__(self, coordinator, config_entry):
         super().__init__(coordinator)
@@ -222,8 +290,8 @@ class MSpaHeaterPowerSensor(MSpaSensorEntity):
     @property
     def native_value(self):
         """Return the power consumption based on heat state using per-device options."""
-        heat_state = self.coordinator._last_data.get("heat_state")
-        heater_on = self.coordinator._last_data.get("heater") == "on"
+        heat_state = self.coordinator.last_data.get("heat_state")
+        heater_on = self.coordinator.last_data.get("heater") == "on"
 
         if not heater_on:
             return 0
@@ -253,6 +321,18 @@ class MSpaTotalPowerSensor(MSpaSensorEntity):
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.POWER
     _attr_suggested_display_precision = 0
+    _write_thresholds = {"state": WRITE_THRESHOLD_POWER}
+    # The breakdown follows the state and the configured values only change
+    # with the options; neither is worth a recorder row
+    _unrecorded_attributes = frozenset({
+        "pump_power",
+        "bubble_power",
+        "heater_power",
+        "configured_pump_power",
+        "configured_bubble_power",
+        "configured_heater_preheat_power",
+        "configured_heater_heat_power",
+    })
 
     def __init__(self, coordinator, config_entry):
         super().__init__(coordinator)
@@ -284,19 +364,19 @@ class MSpaTotalPowerSensor(MSpaSensorEntity):
         heater_heat_power = self._get_option_int("heater_power_heat", DEFAULT_HEATER_POWER_HEAT)
         
         # Pump/Filter power - runs when filter is on
-        filter_on = self.coordinator._last_data.get("filter") == "on"
+        filter_on = self.coordinator.last_data.get("filter") == "on"
         if filter_on:
             total_power += pump_power
         
         # Bubble power - runs when bubbles are on
-        bubble_on = self.coordinator._last_data.get("bubble") == "on"
+        bubble_on = self.coordinator.last_data.get("bubble") == "on"
         if bubble_on:
             total_power += bubble_power
         
         # Heater power - based on heat state
-        heater_on = self.coordinator._last_data.get("heater") == "on"
+        heater_on = self.coordinator.last_data.get("heater") == "on"
         if heater_on:
-            heat_state = self.coordinator._last_data.get("heat_state")
+            heat_state = self.coordinator.last_data.get("heat_state")
             if heat_state == 2:  # Preheating
                 total_power += heater_preheat_power
             elif heat_state == 3:  # Active heating
@@ -324,10 +404,10 @@ class MSpaTotalPowerSensor(MSpaSensorEntity):
         heater_preheat_power = self._get_option_int("heater_power_preheat", DEFAULT_HEATER_POWER_PREHEAT)
         heater_heat_power = self._get_option_int("heater_power_heat", DEFAULT_HEATER_POWER_HEAT)
         
-        filter_on = self.coordinator._last_data.get("filter") == "on"
-        bubble_on = self.coordinator._last_data.get("bubble") == "on"
-        heater_on = self.coordinator._last_data.get("heater") == "on"
-        heat_state = self.coordinator._last_data.get("heat_state")
+        filter_on = self.coordinator.last_data.get("filter") == "on"
+        bubble_on = self.coordinator.last_data.get("bubble") == "on"
+        heater_on = self.coordinator.last_data.get("heater") == "on"
+        heat_state = self.coordinator.last_data.get("heat_state")
         
         return {
             "pump_power": pump_power if filter_on else 0,
@@ -341,102 +421,75 @@ class MSpaTotalPowerSensor(MSpaSensorEntity):
 
 
 class MSpaTotalEnergySensor(MSpaSensorEntity, RestoreEntity):
-    """Sensor to track total energy consumption in kWh for Energy dashboard."""
+    """Sensor to track total energy consumption in kWh for Energy dashboard.
+
+    Energy is integrated by the coordinator on every poll and imported hourly
+    as long-term statistics (see energy.py), so this entity only needs to write
+    its state every few minutes rather than on every update.
+    """
     name = "Total Energy"
     _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
     _attr_device_class = SensorDeviceClass.ENERGY
     _attr_suggested_display_precision = 3
+    _unrecorded_attributes = frozenset({"current_power_w", "last_reset"})
 
     def __init__(self, coordinator, config_entry):
         super().__init__(coordinator)
         self._attr_unique_id = f"mspa_total_energy_{getattr(coordinator, 'device_id', 'unknown')}"
         self._attr_device_info = self.device_info
         self._config_entry = config_entry
-        self._total_energy = 0.0  # Total energy in kWh
-        self._last_update_time = None
-        self._last_power = 0
+        self._last_write_time = None
+        self._last_available = None
 
     async def async_added_to_hass(self):
         """Restore previous state when entity is added to hass."""
         await super().async_added_to_hass()
         
-        # Restore the last known energy value
+        # Restore the total and the unfinished hour, added to whatever the
+        # first updates counted already
+        last_extra = await self.async_get_last_extra_data()
+        saved = last_extra.as_dict() if last_extra is not None else None
         last_state = await self.async_get_last_state()
-        if last_state is not None and last_state.state not in (None, "unknown", "unavailable"):
-            try:
-                self._total_energy = float(last_state.state)
-                _LOGGER.debug(f"Restored energy sensor state: {self._total_energy} kWh")
-            except (ValueError, TypeError):
-                _LOGGER.warning(f"Could not restore energy sensor state: {last_state.state}")
-                self._total_energy = 0.0
-        
-        self._last_update_time = datetime.now()
-
-    def _get_option_int(self, key: str, default: int) -> int:
-        """Get an integer option from the config entry."""
-        opts = getattr(self._config_entry, "options", {}) or {}
-        val = opts.get(key, default)
         try:
-            ival = int(val)
-            if ival < 0:
-                raise ValueError
-            return ival
-        except (TypeError, ValueError):
-            return default
+            if saved and saved.get("total_kwh") is not None:
+                # Saved when Home Assistant stopped, so newer than the state
+                self.coordinator.energy.restore(float(saved["total_kwh"]), saved)
+            elif last_state is not None and last_state.state not in (None, "unknown", "unavailable"):
+                self.coordinator.energy.restore(float(last_state.state))
+            _LOGGER.debug(f"Restored energy sensor state: {self.coordinator.energy.total_kwh} kWh")
+        except (ValueError, TypeError):
+            _LOGGER.warning(f"Could not restore energy sensor state: {saved or last_state.state}")
+
+    @property
+    def extra_restore_state_data(self) -> RestoredExtraData:
+        """The running total and unfinished hour, saved for the next start."""
+        return RestoredExtraData(self.coordinator.energy.restore_data())
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state at most every ENERGY_STATE_UPDATE_INTERVAL seconds, or when availability changes."""
+        now = datetime.now()
+        available = self.available
+        if (
+            available == self._last_available
+            and self._last_write_time is not None
+            and (now - self._last_write_time).total_seconds() < ENERGY_STATE_UPDATE_INTERVAL
+        ):
+            self.writes_suppressed += 1
+            return
+        self._last_write_time = now
+        self._last_available = available
+        self.async_write_ha_state()
 
     def _calculate_current_power(self) -> float:
         """Calculate current power consumption in watts."""
-        total_power = 0
-        
-        # Get user-configured power values or use defaults
-        pump_power = self._get_option_int("pump_power", DEFAULT_PUMP_POWER)
-        bubble_power = self._get_option_int("bubble_power", DEFAULT_BUBBLE_POWER)
-        heater_preheat_power = self._get_option_int("heater_power_preheat", DEFAULT_HEATER_POWER_PREHEAT)
-        heater_heat_power = self._get_option_int("heater_power_heat", DEFAULT_HEATER_POWER_HEAT)
-        
-        # Pump/Filter power
-        if self.coordinator._last_data.get("filter") == "on":
-            total_power += pump_power
-        
-        # Bubble power
-        if self.coordinator._last_data.get("bubble") == "on":
-            total_power += bubble_power
-        
-        # Heater power
-        if self.coordinator._last_data.get("heater") == "on":
-            heat_state = self.coordinator._last_data.get("heat_state")
-            if heat_state == 2:  # Preheating
-                total_power += heater_preheat_power
-            elif heat_state == 3:  # Active heating
-                total_power += heater_heat_power
-        
-        return total_power
+        return sum(component_power(self.coordinator.last_data, self._config_entry.options).values())
 
     @property
     def native_value(self):
         """Return the total energy consumption in kWh."""
-        # Calculate energy since last update using trapezoidal rule (average power * time)
-        current_time = datetime.now()
-        current_power = self._calculate_current_power()
-        
-        if self._last_update_time is not None:
-            time_diff_hours = (current_time - self._last_update_time).total_seconds() / 3600
-            # Use average of last and current power (trapezoidal integration)
-            avg_power = (self._last_power + current_power) / 2
-            energy_increment = (avg_power * time_diff_hours) / 1000  # Convert Wh to kWh
-            self._total_energy += energy_increment
-            
-            if energy_increment > 0:
-                _LOGGER.debug(
-                    f"Energy increment: {energy_increment:.6f} kWh "
-                    f"(avg power: {avg_power:.1f}W over {time_diff_hours*3600:.1f}s)"
-                )
-        
-        self._last_update_time = current_time
-        self._last_power = current_power
-        
-        return round(self._total_energy, 3)
+        return round(self.coordinator.energy.total_kwh, 3)
 
     @property
     def icon(self):
@@ -450,4 +503,3 @@ class MSpaTotalEnergySensor(MSpaSensorEntity, RestoreEntity):
             "current_power_w": current_power,
             "last_reset": None,  # Total increasing sensor, never resets
         }
-        
@@ -0,0 +1,188 @@
+"""Decoding of the MSpa thing_shadow into the integration's data keys.
+
+FIELD_DECODERS gives, for each data key entities read, a function decoding
+it from the raw shadow. projection() returns a function decoding a set of
+fields into a dict; transform_shadow() decodes everything. project_shadow()
+decodes only the fields in use (those of enabled entities and the
+coordinator's own logic) and returns an MSpaShadowData, which decodes any
+other field the first time it is read. Anything that walks every field,
+dict() or items() as diagnostics do, still decodes all of them; the update
+cycle itself only reads fields by name.
+
+desired_state() and expected_changes() go the other way, for commands.
+"""
+import functools
+from collections.abc import Mapping
+
+
+def _on_off(shadow_field):
+    return lambda shadow: "on" if shadow.get(shadow_field, 0) else "off"
+
+
+def _raw(shadow_field):
+    return lambda shadow: shadow.get(shadow_field)
+
+
+# Data key -> function decoding that one field from the raw shadow
+FIELD_DECODERS = {
+    "water_temperature": lambda shadow: float(shadow.get("water_temperature", 0)) / 2,
+    "target_temperature": lambda shadow: float(shadow.get("temperature_setting", 0)) / 2,
+    "heater": _on_off("heater_state"),
+    "filter": _on_off("filter_state"),
+    "bubble": _on_off("bubble_state"),
+    "jet": _on_off("jet_state"),
+    "ozone": _on_off("ozone_state"),
+    "uvc": _on_off("uvc_state"),
+    "bubble_level": lambda shadow: shadow.get("bubble_level", 1),
+    "fault": lambda shadow: shadow.get("fault", "") or "OK",
+    # Diagnostic sensors
+    **{key: _raw(key) for key in (
+        "wifivertion", "otastatus", "mcuversion", "ConnectType", "temperature_unit", "auto_inflate",
+        "filter_current", "safety_lock", "heat_time_switch", "heat_state", "multimcuotainfo", "heat_time",
+        "filter_life", "trdversion", "is_online", "warning", "device_heat_perhour",
+    )},
+}
+
+# Fields the coordinator reads on every update whatever entities are enabled:
+# availability, power cycle detection, adaptive polling, energy and the
+# rolling statistics, the sample log and transition events
+CORE_FIELDS = frozenset({
+    "water_temperature", "target_temperature", "heater", "filter", "bubble", "jet", "ozone", "uvc",
+    "bubble_level", "fault", "temperature_unit", "heat_state", "is_online", "ConnectType", "warning",
+})
+
+
+@functools.lru_cache(maxsize=16)
+def projection(fields: frozenset):
+    """Return a function decoding the given fields of a raw shadow into a dict."""
+    decoders = tuple((key, decode) for key, decode in FIELD_DECODERS.items() if key in fields)
+
+    def decode_fields(shadow: dict) -> dict:
+        return {key: decode(shadow) for key, decode in decoders}
+
+    return decode_fields
+
+
+class MSpaShadowData(Mapping):
+    """Read-only decoded view of a raw thing_shadow.
+
+    Behaves like the dict transform_shadow() returns. Fields that were not
+    decoded up front are decoded, once, when first read.
+    """
+
+    __slots__ = ("raw", "_values")
+
+    def __init__(self, raw: dict, values: dict) -> None:
+        self.raw = raw
+        self._values = values
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            value = self._values[key] = FIELD_DECODERS[key](self.raw)
+            return value
+
+    def __contains__(self, key) -> bool:
+        return key in FIELD_DECODERS
+
+    def __iter__(self):
+        return iter(FIELD_DECODERS)
+
+    def __len__(self) -> int:
+        return len(FIELD_DECODERS)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, MSpaShadowData) and self.raw == other.raw:
+            # Undecoded fields of the same raw shadow are equal; compare only
+            # those decoded, or overlaid, on either side
+            return all(self[key] == other[key] for key in self._values.keys() | other._values.keys())
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def overlay(self, values: dict) -> "MSpaShadowData":
+        """Return a view with values replacing the decoded ones, sharing the raw shadow."""
+        return MSpaShadowData(self.raw, {**self._values, **values})
+
+    @property
+    def decoded(self) -> int:
+        """Number of fields decoded so far."""
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"MSpaShadowData({self._values!r}, {len(FIELD_DECODERS) - len(self._values)} not decoded)"
+
+
+def project_shadow(status_data: dict, fields: frozenset = CORE_FIELDS) -> MSpaShadowData:
+    """Decode the given fields of a raw thing_shadow now and the rest on access."""
+    return MSpaShadowData(status_data, projection(fields)(status_data))
+
+
+ALL_FIELDS = frozenset(FIELD_DECODERS)
+_decode_all = projection(ALL_FIELDS)
+
+
+def transform_shadow(status_data: dict) -> dict:
+    """Translate a raw thing_shadow into the keys entities read."""
+    return _decode_all(status_data)
+
+
+def is_device_offline(data: dict) -> bool:
+    """Return True if the shadow reports the tub as powered off or disconnected."""
+    return data.get("is_online", True) is False or data.get("ConnectType", "") == "offline"
+
+
+# mspa.set_state fields that switch a feature, and their shadow fields
+STATE_FIELDS = {
+    "heater": "heater_state",
+    "filter": "filter_state",
+    "bubble": "bubble_state",
+    "jet": "jet_state",
+    "ozone": "ozone_state",
+    "uvc": "uvc_state",
+}
+
+
+def desired_state(fields: dict, bubble_level=1) -> dict:
+    """Translate mspa.set_state fields into the shadow values of one command.
+
+    bubble_level is the current level, sent when the bubbles are switched on
+    without one. Raises ValueError for an invalid value, no field at all, or
+    the heater switched on with the filter off.
+    """
+    desired = {}
+    for field, shadow_field in STATE_FIELDS.items():
+        state = fields.get(field)
+        if state is None:
+            continue
+        state = str(state).lower()
+        if state not in ("on", "off"):
+            raise ValueError(f"{field} must be 'on' or 'off'")
+        desired[shadow_field] = 1 if state == "on" else 0
+    temperature = fields.get("temperature")
+    if temperature is not None:
+        desired["temperature_setting"] = int(round(float(temperature) * 2))
+    if fields.get("bubble_level") is not None:
+        desired["bubble_level"] = int(fields["bubble_level"])
+    elif desired.get("bubble_state"):
+        # The bubble command always carries a level
+        desired["bubble_level"] = bubble_level
+    if not desired:
+        raise ValueError("mspa.set_state needs at least one field to set")
+    if desired.get("heater_state") and desired.get("filter_state") == 0:
+        raise ValueError("The heater cannot run with the filter off")
+    return desired
+
+
+def expected_changes(desired: dict) -> dict:
+    """Translate shadow values into the transformed keys polling waits for."""
+    expected = {}
+    for key, value in desired.items():
+        if key == "temperature_setting":
+            expected["target_temperature"] = value / 2
+        elif key.endswith("_state"):
+            expected[key[:-len("_state")]] = "on" if value else "off"
+        else:
+            expected[key] = value
+    return expected
@@ -0,0 +1,638 @@
+"""Time-accelerated hot tub simulator for the MSpa integration.
+
+Runs the integration's own API client, shadow decoding, polling policy,
+power cycle detector and reconciler against a simulated tub on a virtual
+clock, so weeks of operation take seconds. Use it to compare polling
+policies on staleness against request count, and to measure how well power
+cuts are detected and restored. No Home Assistant is needed:
+
+    python mspa_cli.py simulate --days 14 --policy adaptive --policy fixed:30
+
+With push=True (--push) the cloud also publishes every shadow change
+through a LoopbackBroker, and the client subscribes to it as it would to a
+real push channel.
+
+The simulated tub:
+- heats about 800 l of water with a 2 kW heater against a daily ambient
+  cycle, going through heat_state 2 (preheat), 3 (heating) and 4 (idle)
+- loses power at random; on restore it comes back with everything off, the
+  unit in Fahrenheit and the default set point, like the real device
+- drops its cloud connection at random; physics carry on but the cloud
+  shadow freezes and commands are rejected as offline
+- is only marked offline by the cloud after a heartbeat lag, so short power
+  cuts are visible in the shadow only as a reset
+"""
+import asyncio
+import json
+import logging
+import math
+import random
+import selectors
+import time
+from collections import Counter, deque
+from urllib.parse import urlsplit
+
+from .cassette import CassetteResponse
+from .const import (
+    CONF_ALWAYS_ENFORCE_UNIT,
+    CONF_RESTORE_STATE,
+    CONF_TRACK_TEMPERATURE_UNIT,
+    DEFAULT_SCAN_INTERVAL,
+    SHADOW_CACHE_TTL,
+)
+from .errors import MSpaApiError
+from .mspa_api import MSpaApiClient
+from .polling import MSpaPollingPolicy
+from .push import LoopbackBroker, LoopbackPushChannel
+from .power_cycle import MSpaPowerCycleDetector
+from .reconciler import MSpaStateReconciler
+from .request_scheduler import MSpaRequestPreempted
+from .shadow import expected_changes
+from .update_cycle import async_update_cycle
+
+_LOGGER = logging.getLogger(__name__)
+
+DAY = 86400
+HOUR = 3600
+
+WATER_HEAT_CAPACITY = 4186  # J per litre and kelvin
+PREHEAT_SECONDS = 600  # heat_state 2 before the heater element starts
+REHEAT_HYSTERESIS = 1.0  # °C below the set point at which idle turns to heating
+DEFAULT_SETPOINT = 70  # temperature_setting (half degrees) after a power cut
+PHYSICS_STEP = 30  # Longest integration step in seconds
+COMMAND_APPLY_DELAY = 1.5  # Seconds before an accepted command shows in the shadow
+COMMAND_APPLY_DELAYS = {"heater_state": 5.0, "temperature_unit": 8.0}  # Fields that take longer
+COMMAND_APPLY_JITTER = 0.3  # Relative spread of the apply delay
+POWER_CYCLE_MATCH_WINDOW = HOUR  # Detections later than this after a cut are not credited to it
+PUSH_TOPIC = "mspa/sim-device/shadow"
+TEMPERATURE_UNIT = 0  # The household's Home Assistant is in Celsius
+
+# Config entry options the simulated integration runs with: restore after a
+# power cut, and set Celsius again since the tub comes back in Fahrenheit
+DEFAULT_OPTIONS = {
+    CONF_RESTORE_STATE: True,
+    CONF_TRACK_TEMPERATURE_UNIT: True,
+    CONF_ALWAYS_ENFORCE_UNIT: False,
+}
+
+# Shadow fields whose changes count towards staleness
+OBSERVED_FIELDS = (
+    "heater_state", "filter_state", "bubble_state", "jet_state", "ozone_state", "uvc_state",
+    "temperature_setting", "temperature_unit", "heat_state", "is_online",
+)
+
+FACTORY_STATE = {
+    "heater_state": 0, "filter_state": 0, "bubble_state": 0, "jet_state": 0,
+    "ozone_state": 0, "uvc_state": 0, "bubble_level": 1, "temperature_unit": 1,
+    "temperature_setting": DEFAULT_SETPOINT, "heat_state": 0,
+}
+
+
+class VirtualClock:
+    """Simulated monotonic time in seconds."""
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.now = start
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Selector that skips ahead in virtual time instead of waiting.
+
+    Real file descriptors (the loop's self-pipe) are still polled, so
+    call_soon_threadsafe keeps working; only idle waits become jumps.
+    """
+
+    def __init__(self, clock: VirtualClock) -> None:
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout=None):
+        ready = super().select(0)
+        if ready or timeout == 0:
+            return ready
+        if timeout is None:
+            # Nothing scheduled at all; only another thread can wake us
+            return super().select(None)
+        self._clock.advance(timeout)
+        return []
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Event loop whose time() is a virtual clock that jumps to the next timer."""
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.clock = VirtualClock(start)
+        super().__init__(_VirtualSelector(self.clock))
+
+    def time(self) -> float:
+        return self.clock.now
+
+
+def run_virtual(coro, start: float = 0.0):
+    """Run a coroutine to completion on a fresh virtual-time event loop."""
+    loop = VirtualTimeEventLoop(start)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class SimulatedHotTub:
+    """An MSpa tub and its cloud shadow, advanced lazily to the clock.
+
+    Times are seconds since the start of the simulation, which starts at
+    midnight. Ground truth is kept in power_cuts, connectivity_drops and
+    changes, a log of (time, field, value) for every change of an observed
+    field in the cloud shadow.
+    """
+
+    def __init__(self, seed=None, volume=800, heater_power=2000, loss_rate=0.04,
+                 ambient=12.0, ambient_swing=6.0, power_cut_every=5 * DAY, power_cut_duration=(60, 1800),
+                 drop_every=2 * DAY, drop_duration=(30, 1200), offline_lag=90) -> None:
+        self.rng = random.Random(seed)
+        self.heat_capacity = volume * WATER_HEAT_CAPACITY
+        self.heater_power = heater_power
+        self.loss_rate = loss_rate / HOUR
+        self.ambient_mean = ambient
+        self.ambient_swing = ambient_swing
+        self.power_cut_every = power_cut_every
+        self.power_cut_duration = power_cut_duration
+        self.drop_every = drop_every
+        self.drop_duration = drop_duration
+        self.offline_lag = offline_lag
+
+        self.now = 0.0
+        self.temperature = self.ambient(0)
+        self.state = dict(FACTORY_STATE, temperature_unit=0, temperature_setting=76)
+        self.powered = True
+        self.connected = True
+        self.silent_since = None  # When the device stopped reporting to the cloud
+        self.cloud_online = True
+        self.reported = {}  # Last shadow the device reported to the cloud
+        self.preheat_until = None
+        self._commands = deque()  # (due, desired)
+        self._events = []  # (time, kind, starting), sorted
+        self.power_cuts = []  # (start, end)
+        self.connectivity_drops = []  # (start, end)
+        self.changes = []  # (time, field, value)
+        self.on_change = None  # Called with the changed cloud shadow fields, as a push broker would be
+        self.on_command = None  # Called when a command is queued, so a driver can schedule it
+        self._report()
+        self._published = self.shadow()
+
+    def ambient(self, t: float) -> float:
+        """Air temperature, coldest before dawn and warmest mid-afternoon."""
+        return self.ambient_mean + self.ambient_swing * math.sin(2 * math.pi * (t / DAY - 0.375))
+
+    def plan(self, duration: float) -> None:
+        """Draw random power cuts and connectivity drops over duration seconds."""
+        for kind, every, durations, log in (
+            ("power", self.power_cut_every, self.power_cut_duration, self.power_cuts),
+            ("connection", self.drop_every, self.drop_duration, self.connectivity_drops),
+        ):
+            if not every:
+                continue
+            t = self.rng.expovariate(1 / every)
+            while t < duration:
+                end = t + self.rng.uniform(*durations)
+                log.append((t, end))
+                self._events += [(t, kind, True), (end, kind, False)]
+                t = end + self.rng.expovariate(1 / every)
+        self._events.sort()
+
+    # Cloud side
+
+    def shadow(self) -> dict:
+        """Return the thing_shadow the cloud serves right now."""
+        return {
+            **self.reported,
+            "is_online": self.cloud_online,
+            "ConnectType": "online" if self.cloud_online else "offline",
+        }
+
+    def command(self, desired: dict) -> bool:
+        """Accept a command from the cloud; False if the device cannot be reached."""
+        if not (self.powered and self.connected):
+            return False
+        delay = max(COMMAND_APPLY_DELAYS.get(key, COMMAND_APPLY_DELAY) for key in desired)
+        delay *= 1 + self.rng.uniform(-COMMAND_APPLY_JITTER, COMMAND_APPLY_JITTER)
+        self._commands.append((self.now + delay, desired))
+        if self.on_command is not None:
+            self.on_command()
+        return True
+
+    # Device side
+
+    def advance(self, now: float) -> None:
+        """Run the physics and scheduled events up to now."""
+        while self.now < now:
+            until = min(now, self.now + PHYSICS_STEP, self._next_boundary())
+            self._integrate(until - self.now)
+            self.now = until
+            self._fire_due()
+
+    def next_event(self) -> float:
+        """Return when the shadow may next change without a command."""
+        return min(self._next_boundary(), self.now + PHYSICS_STEP)
+
+    def _next_boundary(self) -> float:
+        candidates = [math.inf]
+        if self._events:
+            candidates.append(self._events[0][0])
+        if self._commands:
+            candidates.append(self._commands[0][0])
+        if self.preheat_until is not None:
+            candidates.append(self.preheat_until)
+        if self.silent_since is not None and self.cloud_online:
+            candidates.append(self.silent_since + self.offline_lag)
+        return max(self.now, min(candidates))
+
+    def _integrate(self, seconds: float) -> None:
+        heating = self.powered and self.state["heat_state"] == 3
+        power = self.heater_power if heating else 0
+        ambient = self.ambient(self.now + seconds / 2)
+        self.temperature += (power / self.heat_capacity - self.loss_rate * (self.temperature - ambient)) * seconds
+
+    def _fire_due(self) -> None:
+        while self._events and self._events[0][0] <= self.now:
+            _, kind, starting = self._events.pop(0)
+            if kind == "power":
+                self.powered = not starting
+                if not starting:
+                    # Back from a power cut with factory settings
+                    self.state.update(FACTORY_STATE)
+                    self.preheat_until = None
+            else:
+                self.connected = not starting
+        while self._commands and self._commands[0][0] <= self.now:
+            _, desired = self._commands.popleft()
+            if self.powered:
+                self._apply(desired)
+        self._thermostat()
+
+        reachable = self.powered and self.connected
+        if not reachable and self.silent_since is None:
+            self.silent_since = self.now
+        elif reachable:
+            self.silent_since = None
+            self.cloud_online = True
+            self._report()
+        if self.silent_since is not None and self.now >= self.silent_since + self.offline_lag:
+            self.cloud_online = False
+        self._publish()
+
+    def _apply(self, desired: dict) -> None:
+        for key, value in desired.items():
+            if key in self.state and key != "heat_state":
+                self.state[key] = value
+        if desired.get("heater_state"):
+            self.state["filter_state"] = 1
+
+    def _thermostat(self) -> None:
+        state = self.state
+        setpoint = state["temperature_setting"] / 2
+        if not state["heater_state"]:
+            state["heat_state"] = 0
+            self.preheat_until = None
+        elif state["heat_state"] in (0, 1):
+            state["heat_state"] = 2
+            self.preheat_until = self.now + PREHEAT_SECONDS
+        elif state["heat_state"] == 2 and self.now >= self.preheat_until:
+            state["heat_state"] = 3
+            self.preheat_until = None
+        if state["heat_state"] == 3 and self.temperature >= setpoint:
+            state["heat_state"] = 4
+        elif state["heat_state"] == 4 and self.temperature <= setpoint - REHEAT_HYSTERESIS:
+            state["heat_state"] = 3
+
+    def _report(self) -> None:
+        self.reported = {
+            **self.state,
+            "water_temperature": int(round(self.temperature * 2)),
+            "fault": "",
+        }
+
+    def _publish(self) -> None:
+        shadow = self.shadow()
+        for field in OBSERVED_FIELDS:
+            if shadow.get(field) != self._published.get(field):
+                self.changes.append((self.now, field, shadow.get(field)))
+        if self.on_change is not None:
+            delta = {key: value for key, value in shadow.items() if self._published.get(key) != value}
+            if delta:
+                self.on_change(delta)
+        self._published = shadow
+
+
+class SimulatorTransport:
+    """API client transport answered by a SimulatedHotTub."""
+
+    def __init__(self, tub: SimulatedHotTub, latency=0.25, jitter=0.1, token_ttl=DAY) -> None:
+        self.tub = tub
+        self.latency = latency
+        self.jitter = jitter
+        self.token_ttl = token_ttl
+        self._token = None
+        self._token_issued = 0.0
+        self._tokens = 0
+        self.requests = Counter()
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        loop = asyncio.get_running_loop()
+        path = urlsplit(url).path
+        self.requests[path] += 1
+        await asyncio.sleep(max(0.02, self.tub.rng.gauss(self.latency, self.jitter)))
+        self.tub.advance(loop.time())
+
+        if path.endswith("/get_token/"):
+            self._tokens += 1
+            self._token, self._token_issued = f"sim-token-{self._tokens}", loop.time()
+            return self._reply({"token": self._token})
+        authorization = (headers or {}).get("authorization", "")
+        if authorization != f"token {self._token}" or loop.time() - self._token_issued > self.token_ttl:
+            return CassetteResponse(200, {"code": 11000, "message": "token expired", "data": None})
+        if path.endswith("/devices/"):
+            return self._reply({"list": [{
+                "device_id": "sim-device", "product_id": "sim-product", "device_alias": "Simulated",
+                "product_series": "SIM", "product_model": "SIM-800", "is_online": self.tub.cloud_online,
+            }]})
+        if path.endswith("/thing_shadow/"):
+            return self._reply(self.tub.shadow())
+        if path.endswith("/command"):
+            desired = _decode_desired(json)
+            if not self.tub.command(desired):
+                return CassetteResponse(200, {"code": 10003, "message": "device offline", "data": None})
+            return self._reply({})
+        return CassetteResponse(404, {"code": 404, "message": "not found", "data": None})
+
+    @staticmethod
+    def _reply(data):
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": data})
+
+
+def _decode_desired(payload: dict) -> dict:
+    return json.loads(payload["desired"])["state"]["desired"]
+
+
+class FixedIntervalPolicy:
+    """Alternative to MSpaPollingPolicy: always poll at the same interval."""
+
+    push_connected = False  # Pushed shadows are ignored; only commands are confirmed by push
+
+    def __init__(self, interval: float = DEFAULT_SCAN_INTERVAL) -> None:
+        self.interval = interval
+
+    def poll_due(self, now: float) -> bool:
+        return True
+
+    def expect_changes(self, expected_changes: dict, now: float, first_poll=None, deadline=None) -> float:
+        return self.interval
+
+    def update(self, data: dict, now: float, polled: bool = True) -> float:
+        return self.interval
+
+
+POLICIES = {
+    "adaptive": lambda _: MSpaPollingPolicy(),
+    "fixed": lambda value: FixedIntervalPolicy(float(value or DEFAULT_SCAN_INTERVAL)),
+}
+
+
+def make_policy(spec: str):
+    """Build a policy from "adaptive" or "fixed:<seconds>"."""
+    name, _, value = spec.partition(":")
+    if name not in POLICIES:
+        raise ValueError(f"Unknown polling policy {spec!r}, expected one of {', '.join(POLICIES)}")
+    return POLICIES[name](value)
+
+
+class StalenessTracker:
+    """Measure how long each change in the cloud shadow took to be seen."""
+
+    def __init__(self, tub: SimulatedHotTub) -> None:
+        self.tub = tub
+        self._seen = 0  # Index into tub.changes
+        self._pending = {}  # field -> (changed at, value)
+        self.delays = []
+        self.missed = 0  # Changed again before it was ever observed
+
+    def observe(self, now: float, shadow: dict) -> None:
+        changes = self.tub.changes
+        for changed_at, field, value in changes[self._seen:]:
+            if field in self._pending:
+                self.missed += 1
+            self._pending[field] = (changed_at, value)
+        self._seen = len(changes)
+        for field, (changed_at, value) in list(self._pending.items()):
+            if shadow.get(field) == value:
+                self.delays.append(now - changed_at)
+                del self._pending[field]
+
+    def summary(self) -> dict:
+        delays = sorted(self.delays)
+        return {
+            "changes": len(delays) + self.missed + len(self._pending),
+            "observed": len(delays),
+            "missed": self.missed,
+            "mean_s": round(sum(delays) / len(delays), 1) if delays else None,
+            "p95_s": round(delays[int(0.95 * (len(delays) - 1))], 1) if delays else None,
+            "max_s": round(delays[-1], 1) if delays else None,
+        }
+
+
+class SimulatedCoordinator:
+    """The coordinator's update cycle, run against a simulated tub.
+
+    Each update runs update_cycle.async_update_cycle, as
+    MSpaUpdateCoordinator._async_update_data does, with options standing in
+    for the config entry's and a household in Celsius. Home Assistant's
+    scheduling is replaced by a loop that waits for the policy's interval or
+    an explicit refresh.
+    """
+
+    def __init__(self, api: MSpaApiClient, policy, tracker: StalenessTracker, options=None) -> None:
+        self.api = api
+        self.policy = policy
+        self.tracker = tracker
+        self.options = DEFAULT_OPTIONS if options is None else options
+        self.power_cycle = MSpaPowerCycleDetector()
+        self.reconciler = MSpaStateReconciler(api)
+        self.interval = float(DEFAULT_SCAN_INTERVAL)
+        self.updates = 0
+        self.failures = Counter()
+        self._last_status = {}
+        self._pushed = None
+        self._wake = asyncio.Event()
+
+    def request_refresh(self) -> None:
+        self._wake.set()
+
+    def on_push(self, status: dict) -> None:
+        self._pushed = status
+        self.request_refresh()
+
+    def on_push_state(self, connected: bool) -> None:
+        if isinstance(self.policy, FixedIntervalPolicy):
+            return
+        self.policy.push_connected = connected
+        if not connected:
+            self._pushed = None
+            self.interval = float(DEFAULT_SCAN_INTERVAL)
+            self.request_refresh()
+
+    async def run(self) -> None:
+        while True:
+            await self.update()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def update(self) -> None:
+        self.updates += 1
+        max_age = min(SHADOW_CACHE_TTL, self.interval / 2)
+        pushed, self._pushed = self._pushed, None
+        try:
+            _, _, self.interval = await async_update_cycle(
+                self.api, self.policy, self.power_cycle, self.reconciler, self.options, TEMPERATURE_UNIT,
+                self._last_status, pushed, max_age, on_data=self._observe,
+            )
+        except (MSpaApiError, MSpaRequestPreempted) as err:
+            self.failures[type(err).__name__] += 1
+
+    async def _observe(self, status: dict, data) -> None:
+        self._last_status = status
+        self.tracker.observe(asyncio.get_running_loop().time(), status)
+
+    async def command(self, desired: dict) -> None:
+        """Send a user command the way the entities do."""
+        self.reconciler.discard_fields(desired)
+        try:
+            await self.api.send_device_command(desired)
+        except MSpaApiError as err:
+            self.failures[type(err).__name__] += 1
+            return
+        self.policy.expect_changes(expected_changes(desired), asyncio.get_running_loop().time())
+        self.request_refresh()
+
+
+async def _user(coordinator: SimulatedCoordinator, rng: random.Random, days: int) -> None:
+    """A household using the tub: heat in the morning, a soak in the evening."""
+    loop = asyncio.get_running_loop()
+
+    async def at(t, desired):
+        await asyncio.sleep(max(0.0, t - loop.time()))
+        await coordinator.command(desired)
+
+    for day in range(days):
+        start = day * DAY
+        await at(start + rng.uniform(6, 10) * HOUR,
+                 {"heater_state": 1, "temperature_setting": rng.choice((74, 76, 78))})
+        soak = start + rng.uniform(19, 21) * HOUR
+        await at(soak, {"bubble_state": 1, "bubble_level": rng.choice((1, 2, 3))})
+        await at(soak + rng.uniform(20, 45) * 60, {"bubble_state": 0})
+        if rng.random() < 0.5:
+            await at(start + 23 * HOUR, {"heater_state": 0})
+
+
+def _score_power_cycles(tub: SimulatedHotTub, detections) -> dict:
+    """Match detections to power cuts; anything unmatched is a false positive."""
+    unmatched = list(tub.power_cuts)
+    delays = []
+    false_positives = Counter()
+    for detected_at, method in detections:
+        cut = next((cut for cut in unmatched if cut[1] <= detected_at <= cut[1] + POWER_CYCLE_MATCH_WINDOW), None)
+        if cut is None:
+            false_positives[method.split(":")[0]] += 1
+            continue
+        unmatched.remove(cut)
+        delays.append(detected_at - cut[1])
+    return {
+        "cuts": len(tub.power_cuts),
+        "detected": len(delays),
+        "missed": len(unmatched),
+        "false_positives": sum(false_positives.values()),
+        "false_positive_methods": dict(false_positives),
+        "mean_delay_s": round(sum(delays) / len(delays), 1) if delays else None,
+        "connectivity_drops": len(tub.connectivity_drops),
+    }
+
+
+async def _drive(tub: SimulatedHotTub) -> None:
+    """Advance the tub as time passes, so it publishes changes nobody polled for."""
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    tub.on_command = wake.set
+    while True:
+        try:
+            await asyncio.wait_for(wake.wait(), max(0.0, tub.next_event() - loop.time()))
+        except TimeoutError:
+            pass
+        wake.clear()
+        tub.advance(loop.time())
+
+
+async def _simulate(policy, days, seed, options, push, tub_options, transport_options):
+    loop = asyncio.get_running_loop()
+    tub = SimulatedHotTub(seed=seed, **tub_options)
+    duration = days * DAY
+    tub.plan(duration)
+    transport = SimulatorTransport(tub, **transport_options)
+    api = MSpaApiClient(None, "simulator@example.invalid", "0" * 32, None, transport=transport, store={})
+    await api.authenticate()
+    await api.async_init()
+
+    coordinator = SimulatedCoordinator(api, policy, StalenessTracker(tub), options)
+    tasks = [
+        asyncio.ensure_future(coordinator.run()),
+        asyncio.ensure_future(_user(coordinator, random.Random(f"{seed}-user"), days)),
+    ]
+    if push:
+        broker = LoopbackBroker()
+        tub.on_change = lambda delta: broker.publish(PUSH_TOPIC, json.dumps({"state": {"reported": delta}}))
+        api.push = LoopbackPushChannel(broker, PUSH_TOPIC)
+        api.start_push(coordinator.on_push, coordinator.on_push_state)
+        tasks.append(asyncio.ensure_future(_drive(tub)))
+    await asyncio.sleep(duration - loop.time())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    push_stats = api.push.as_dict() if api.push is not None else None
+    await api.async_stop_push()
+    tub.advance(loop.time())
+
+    requests = sum(transport.requests.values())
+    return {
+        "policy": type(policy).__name__,
+        "interval": getattr(policy, "interval", None),
+        "days": days,
+        "requests": requests,
+        "requests_per_hour": round(requests / (duration / HOUR), 1),
+        "requests_by_path": dict(transport.requests),
+        "updates": coordinator.updates,
+        "failures": dict(coordinator.failures),
+        "staleness": coordinator.tracker.summary(),
+        "power_cycles": _score_power_cycles(tub, coordinator.power_cycle.detections),
+        "restore_commands": coordinator.reconciler.commands_sent,
+        "push": push_stats,
+        "confirmation": api.confirm_latency.as_dict(),
+    }
+
+
+def simulate(policy=None, days=14, seed=0, options=None, push=False, tub_options=None,
+             transport_options=None) -> dict:
+    """Simulate days of operation with a polling policy and return a report.
+
+    options override DEFAULT_OPTIONS, the config entry options used.
+    """
+    started = time.perf_counter()
+    report = run_virtual(_simulate(
+        policy if policy is not None else MSpaPollingPolicy(), days, seed, {**DEFAULT_OPTIONS, **(options or {})},
+        push, tub_options or {}, transport_options or {},
+    ))
+    report["wall_seconds"] = round(time.perf_counter() - started, 2)
+    return report
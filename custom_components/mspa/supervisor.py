@@ -0,0 +1,164 @@
+"""Task and request supervision for the MSpa integration.
+
+Each config entry has one supervisor. Everything the integration starts
+that can outlive its caller goes through it:
+- background tasks: shared shadow fetches, hedged reads, profiling
+- operations: a command together with its confirmation polls
+- every HTTP call
+
+On unload or reload the supervisor cancels all of them and waits a short
+time. It reports anything that did not stop. After that it refuses new
+work, so code left over from an unloaded entry cannot call the cloud and
+race the entry that replaced it. A semaphore also caps how many HTTP calls,
+and therefore executor threads, the entry has in flight at once.
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import weakref
+
+from .const import HTTP_CONCURRENCY, SHUTDOWN_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Tasks started through any entry's supervisor, so one entry's unload does
+# not report another entry's tasks as untracked
+_SUPERVISED = weakref.WeakSet()
+
+
+class MSpaSupervisorClosed(RuntimeError):
+    """Raised for work started, or cut short, after the supervisor shut down."""
+
+
+class MSpaTaskSupervisor:
+    """Track the integration's tasks and HTTP calls and cancel them on unload."""
+
+    def __init__(self, name: str = "mspa", http_concurrency: int = HTTP_CONCURRENCY) -> None:
+        self.name = name
+        self.closed = False
+        self._tasks = {}  # task -> name
+        self._operations = {}  # token -> (task, name, future resolved when the operation ends)
+        self._http = {}  # token -> (name, start time)
+        self._http_slots = asyncio.Semaphore(http_concurrency)
+        self._cancelled = set()  # Caller tasks whose operation shutdown cancelled
+        self.leaked = []
+        self.stats = {"tasks_started": 0, "operations_started": 0, "http_calls": 0, "cancelled": 0}
+
+    def _check_open(self, name: str) -> None:
+        if self.closed:
+            raise MSpaSupervisorClosed(f"Not starting {name}: the MSpa integration is unloading")
+
+    def create_task(self, coro, name: str) -> asyncio.Task:
+        """Start a background task that is cancelled on unload."""
+        if self.closed:
+            coro.close()
+            self._check_open(name)
+        task = asyncio.get_running_loop().create_task(coro, name=f"{self.name}: {name}")
+        self._tasks[task] = name
+        _SUPERVISED.add(task)
+        self.stats["tasks_started"] += 1
+        task.add_done_callback(self._tasks.pop)
+        return task
+
+    @contextlib.asynccontextmanager
+    async def operation(self, name: str):
+        """Run a block in the caller's task, cancellable on unload.
+
+        If unload cancels it, the caller gets MSpaSupervisorClosed instead of
+        a CancelledError, so an automation or service call that started the
+        command sees an ordinary error rather than being cancelled itself.
+        """
+        self._check_open(name)
+        task = asyncio.current_task()
+        token = object()
+        finished = asyncio.get_running_loop().create_future()
+        self._operations[token] = (task, name, finished)
+        self.stats["operations_started"] += 1
+        try:
+            yield
+        except asyncio.CancelledError:
+            if task not in self._cancelled:
+                raise
+            self._cancelled.discard(task)
+            task.uncancel()
+            raise MSpaSupervisorClosed(f"{name} cancelled: the MSpa integration is unloading") from None
+        finally:
+            del self._operations[token]
+            finished.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def http_call(self, name: str):
+        """Hold one of the entry's HTTP slots for the duration of a request."""
+        self._check_open(name)
+        async with self._http_slots:
+            self._check_open(name)
+            token = object()
+            self._http[token] = (name, asyncio.get_running_loop().time())
+            self.stats["http_calls"] += 1
+            try:
+                yield
+            finally:
+                del self._http[token]
+
+    def oldest_http_call(self, now: float) -> float:
+        """Return how many seconds the longest-running HTTP call has been in flight, or 0."""
+        return max((now - started for _, started in self._http.values()), default=0.0)
+
+    async def async_shutdown(self, timeout: float = SHUTDOWN_TIMEOUT) -> list:
+        """Cancel everything still running and return the names of what did not stop."""
+        if self.closed:
+            return self.leaked
+        self.closed = True
+        current = asyncio.current_task()
+        abandoned = [name for name, _ in self._http.values()]
+
+        waits = {}
+        for task, name in list(self._tasks.items()):
+            if task is not current:
+                task.cancel()
+                waits[task] = name
+        for task, name, finished in list(self._operations.values()):
+            if task is not current and task not in self._cancelled:
+                self._cancelled.add(task)
+                task.cancel()
+            waits[finished] = name
+        self.stats["cancelled"] += len(waits)
+
+        if waits:
+            _, pending = await asyncio.wait(waits, timeout=timeout)
+            self.leaked = sorted(waits[waiter] for waiter in pending)
+        self.leaked += self._untracked_tasks(current)
+        if self.leaked:
+            _LOGGER.warning("MSpa %s: %d task(s) still running after unload: %s",
+                            self.name, len(self.leaked), ", ".join(self.leaked))
+        if abandoned:
+            # The executor threads cannot be interrupted; each ends within its request timeout
+            _LOGGER.debug("MSpa %s: abandoned %d HTTP call(s) in flight: %s",
+                          self.name, len(abandoned), ", ".join(abandoned))
+        _LOGGER.debug("MSpa %s: cancelled %d task(s) and operation(s) on unload", self.name, len(waits))
+        return self.leaked
+
+    def _untracked_tasks(self, current) -> list:
+        """Return running tasks started from this package without the supervisor."""
+        untracked = []
+        for task in asyncio.all_tasks():
+            if task is current or task in _SUPERVISED or task.done():
+                continue
+            code = getattr(task.get_coro(), "cr_code", None)
+            if code is not None and os.path.dirname(code.co_filename) == PACKAGE_DIR:
+                untracked.append(f"untracked {code.co_name}")
+        return untracked
+
+    def as_dict(self) -> dict:
+        """Return what is running now, for diagnostics."""
+        return {
+            "closed": self.closed,
+            "tasks": sorted(self._tasks.values()),
+            "operations": sorted(name for _, name, _ in self._operations.values()),
+            "http_in_flight": sorted(name for name, _ in self._http.values()),
+            "leaked": self.leaked,
+            **self.stats,
+        }
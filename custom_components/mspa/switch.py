@@ -1,13 +1,20 @@
+from typing import TYPE_CHECKING
+
+from homeassistant.components.switch import SwitchEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
 from .const import DOMAIN
-from .entity import MSpaSwitchEntity
-from .coordinator import MSpaUpdateCoordinator
+from .entity import MSpaBaseEntity
 import logging
 
+if TYPE_CHECKING:
+    from .coordinator import MSpaUpdateCoordinator
+
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the MSpa switch entities."""
-    coordinator: MSpaUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator: "MSpaUpdateCoordinator" = hass.data[DOMAIN][entry.entry_id]
     entities = [
         MSpaHeaterSwitch(coordinator),
         MSpaFilterSwitch(coordinator),
@@ -18,6 +25,9 @@ async def async_setup_entry(hass, entry, async_add_entities):
     ]
     async_add_entities(entities, update_before_add=True)
 
+class MSpaSwitchEntity(MSpaBaseEntity, CoordinatorEntity, SwitchEntity):
+    pass
+
 class MSpaFeatureSwitch(MSpaSwitchEntity):
     feature = None
     icon = None
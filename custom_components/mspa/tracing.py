@@ -0,0 +1,115 @@
+"""Lightweight trace spans for the MSpa integration.
+
+Every coordinator update runs inside a trace. Code called from it (the update
+phases, commands, API requests) opens nested spans with span(); outside a
+trace span() does nothing, so the API client can be instrumented without
+knowing who called it. Finished traces are kept in a bounded history shown in
+diagnostics and, optionally, logged as one JSON line each on the
+custom_components.mspa.trace logger.
+"""
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from .const import TRACE_HISTORY
+
+_TRACE_LOGGER = logging.getLogger(f"{__package__}.trace")
+
+_current_span = ContextVar("mspa_current_span", default=None)
+
+
+class Span:
+    """One timed step, with the steps it ran nested inside."""
+
+    __slots__ = ("name", "attrs", "start", "end", "error", "children")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+        self.children = []
+
+    def set(self, **attrs):
+        """Attach attributes known only once the step has run."""
+        self.attrs.update(attrs)
+
+    def as_dict(self, origin):
+        end = self.end if self.end is not None else time.perf_counter()
+        record = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 1),
+            "duration_ms": round((end - self.start) * 1000, 1),
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if self.error:
+            record["error"] = self.error
+        if self.children:
+            record["children"] = [child.as_dict(origin) for child in self.children]
+        return record
+
+
+@contextmanager
+def _activate(current):
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as err:
+        current.error = type(err).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a step as a child of the current span; a no-op outside a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    with _activate(child):
+        yield child
+
+
+class MSpaTracer:
+    """Collect finished traces in a bounded history."""
+
+    def __init__(self, history=TRACE_HISTORY, log_json=False):
+        self.traces = deque(maxlen=history)
+        self.log_json = log_json
+
+    @contextmanager
+    def trace(self, name, **attrs):
+        """Open a root span and record it in the history when it ends."""
+        root = Span(name, attrs)
+        at = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        try:
+            with _activate(root):
+                yield root
+        finally:
+            record = {"at": at, **root.as_dict(root.start)}
+            self.traces.append(record)
+            if self.log_json:
+                _TRACE_LOGGER.info(json.dumps(record, separators=(",", ":"), default=str))
+
+    def phase_summary(self):
+        """Return count, mean and max duration in ms of each top-level phase."""
+        durations = {}
+        for record in self.traces:
+            durations.setdefault(record["name"], []).append(record["duration_ms"])
+            for child in record.get("children", ()):
+                durations.setdefault(f"{record['name']}.{child['name']}", []).append(child["duration_ms"])
+        return {
+            name: {"count": len(values), "mean_ms": round(sum(values) / len(values), 1), "max_ms": max(values)}
+            for name, values in durations.items()
+        }
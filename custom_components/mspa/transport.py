@@ -0,0 +1,57 @@
+"""HTTP transports used by the MSpa API client.
+
+MSpaApiClient never talks to `requests` directly; it hands every call to a
+transport with an async `request()` method returning a requests-style response
+(`status_code`, `text` and `json()`). The default transport runs `requests` in
+an executor thread. Recording, replay and simulated transports plug in at the
+same point.
+
+`requests` is imported by the first request, in its executor thread, so
+loading the integration does not pay for it and the event loop never
+blocks on the import.
+"""
+import asyncio
+import functools
+import logging
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestsTransport:
+    """Send requests with the `requests` library in an executor thread.
+
+    Requests share one Session, so connections to the cloud stay open between
+    polls. reset() drops them, e.g. when a network change left them dead.
+    """
+
+    def __init__(self, hass=None):
+        self.hass = hass
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        call = functools.partial(self._request, method, url, headers=headers, json=json, timeout=timeout)
+        if self.hass is not None:
+            return await self.hass.async_add_executor_job(call)
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+
+    def _request(self, method, url, **kwargs):
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+
+                    self._session = requests.Session()
+                session = self._session
+        return session.request(method, url, **kwargs)
+
+    def reset(self):
+        """Close the pooled connections; later requests open new ones."""
+        session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def close(self):
+        self.reset()
@@ -0,0 +1,110 @@
+"""One coordinator update for the MSpa integration, without Home Assistant.
+
+MSpaUpdateCoordinator._async_update_data and the simulator's
+SimulatedCoordinator both run async_update_cycle, so what the simulator
+measures (requests, power cycle detection, restores) is what ships. Home
+Assistant comes in only through the arguments: the config entry's options,
+the MSpa unit matching Home Assistant's unit system, and hooks for what the
+integration alone does with each shadow (events, optimistic state, energy).
+"""
+import asyncio
+import logging
+
+from .const import CONF_ALWAYS_ENFORCE_UNIT, CONF_RESTORE_STATE, CONF_TRACK_TEMPERATURE_UNIT
+from .errors import MSpaDeviceOfflineError
+from .reconciler import SOURCE_ENFORCE_UNIT, SOURCE_RESTORE, SOURCE_TRACK_UNIT
+from .shadow import CORE_FIELDS, expected_changes, is_device_offline, project_shadow
+from .tracing import span
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_update_cycle(api, polling, power_cycle, reconciler, options, temperature_unit: int,
+                             last_status: dict, pushed: dict | None, max_age: float,
+                             shadow_fields=CORE_FIELDS, on_data=None, on_power_cycle=None):
+    """Fetch or take a pushed shadow, decode it, handle power cycles, reconcile and pick the interval.
+
+    options are the config entry options; temperature_unit is the MSpa unit
+    (0 Celsius, 1 Fahrenheit) the unit options set. on_data(status, data)
+    is awaited with every shadow once decoded; on_power_cycle(method,
+    before) is called on a detection, with the settings before it.
+
+    Returns (raw shadow, decoded shadow, next interval in seconds). Errors
+    fetching the shadow, other than the cloud reporting the tub offline,
+    are raised.
+    """
+    loop = asyncio.get_running_loop()
+    polled = polling.poll_due(loop.time())
+    if pushed is None and not polled:
+        # Changes arrive by push, so the last shadow is still current;
+        # reusing it keeps energy and runtimes sampled between polls
+        pushed = last_status
+    try:
+        if not polled:
+            # Delivered by the push channel; no request needed
+            status = pushed
+        else:
+            with span("fetch", max_age=max_age):
+                status = await api.get_hot_tub_status(max_age=max_age)
+    except MSpaDeviceOfflineError as err:
+        # The cloud answered but has no live shadow; keep the last known
+        # values marked offline so the offline handling below applies
+        _LOGGER.debug("MSpa reported offline by the cloud: %s", err)
+        status = {**last_status, "is_online": False, "ConnectType": "offline"}
+
+    with span("transform", fields=len(shadow_fields)):
+        data = project_shadow(status, shadow_fields)
+        if on_data is not None:
+            await on_data(status, data)
+
+    with span("power_cycle"):
+        before = power_cycle.last_snapshot
+        method = power_cycle.update(data, loop.time())
+        if method:
+            if on_power_cycle is not None:
+                on_power_cycle(method, before)
+            _set_power_cycle_targets(power_cycle, reconciler, options, temperature_unit)
+
+    # Bring the device to any declared targets (restore after a power cut,
+    # temperature unit) with at most one merged command
+    with span("reconcile"):
+        if options.get(CONF_ALWAYS_ENFORCE_UNIT, False):
+            # For devices that forget the unit even without a full power cycle
+            reconciler.set_target(SOURCE_ENFORCE_UNIT, {"temperature_unit": temperature_unit}, persistent=True)
+        else:
+            reconciler.clear_target(SOURCE_ENFORCE_UNIT)
+        if not is_device_offline(status):
+            try:
+                sent = await reconciler.async_reconcile(status)
+            except Exception as err:  # noqa: BLE001 - retried on the next update
+                _LOGGER.error(f"❌ Failed to reconcile MSpa state: {err}")
+                sent = None
+            if sent:
+                # Poll for the confirmation as its learned latency suggests
+                timing = api.confirm_latency.schedule(sent)
+                polling.expect_changes(expected_changes(sent), loop.time(), *timing)
+
+    with span("adaptive_polling"):
+        interval = polling.update(data, loop.time(), polled)
+    return status, data, interval
+
+
+def _set_power_cycle_targets(power_cycle, reconciler, options, temperature_unit: int) -> None:
+    """Declare the unit and restore targets the options ask for after a power cycle."""
+    track_unit = options.get(CONF_TRACK_TEMPERATURE_UNIT, False)
+    restore_enabled = options.get(CONF_RESTORE_STATE, False)
+    _LOGGER.info(f"🔧 Config: track_temperature_unit={track_unit}, restore_state={restore_enabled}")
+
+    # Temperature unit tracking is independent of restore_state
+    if track_unit:
+        unit_name = "Fahrenheit" if temperature_unit == 1 else "Celsius"
+        _LOGGER.info(f"🌡️ MSpa temperature unit target: {unit_name} to match HA system")
+        reconciler.set_target(SOURCE_TRACK_UNIT, {"temperature_unit": temperature_unit})
+
+    if restore_enabled:
+        if power_cycle.saved_state:
+            restore_target = power_cycle.restore_target()
+            _LOGGER.info(f"♻️ Restoring state after power cycle: {restore_target}")
+            reconciler.set_target(SOURCE_RESTORE, restore_target)
+        else:
+            _LOGGER.warning("⚠️ No saved state available for restoration (device may have been off during HA restart)")
@@ -0,0 +1,136 @@
+"""Health watchdog for the MSpa coordinator.
+
+The coordinator reports every update to the watchdog and asks it, every
+WATCHDOG_INTERVAL seconds, whether something is stuck:
+- several updates in a row failed
+- no update succeeded for a few poll intervals (the refresh cycle stalled)
+- an HTTP call or shared status read has been in flight far past its deadline
+
+While a problem lasts it hands out recovery steps of increasing cost, one
+per check: reset the HTTP connections, log in again, then look the device up
+again. The last step is repeated with exponential backoff until the problem
+clears. Detections, steps taken and the time each recovery took are kept
+for diagnostics.
+It has no Home Assistant dependency.
+"""
+import logging
+
+from .const import (
+    WATCHDOG_BACKOFF_MAX,
+    WATCHDOG_FAILURES,
+    WATCHDOG_INTERVAL,
+    WATCHDOG_STALL_INTERVALS,
+    WATCHDOG_STALL_MIN,
+    WATCHDOG_STUCK_REQUEST,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STEP_RESET_CONNECTIONS = "reset_connections"
+STEP_REAUTHENTICATE = "reauthenticate"
+STEP_REDISCOVER = "rediscover"
+RECOVERY_STEPS = (STEP_RESET_CONNECTIONS, STEP_REAUTHENTICATE, STEP_REDISCOVER)
+
+PROBLEM_FAILURES = "failures"
+PROBLEM_STALL = "stall"
+PROBLEM_STUCK_REQUEST = "stuck_request"
+
+
+class MSpaWatchdog:
+    """Detect a stuck coordinator and choose the next recovery step."""
+
+    def __init__(self) -> None:
+        self.consecutive_failures = 0
+        self.last_success = None  # Time of the last successful update
+        self.problem = None  # (kind, description) while recovering
+        self.problem_since = None
+        self._step = 0  # Index into RECOVERY_STEPS of the next step
+        self._next_action = 0.0
+        self._backoff = WATCHDOG_INTERVAL
+        self.last_recovery_s = None
+        self._recovery_total = 0.0
+        self.stats = {
+            "checks": 0,
+            **{f"{kind}_detected": 0 for kind in (PROBLEM_FAILURES, PROBLEM_STALL, PROBLEM_STUCK_REQUEST)},
+            "stale_tokens": 0,
+            **{step: 0 for step in RECOVERY_STEPS},
+            "recovery_errors": 0,
+            "recoveries": 0,
+        }
+
+    def start(self, now: float) -> None:
+        """Begin watching; the stall timer runs from now."""
+        if self.last_success is None:
+            self.last_success = now
+
+    def update_succeeded(self, now: float) -> None:
+        self.consecutive_failures = 0
+        self.last_success = now
+        self._recovered(now)
+
+    def update_failed(self, now: float) -> None:
+        self.consecutive_failures += 1
+
+    def diagnose(self, now: float, interval: float, request_age: float):
+        """Return (kind, description) of what is wrong, or None if healthy."""
+        if self.consecutive_failures >= WATCHDOG_FAILURES:
+            return PROBLEM_FAILURES, f"{self.consecutive_failures} consecutive updates failed"
+        stall = max(WATCHDOG_STALL_MIN, WATCHDOG_STALL_INTERVALS * interval)
+        if self.last_success is not None and now - self.last_success > stall:
+            return PROBLEM_STALL, f"no successful update for {now - self.last_success:.0f}s"
+        if request_age > WATCHDOG_STUCK_REQUEST:
+            return PROBLEM_STUCK_REQUEST, f"a request has been in flight for {request_age:.0f}s"
+        return None
+
+    def check(self, now: float, interval: float, request_age: float) -> str | None:
+        """Return the recovery step to take now, or None.
+
+        interval is the current update interval and request_age how long the
+        oldest request in flight has been running, both in seconds.
+        """
+        self.stats["checks"] += 1
+        problem = self.diagnose(now, interval, request_age)
+        if problem is None:
+            self._recovered(now)
+            return None
+        if self.problem is None or self.problem[0] != problem[0]:
+            self.stats[f"{problem[0]}_detected"] += 1
+            if self.problem is None:
+                self.problem_since = now
+        self.problem = problem
+        if now < self._next_action:
+            return None
+
+        step = RECOVERY_STEPS[min(self._step, len(RECOVERY_STEPS) - 1)]
+        if self._step >= len(RECOVERY_STEPS) - 1:
+            # Every step has been tried; keep re-discovering, less and less often
+            self._next_action = now + self._backoff
+            self._backoff = min(self._backoff * 2, WATCHDOG_BACKOFF_MAX)
+        else:
+            self._next_action = now + WATCHDOG_INTERVAL
+        self._step += 1
+        self.stats[step] += 1
+        return step
+
+    def _recovered(self, now: float) -> None:
+        if self.problem is None:
+            return
+        self.last_recovery_s = now - self.problem_since
+        self._recovery_total += self.last_recovery_s
+        self.stats["recoveries"] += 1
+        _LOGGER.info("MSpa recovered after %.0fs (%s)", self.last_recovery_s, self.problem[1])
+        self.problem = self.problem_since = None
+        self._step = 0
+        self._next_action = 0.0
+        self._backoff = WATCHDOG_INTERVAL
+
+    def as_dict(self) -> dict:
+        recoveries = self.stats["recoveries"]
+        return {
+            "problem": self.problem[1] if self.problem else None,
+            "consecutive_failures": self.consecutive_failures,
+            "next_step": RECOVERY_STEPS[min(self._step, len(RECOVERY_STEPS) - 1)] if self.problem else None,
+            "last_recovery_s": round(self.last_recovery_s, 1) if self.last_recovery_s is not None else None,
+            "mean_recovery_s": round(self._recovery_total / recoveries, 1) if recoveries else None,
+            **self.stats,
+        }
@@ -0,0 +1,39 @@
+"""When an MSpa entity's state is worth writing, without Home Assistant.
+
+MSpaBaseEntity (entity.py) builds a signature of what a write would put in
+the state machine and writes only when it differs significantly from the
+last one written.
+"""
+
+
+def write_signature(available: bool, state, attributes: dict) -> dict:
+    """Return what a state write would show: availability, state and every attribute."""
+    signature = {"available": available}
+    if available:
+        signature["state"] = state
+        signature.update(attributes)
+    return signature
+
+
+def significant_change(last: dict | None, signature: dict, thresholds: dict) -> bool:
+    """Return True if signature should be written after last.
+
+    thresholds maps "state" or an attribute name to the minimum change of
+    its numeric value worth a write. Every other key, and non-numeric values,
+    must be equal for the write to be skipped.
+    """
+    if last is None or signature.keys() != last.keys():
+        return True
+    for key, value in signature.items():
+        previous = last[key]
+        threshold = thresholds.get(key)
+        if (
+            threshold is not None
+            and isinstance(value, (int, float)) and not isinstance(value, bool)
+            and isinstance(previous, (int, float)) and not isinstance(previous, bool)
+        ):
+            if abs(value - previous) >= threshold:
+                return True
+        elif value != previous:
+            return True
+    return False
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Command line client for the MSpa cloud API, without Home Assistant.
+
+Uses the integration's own API client (custom_components/mspa/mspa_api.py),
+so logins, request signing, error handling and the request budget behave
+exactly as they do inside Home Assistant. Only `requests` is needed.
+
+Usage:
+    python mspa_cli.py login
+    python mspa_cli.py devices
+    python mspa_cli.py poll --rate 2 --workers 4 --duration 60
+    python mspa_cli.py command heater_state=1 temperature_setting=76
+    python mspa_cli.py simulate --days 14 --policy adaptive --policy fixed:30
+
+Credentials come from --email/--password or the MSPA_EMAIL and MSPA_PASSWORD
+environment variables. The password is MD5-hashed like the config flow does;
+pass --password-hash if it already is. --base-url points the client at a
+local stand-in server, --cassette replays a recorded session instead.
+`simulate` needs no account: it runs the polling policy against a simulated
+tub on a virtual clock (custom_components/mspa/simulator.py).
+"""
+import argparse
+import asyncio
+import getpass
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+import types
+from collections import Counter
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent / "custom_components" / "mspa"
+PACKAGE = "mspa_client"
+
+
+def load_client_modules():
+    """Import the client modules without the integration's Home Assistant __init__."""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(PACKAGE_DIR)]
+        sys.modules[PACKAGE] = package
+    names = ("mspa_api", "errors", "request_scheduler", "cassette")
+    return types.SimpleNamespace(**{name: importlib.import_module(f"{PACKAGE}.{name}") for name in names})
+
+
+def percentiles(samples):
+    """Return min, p50, p90, p95, p99 and max of latency samples in ms."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def at(fraction):
+        return round(ordered[round(fraction * last)] * 1000, 1)
+
+    return {"min": at(0), "p50": at(0.5), "p90": at(0.9), "p95": at(0.95), "p99": at(0.99), "max": at(1)}
+
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+class Session:
+    """Clients sharing one token and request budget."""
+
+    def __init__(self, args, modules):
+        self.args = args
+        self.modules = modules
+        self.store = {}
+        email = args.email or os.environ.get("MSPA_EMAIL") or input("MSpa account email: ")
+        password = args.password or os.environ.get("MSPA_PASSWORD") or getpass.getpass("MSpa password: ")
+        self.email = email.strip()
+        password = password.strip()
+        self.password = password if args.password_hash else hashlib.md5(password.encode("utf-8")).hexdigest()
+        self.transport = None
+        if args.cassette:
+            self.transport = modules.cassette.ReplayTransport.from_file(args.cassette, time_scale=args.time_scale)
+
+    def client(self):
+        return self.modules.mspa_api.MSpaApiClient(
+            None, self.email, self.password, None,
+            region=self.args.region, transport=self.transport,
+            base_url=self.args.base_url, store=self.store,
+        )
+
+    def set_budget(self, rate, burst):
+        scheduler = self.modules.request_scheduler.MSpaRequestScheduler(rate, burst)
+        self.store["mspa_scheduler"] = scheduler
+        return scheduler
+
+
+async def cmd_login(session, args):
+    client = session.client()
+    started = time.perf_counter()
+    token = await client.authenticate()
+    elapsed = time.perf_counter() - started
+    if not token:
+        print("Login failed: no token returned")
+        return 1
+    print(f"Login OK in {elapsed * 1000:.0f} ms (token length {len(token)}, endpoint {client.base_url})")
+    return 0
+
+
+async def cmd_devices(session, args):
+    client = session.client()
+    await client.authenticate()
+    devices = (await client.get_device_list()).get("list", [])
+    for device in devices:
+        print(f"{device.get('device_alias') or '-'}: {device.get('product_series')} {device.get('product_model')} "
+              f"device_id={device.get('device_id')} product_id={device.get('product_id')} "
+              f"online={device.get('is_online')}")
+    print(f"{len(devices)} device(s)")
+    return 0
+
+
+async def _first_device(session):
+    client = session.client()
+    await client.authenticate()
+    await client.async_init()
+    return client
+
+
+async def cmd_poll(session, args):
+    """Poll the shadow from several workers at a combined target rate."""
+    errors = session.modules.errors
+    first = await _first_device(session)
+    # The shared token bucket paces all workers to the requested rate
+    scheduler = session.set_budget(args.rate, max(1, args.workers))
+
+    samples = []
+    failures = Counter()
+    clients = []
+    stop_at = time.perf_counter() + args.duration
+
+    async def worker():
+        client = session.client()
+        client.device_id, client.product_id = first.device_id, first.product_id
+        clients.append(client)
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                await client.get_hot_tub_status(max_age=0)
+                samples.append(time.perf_counter() - started)
+            except errors.MSpaApiError as err:
+                failures[err.response_class] += 1
+            except Exception as err:  # noqa: BLE001 - counted and reported
+                failures[type(err).__name__] += 1
+
+    print(f"Polling {first.device_id} at {args.rate}/s with {args.workers} worker(s) for {args.duration:.0f} s ...")
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.workers)))
+    elapsed = time.perf_counter() - started
+    replies = sum((Counter(client.response_stats) for client in clients), Counter())
+
+    completed = len(samples)
+    print(f"{completed} successful reads in {elapsed:.1f} s ({completed / elapsed:.2f}/s)")
+    print("Latency ms (including wait for the request budget):", percentiles(samples) or "no samples")
+    print("Replies by class:", dict(replies) or "none")
+    print("Failed reads:", dict(failures) or "none")
+    print("Budget lanes:", scheduler.stats)
+    return 1 if failures and not samples else 0
+
+
+async def cmd_command(session, args):
+    client = await _first_device(session)
+    desired = {}
+    for assignment in args.values:
+        key, _, value = assignment.partition("=")
+        if not value:
+            print(f"Expected field=value, got {assignment!r}")
+            return 2
+        desired[key] = parse_value(value)
+    started = time.perf_counter()
+    response = await client.send_device_command(desired, confirm=not args.no_confirm)
+    elapsed = time.perf_counter() - started
+    print(f"Command {desired} answered {response.get('message')} in {elapsed * 1000:.0f} ms"
+          + ("" if args.no_confirm else " (including confirmation)"))
+    if not args.no_confirm:
+        status = await client.get_hot_tub_status()
+        print("Shadow now:", {key: status.get(key) for key in desired})
+    return 0
+
+
+def cmd_simulate(args):
+    """Compare polling policies against the simulated tub; no account needed."""
+    simulator = importlib.import_module(f"{PACKAGE}.simulator")
+    const = importlib.import_module(f"{PACKAGE}.const")
+    policies = args.policy or ["adaptive"]
+    try:
+        for spec in policies:
+            simulator.make_policy(spec)
+    except ValueError as err:
+        print(err)
+        return 2
+    if not args.json:
+        print(f"Simulating {args.days} day(s), seed {args.seed}" + (", with push updates" if args.push else ""))
+        print(f"{'policy':<12} {'req/h':>7} {'stale mean':>10} {'p95':>7} {'max':>7} {'missed':>6}"
+              f" {'cuts':>5} {'found':>5} {'false+':>6} {'detect':>6} {'wall s':>7}")
+    for spec in policies:
+        report = simulator.simulate(
+            simulator.make_policy(spec), days=args.days, seed=args.seed,
+            options={
+                const.CONF_RESTORE_STATE: not args.no_restore,
+                const.CONF_TRACK_TEMPERATURE_UNIT: not args.no_track_unit,
+                const.CONF_ALWAYS_ENFORCE_UNIT: args.enforce_unit,
+            },
+            push=args.push,
+        )
+        if args.json:
+            print(json.dumps({"spec": spec, **report}))
+            continue
+        staleness, cycles = report["staleness"], report["power_cycles"]
+        print(f"{spec:<12} {report['requests_per_hour']:>7} {staleness['mean_s']!s:>10} {staleness['p95_s']!s:>7}"
+              f" {staleness['max_s']!s:>7} {staleness['missed']:>6} {cycles['cuts']:>5} {cycles['detected']:>5}"
+              f" {cycles['false_positives']:>6} {cycles['mean_delay_s']!s:>6} {report['wall_seconds']:>7}")
+    return 0
+
+
+COMMANDS = {"login": cmd_login, "devices": cmd_devices, "poll": cmd_poll, "command": cmd_command}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="MSpa cloud API client for testing without Home Assistant")
+    parser.add_argument("--email", help="account email (default: $MSPA_EMAIL)")
+    parser.add_argument("--password", help="account password (default: $MSPA_PASSWORD)")
+    parser.add_argument("--password-hash", action="store_true", help="the password is already MD5-hashed")
+    parser.add_argument("--region", default="ROW", choices=["ROW", "US", "CH"])
+    parser.add_argument("--base-url", help="override the API endpoint, e.g. a local stand-in server")
+    parser.add_argument("--cassette", help="replay a recorded session instead of calling the API")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="scale recorded latency when replaying")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log the client's diagnostics")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("login", help="log in and report the token")
+    sub.add_parser("devices", help="list the devices on the account")
+    poll = sub.add_parser("poll", help="poll the shadow and report latency percentiles and errors")
+    poll.add_argument("--rate", type=float, default=1.0, help="combined requests per second")
+    poll.add_argument("--workers", type=int, default=1, help="concurrent workers")
+    poll.add_argument("--duration", type=float, default=30.0, help="seconds to poll for")
+    command = sub.add_parser("command", help="send desired shadow values, e.g. heater_state=1")
+    command.add_argument("values", nargs="+", metavar="field=value")
+    command.add_argument("--no-confirm", action="store_true", help="do not wait for the shadow to confirm")
+    simulate = sub.add_parser("simulate", help="compare polling policies against a simulated tub")
+    simulate.add_argument("--policy", action="append", help="adaptive or fixed:<seconds>; repeat to compare")
+    simulate.add_argument("--days", type=int, default=14, help="simulated days")
+    simulate.add_argument("--seed", type=int, default=0, help="random seed for weather, outages and usage")
+    simulate.add_argument("--no-restore", action="store_true", help="do not restore state after power cuts")
+    simulate.add_argument("--no-track-unit", action="store_true", help="do not set Celsius again after power cuts")
+    simulate.add_argument("--enforce-unit", action="store_true", help="keep the tub in Celsius on every update")
+    simulate.add_argument("--push", action="store_true", help="also publish shadow changes over a loopback push channel")
+    simulate.add_argument("--json", action="store_true", help="print full reports as JSON lines")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    modules = load_client_modules()
+    if args.command == "simulate":
+        return cmd_simulate(args)
+    session = Session(args, modules)
+    try:
+        return asyncio.run(COMMANDS[args.command](session, args))
+    except modules.errors.MSpaApiError as err:
+        print(f"Failed ({err.response_class}): {err}")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
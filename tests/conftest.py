@@ -0,0 +1,16 @@
+"""Test setup: load the integration's Home Assistant-free modules.
+
+The modules are imported as the `mspa_client` package, the way mspa_cli.py
+loads them, so these tests run without Home Assistant installed. Tests that
+need Home Assistant skip themselves when it is missing.
+"""
+import sys
+import types
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "mspa"
+
+if "mspa_client" not in sys.modules:
+    package = types.ModuleType("mspa_client")
+    package.__path__ = [str(PACKAGE_DIR)]
+    sys.modules["mspa_client"] = package
@@ -0,0 +1,255 @@
+"""Tests for MSpaApiClient: token handling, the shadow cache, deadlines and hedging."""
+import asyncio
+
+import pytest
+
+from mspa_client.cassette import CassetteResponse
+from mspa_client.const import EMPTY_REPLIES_BEFORE_REAUTH, HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES
+from mspa_client.errors import MSpaDeviceOfflineError, MSpaTransientError
+from mspa_client.mspa_api import MSpaApiClient
+
+
+class TokenCheckingTransport:
+    """Issues one token and rejects requests without it as a plain failure.
+
+    The rejection carries no token hint, so the client can only succeed by
+    logging in before its first request.
+    """
+
+    def __init__(self):
+        self.paths = []
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        path = url.split("://", 1)[-1].split("/", 1)[-1]
+        self.paths.append("/" + path)
+        if path.endswith("get_token/"):
+            return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": {"token": "fresh"}})
+        if headers.get("authorization") != "token fresh":
+            return CassetteResponse(200, {"code": 10001, "message": "system error", "data": None})
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": {"list": [{"device_id": "d1"}]}})
+
+
+def test_logs_in_before_first_request_without_token():
+    transport = TokenCheckingTransport()
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=transport)
+    assert client.get_former_token() == ""
+
+    devices = asyncio.run(client.get_device_list())
+
+    assert devices == {"list": [{"device_id": "d1"}]}
+    assert transport.paths == ["/api/enduser/get_token/", "/api/enduser/devices/"]
+    assert client.get_former_token() == "fresh"
+
+
+def test_reuses_stored_token():
+    transport = TokenCheckingTransport()
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=transport,
+                           store={"mspa_token": "fresh"})
+
+    asyncio.run(client.get_device_list())
+
+    assert transport.paths == ["/api/enduser/devices/"]
+
+
+class DroppingCloud:
+    """Accepts shadow reads with no data until a login issues a new token.
+
+    With offline=True the shadow stays empty even after logging in, as for a
+    tub that is really not connected.
+    """
+
+    def __init__(self, offline=False):
+        self.offline = offline
+        self.tokens = 0
+        self.paths = []
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        path = "/" + url.split("://", 1)[-1].split("/", 1)[-1]
+        self.paths.append(path)
+        if path == "/api/enduser/get_token/":
+            self.tokens += 1
+            return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": {"token": f"t{self.tokens}"}})
+        empty = self.offline or headers.get("authorization") == "token stale"
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": None if empty else {"is_online": True}})
+
+
+def _read_shadows(client, reads):
+    async def run():
+        results = []
+        for _ in range(reads):
+            client.invalidate_status_cache()
+            try:
+                results.append(await client.get_hot_tub_status())
+            except MSpaDeviceOfflineError:
+                results.append("offline")
+        return results
+
+    return asyncio.run(run())
+
+
+def test_logs_in_once_after_repeated_replies_without_data():
+    cloud = DroppingCloud()
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=cloud,
+                           store={"mspa_token": "stale"})
+
+    results = _read_shadows(client, EMPTY_REPLIES_BEFORE_REAUTH + 1)
+
+    # The cloud dropped the token silently: the third empty reply leads to a login
+    assert results == ["offline"] * (EMPTY_REPLIES_BEFORE_REAUTH - 1) + [{"is_online": True}] * 2
+    assert cloud.tokens == 1
+
+
+def test_offline_tub_costs_one_login_per_outage():
+    cloud = DroppingCloud(offline=True)
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=cloud,
+                           store={"mspa_token": "stale"})
+
+    assert _read_shadows(client, 5) == ["offline"] * 5
+    assert cloud.tokens == 1
+    # Once data comes back, a later outage may log in once again
+    cloud.offline = False
+    _read_shadows(client, 1)
+    cloud.offline = True
+    _read_shadows(client, 5)
+    assert cloud.tokens == 2
+
+
+class SlowLoginCloud:
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        await asyncio.sleep(1)
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": {"token": "late"}})
+
+
+def test_login_past_the_deadline_raises_the_deadline_error():
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=SlowLoginCloud())
+
+    with pytest.raises(MSpaTransientError, match="deadline"):
+        asyncio.run(client._api_request("POST", "/api/device/thing_shadow/", {}, deadline=0.05))
+
+
+class SlowShadowCloud:
+    """Answers shadow reads after a short delay, numbering them."""
+
+    def __init__(self):
+        self.reads = 0
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        self.reads += 1
+        read = self.reads
+        await asyncio.sleep(0.05)
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": {"is_online": True, "read": read}})
+
+
+def test_concurrent_reads_share_one_request():
+    cloud = SlowShadowCloud()
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=cloud,
+                           store={"mspa_token": "t"})
+
+    async def run():
+        shared = await asyncio.gather(*(client.get_hot_tub_status() for _ in range(3)))
+        cached = await client.get_hot_tub_status()
+        fresh = await client.get_hot_tub_status(max_age=0)
+        return shared, cached, fresh
+
+    shared, cached, fresh = asyncio.run(run())
+    assert [status["read"] for status in shared] == [1, 1, 1]
+    assert cached["read"] == 1  # Within the cache's lifetime
+    assert fresh["read"] == 2
+    assert cloud.reads == 2
+
+
+def test_fresh_read_does_not_join_an_older_request():
+    cloud = SlowShadowCloud()
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=cloud,
+                           store={"mspa_token": "t"})
+
+    async def run():
+        early = asyncio.ensure_future(client.get_hot_tub_status())
+        await asyncio.sleep(0.01)
+        # E.g. confirming a command sent after the first request went out
+        fresh = await client.get_hot_tub_status(max_age=0)
+        return await early, fresh
+
+    early, fresh = asyncio.run(run())
+    assert (early["read"], fresh["read"]) == (1, 2)
+
+
+class StallingCloud:
+    """Answers shadow reads, except that the first `stall` of them never reply."""
+
+    def __init__(self, stall=1):
+        self.stall = stall
+        self.reads = 0
+        self.timeouts = []
+        self.cancelled = 0
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        self.reads += 1
+        self.timeouts.append(timeout)
+        if self.reads <= self.stall:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": {"is_online": True}})
+
+
+def test_stuck_request_ends_at_its_deadline():
+    cloud = StallingCloud()
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=cloud,
+                           store={"mspa_token": "t"})
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(MSpaTransientError):
+            await client._api_request("POST", "/api/device/thing_shadow/", {}, deadline=0.2, expect_data=True)
+        return loop.time() - started
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 1
+    # The transport is told how long it has left, and is cancelled when it is up
+    assert cloud.timeouts[0] <= 0.2
+    assert cloud.cancelled == 1
+
+
+def _hedging_client(cloud, hedge_reads):
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=cloud,
+                           store={"mspa_token": "t"}, hedge_reads=hedge_reads)
+    # Enough fast replies for a trusted p95, so the hedge goes out at the minimum delay
+    client._latency["/api/device/thing_shadow/"].extend([0.01] * HEDGE_MIN_SAMPLES)
+    return client
+
+
+def test_slow_read_is_hedged():
+    cloud = StallingCloud()
+    client = _hedging_client(cloud, hedge_reads=True)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        status = await client.get_hot_tub_status(max_age=0)
+        await asyncio.sleep(0)  # Let the losing request see its cancellation
+        return status, loop.time() - started
+
+    status, elapsed = asyncio.run(run())
+    assert status == {"is_online": True}
+    assert HEDGE_MIN_DELAY <= elapsed < 1
+    assert client.hedge_stats == {"sent": 1, "won": 1}
+    assert (cloud.reads, cloud.cancelled) == (2, 1)
+
+
+def test_reads_are_not_hedged_unless_enabled():
+    cloud = StallingCloud()
+    client = _hedging_client(cloud, hedge_reads=False)
+    assert client.hedge_delay("/api/device/thing_shadow/") is None
+
+    async def run():
+        with pytest.raises(MSpaTransientError):
+            await client._api_request("POST", "/api/device/thing_shadow/", {}, deadline=0.5, expect_data=True,
+                                      hedge=True)
+
+    asyncio.run(run())
+    assert cloud.reads == 1
+    assert client.hedge_stats == {"sent": 0, "won": 0}
@@ -0,0 +1,140 @@
+"""Tests for recording and replaying API sessions."""
+import asyncio
+import json
+import time
+
+import pytest
+
+from mspa_client import cassette, mspa_api
+from mspa_client.cassette import (
+    CASSETTE_FORMAT,
+    REDACTED,
+    CassetteError,
+    RecordingTransport,
+    ReplayTransport,
+    _open,
+    load_cassette,
+)
+from mspa_client.mspa_api import MSpaApiClient
+from mspa_client.simulator import SimulatedHotTub, SimulatorTransport
+
+EMAIL = "owner@example.invalid"
+PASSWORD = "5f4dcc3b5aa765d61d8327deb882cf99"
+
+
+def _simulator():
+    tub = SimulatedHotTub(seed=1, power_cut_every=0, drop_every=0)
+    return SimulatorTransport(tub, latency=0.05, jitter=0.0)
+
+
+async def _session(client):
+    """Log in, find the device, read its status, switch the heater on."""
+    transport = getattr(client.transport, "transport", None)
+    if isinstance(transport, SimulatorTransport):
+        # The simulated tub's clock starts at zero
+        transport.tub.advance(asyncio.get_running_loop().time())
+    await client.async_init()
+    status = await client.get_hot_tub_status(max_age=0)
+    await client.send_device_command({"heater_state": 1}, confirm=False)
+    return status
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    recorder = MSpaApiClient(None, EMAIL, PASSWORD, None, transport=_simulator(), record_path=str(path))
+    recorded_status = asyncio.run(_session(recorder))
+    recorder.transport.close()
+
+    header, exchanges = load_cassette(path)
+    assert header["format"] == CASSETTE_FORMAT
+    assert [exchange["path"] for exchange in exchanges] == [
+        "/api/enduser/get_token/", "/api/enduser/devices/", "/api/device/thing_shadow/", "/api/device/command",
+    ]
+    with _open(path, "r") as cassette:
+        text = cassette.read()
+    assert EMAIL not in text and PASSWORD not in text
+    assert exchanges[0]["request"]["account"] == REDACTED
+
+    replay = ReplayTransport(exchanges, time_scale=0)
+    player = MSpaApiClient(None, EMAIL, PASSWORD, None, transport=replay)
+    assert asyncio.run(_session(player)) == recorded_status
+    assert player.device_id == "device_id-1"
+    assert replay.remaining == 0
+
+
+def test_concurrent_exchanges_write_one_header(tmp_path, monkeypatch):
+    path = tmp_path / "concurrent.jsonl.gz"
+
+    def slow_open(*args):
+        # Widen the window in which several writer threads see no open file
+        time.sleep(0.05)
+        return _open(*args)
+
+    monkeypatch.setattr(cassette, "_open", slow_open)
+
+    class Echo:
+        async def request(self, method, url, headers=None, json=None, timeout=None):
+            await asyncio.sleep(0)
+            return SimulatorTransport._reply({"n": json["n"]})
+
+    recorder = RecordingTransport(Echo(), str(path))
+
+    async def record():
+        await asyncio.gather(*(
+            recorder.request("POST", "https://example.invalid/api/echo", json={"n": n}) for n in range(50)
+        ))
+
+    asyncio.run(record())
+    recorder.close()
+
+    with _open(path, "r") as recorded:
+        records = [json.loads(line) for line in recorded]
+    assert sum("format" in record for record in records) == 1
+    assert sorted(record["response"]["data"]["n"] for record in records[1:]) == list(range(50))
+
+
+class DropsFirstShadowRead:
+    """The simulator, except that the first status read fails to connect."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.dropped = False
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        if url.endswith("/thing_shadow/") and not self.dropped:
+            self.dropped = True
+            raise ConnectionError(f"Connection refused for {EMAIL}")
+        return await self.transport.request(method, url, headers=headers, json=json, timeout=timeout)
+
+
+def test_transport_errors_are_recorded_and_replayed(tmp_path, monkeypatch):
+    monkeypatch.setattr(mspa_api, "TRANSIENT_RETRY_DELAY", 0)
+    path = tmp_path / "flaky.jsonl"
+    recorder = MSpaApiClient(None, EMAIL, PASSWORD, None, transport=DropsFirstShadowRead(_simulator()),
+                             record_path=str(path))
+    recorded_status = asyncio.run(_session(recorder))
+    recorder.transport.close()
+
+    _, exchanges = load_cassette(path)
+    failed = [exchange for exchange in exchanges if "error" in exchange]
+    assert [exchange["path"] for exchange in failed] == ["/api/device/thing_shadow/"]
+    assert failed[0]["error"] == {"type": "ConnectionError", "message": f"Connection refused for {REDACTED}",
+                                  "os_error": True}
+    assert "status" not in failed[0]
+
+    # The client sees the same failure on replay and retries it the same way
+    replay = ReplayTransport(exchanges, time_scale=0)
+    player = MSpaApiClient(None, EMAIL, PASSWORD, None, transport=replay)
+    assert asyncio.run(_session(player)) == recorded_status
+    assert replay.remaining == 0
+
+
+@pytest.mark.parametrize("os_error, stand_in", [(True, OSError), (False, CassetteError)])
+def test_unknown_error_classes_replay_as_stand_ins(os_error, stand_in):
+    # A class whose module is not loaded, e.g. from a transport library
+    exchange = {"t": 0, "ms": 0, "method": "POST", "path": "/api/x", "request": None,
+                "error": {"type": "vendor_http.errors.Failure", "message": "boom", "os_error": os_error}}
+    replay = ReplayTransport([exchange], time_scale=0)
+    with pytest.raises(stand_in, match="boom") as raised:
+        asyncio.run(replay.request("POST", "https://example.invalid/api/x"))
+    assert type(raised.value) is stand_in
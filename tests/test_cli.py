@@ -0,0 +1,76 @@
+"""Tests for mspa_cli.py against a local stand-in for the cloud API."""
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import mspa_cli  # noqa: E402
+
+TOKEN = "stand-in-token"
+DEVICE = {"device_id": "d1", "product_id": "p1", "device_alias": "Garden", "product_series": "Oslo",
+          "product_model": "OS-800", "is_online": True}
+SHADOW = {"water_temperature": 70, "temperature_setting": 76, "heater_state": 0, "is_online": True}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def _reply(self, data, code=0, message="SUCCESS"):
+        body = json.dumps({"code": code, "message": message, "data": data}).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        length = int(self.headers.get("content-length") or 0)
+        self.rfile.read(length)
+        if self.path == "/api/enduser/get_token/":
+            return self._reply({"token": TOKEN})
+        if self.headers.get("authorization") != f"token {TOKEN}":
+            return self._reply(None, 11000, "token expired")
+        if self.path == "/api/enduser/devices/":
+            return self._reply({"list": [DEVICE]})
+        if self.path == "/api/device/thing_shadow/":
+            return self._reply(SHADOW)
+        return self._reply(None, 404, "not found")
+
+    do_GET = do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _run(stand_in, *args):
+    return mspa_cli.main(["--email", "user@example.invalid", "--password", "secret", "--base-url", stand_in, *args])
+
+
+def test_devices(stand_in, capsys):
+    assert _run(stand_in, "devices") == 0
+    output = capsys.readouterr().out
+    assert "Garden: Oslo OS-800 device_id=d1" in output
+    assert "1 device(s)" in output
+
+
+def test_poll_reports_reads_within_the_rate(stand_in, capsys):
+    assert _run(stand_in, "poll", "--rate", "20", "--workers", "2", "--duration", "1") == 0
+    output = capsys.readouterr().out
+    reads = int(re.search(r"(\d+) successful reads", output).group(1))
+    # The budget allows a burst of one per worker, then 20 a second
+    assert 5 <= reads <= 23
+    assert "Failed reads: none" in output
+    assert "'ok': " in output
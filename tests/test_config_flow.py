@@ -0,0 +1,92 @@
+"""Tests for the config flow's credential check (needs Home Assistant)."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from mspa_client.cassette import CassetteResponse
+
+pytest.importorskip("homeassistant")
+common = pytest.importorskip("pytest_homeassistant_custom_component.common")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from homeassistant.data_entry_flow import AbortFlow  # noqa: E402
+
+from custom_components.mspa import mspa_api  # noqa: E402
+from custom_components.mspa.config_flow import MSpaConfigFlow  # noqa: E402
+from custom_components.mspa.const import DISCOVERY_DATA  # noqa: E402
+
+USER_INPUT = {"email": "user@example.invalid", "password": "secret", "region": "ROW"}
+
+
+class AccountCloud:
+    """Logs in with code login_code, or raises error, for every request."""
+
+    def __init__(self, login_code=0, error=None):
+        self.login_code = login_code
+        self.error = error
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        if self.error:
+            raise self.error
+        path = "/" + url.split("://", 1)[-1].split("/", 1)[-1]
+        if path == "/api/enduser/get_token/" and self.login_code:
+            return CassetteResponse(200, {"code": self.login_code, "message": "password error", "data": {}})
+        data = {
+            "/api/enduser/get_token/": {"token": "t"},
+            "/api/enduser/devices/": {"list": [{"device_id": "d1", "product_id": "p1"}]},
+        }.get(path, {})
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": data})
+
+
+def _run_flow(monkeypatch, cloud, configured=False):
+    """Submit USER_INPUT against cloud; return the flow result and hass.data keys afterwards."""
+    monkeypatch.setattr(mspa_api, "RequestsTransport", lambda hass=None: cloud)
+    monkeypatch.setattr(mspa_api, "TRANSIENT_RETRY_DELAY", 0)
+
+    async def run():
+        async with common.async_test_home_assistant() as hass:
+            if configured:
+                common.MockConfigEntry(domain="mspa", unique_id="d1", data={}).add_to_hass(hass)
+            keys = set(hass.data)
+            flow = MSpaConfigFlow()
+            flow.hass = hass
+            flow.handler = "mspa"
+            flow.context = {"source": "user"}
+            try:
+                result = await flow.async_step_user(dict(USER_INPUT))
+            except AbortFlow as err:
+                result = {"type": "abort", "reason": err.reason}
+            leaked = {key for key in set(hass.data) - keys if key.startswith("mspa")}
+            await hass.async_stop(force=True)
+        return result, leaked
+
+    return asyncio.run(run())
+
+
+def test_wrong_password_is_invalid_auth(monkeypatch):
+    result, leaked = _run_flow(monkeypatch, AccountCloud(login_code=16019))
+    assert result["errors"] == {"base": "invalid_auth"}
+    assert not leaked
+
+
+def test_unreachable_cloud_is_cannot_connect(monkeypatch):
+    result, leaked = _run_flow(monkeypatch, AccountCloud(error=ConnectionError("no route to host")))
+    assert result["errors"] == {"base": "cannot_connect"}
+    assert not leaked
+
+
+def test_configured_tub_aborts_without_leaking_the_login(monkeypatch):
+    result, leaked = _run_flow(monkeypatch, AccountCloud(), configured=True)
+    assert result == {"type": "abort", "reason": "already_configured"}
+    assert not leaked
+
+
+def test_entry_carries_the_discovery(monkeypatch):
+    result, leaked = _run_flow(monkeypatch, AccountCloud())
+    assert result["data"]["device_id"] == "d1"
+    assert result["data"][DISCOVERY_DATA] == {
+        "token": "t", "device_list": {"list": [{"device_id": "d1", "product_id": "p1"}]},
+    }
+    assert not leaked
@@ -0,0 +1,95 @@
+"""Tests for the energy integration and its hourly buckets."""
+import types
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from mspa_client.energy import MSpaEnergyStatistics
+
+OPTIONS = {"pump_power": 100, "bubble_power": 800, "heater_power_preheat": 1000, "heater_power_heat": 2000}
+OFF = {"filter": "off", "bubble": "off", "heater": "off"}
+PUMP = {**OFF, "filter": "on"}
+HEATING = {**PUMP, "heater": "on", "heat_state": 3}
+HOUR = datetime(2026, 7, 1, 10, tzinfo=timezone.utc)
+
+
+class ImportRecorder(MSpaEnergyStatistics):
+    """Records the hours it would import instead of writing to the recorder."""
+
+    def __init__(self):
+        super().__init__(None, types.SimpleNamespace(options=OPTIONS))
+        self._enabled = True
+        self.imported = []
+
+    def _import_hour(self, start):
+        self.imported.append((start, dict(self._sums)))
+
+
+def _at(minutes):
+    return HOUR + timedelta(minutes=minutes)
+
+
+def test_trapezoidal_integration():
+    energy = ImportRecorder()
+    energy.add_sample(PUMP, _at(0))
+    energy.add_sample(PUMP, _at(6))  # 100 W for 6 minutes
+    assert energy.total_kwh == pytest.approx(0.01)
+    energy.add_sample(HEATING, _at(12))  # The heater came on somewhere in between: 1100 W on average
+    assert energy.total_kwh == pytest.approx(0.01 + 1.1 * 0.1)
+    assert energy._hour_kwh["heater"] == pytest.approx(0.1)
+
+
+def test_long_gaps_are_not_integrated():
+    energy = ImportRecorder()
+    energy.add_sample(HEATING, _at(0))
+    energy.add_sample(HEATING, _at(50))
+    assert energy.total_kwh == 0
+
+
+def test_interval_is_split_at_the_hour():
+    energy = ImportRecorder()
+    energy.add_sample(HEATING, _at(57))
+    energy.add_sample(HEATING, _at(63))  # 2100 W, 3 minutes in each hour
+    assert energy.imported == [(HOUR, {"pump": pytest.approx(0.005), "bubble": 0.0, "heater": pytest.approx(0.1),
+                                       "total": pytest.approx(0.105)})]
+    assert energy._hour_start == _at(60)
+    assert sum(energy._hour_kwh.values()) == pytest.approx(0.105)
+    assert energy.total_kwh == pytest.approx(0.21)
+
+
+def test_restart_keeps_the_unfinished_hour():
+    before = ImportRecorder()
+    for minute in range(0, 31, 6):
+        before.add_sample(PUMP, _at(minute))  # 100 W for 30 minutes
+    saved = before.restore_data()
+
+    # The first refresh after the restart counted energy before the sensor restored
+    after = ImportRecorder()
+    after.add_sample(PUMP, _at(40))
+    after.add_sample(PUMP, _at(46))
+    after.restore(saved["total_kwh"], saved)
+    assert after.total_kwh == pytest.approx(0.05 + 0.01)
+    for minute in (52, 58, 64):
+        after.add_sample(PUMP, _at(minute))
+    assert after.imported == [(HOUR, {"pump": pytest.approx(0.05 + 0.1 * 20 / 60), "bubble": 0.0, "heater": 0.0,
+                                      "total": pytest.approx(0.05 + 0.1 * 20 / 60)})]
+
+
+def test_restart_across_the_hour_imports_the_saved_hour():
+    before = ImportRecorder()
+    for minute in range(0, 31, 6):
+        before.add_sample(PUMP, _at(minute))  # 100 W for 30 minutes
+    saved = before.restore_data()
+
+    after = ImportRecorder()
+    after.add_sample(PUMP, _at(70))
+    after.restore(saved["total_kwh"], saved)
+    assert after.imported == [(HOUR, {"pump": pytest.approx(0.05), "bubble": 0.0, "heater": 0.0,
+                                      "total": pytest.approx(0.05)})]
+    # An hour already in the recorder is not imported again
+    again = ImportRecorder()
+    again._last_imported = HOUR
+    again.add_sample(PUMP, _at(70))
+    again.restore(saved["total_kwh"], saved)
+    assert again.imported == []
+    assert again.total_kwh == pytest.approx(0.05)
@@ -0,0 +1,50 @@
+"""Tests for the classification of API replies."""
+import pytest
+
+from mspa_client.errors import (
+    RESPONSE_AUTH_EXPIRED,
+    RESPONSE_DEVICE_OFFLINE,
+    RESPONSE_FATAL,
+    RESPONSE_OK,
+    RESPONSE_TRANSIENT,
+    classify_exception,
+    classify_response,
+)
+
+SHADOW = {"water_temperature": 70}
+
+
+@pytest.mark.parametrize(("status_code", "body", "expect_data", "expected"), [
+    (200, {"code": 0, "message": "SUCCESS", "data": SHADOW}, True, RESPONSE_OK),
+    (200, {"code": 0, "message": "SUCCESS", "data": None}, False, RESPONSE_OK),
+    (200, {"message": "success", "data": {}}, False, RESPONSE_OK),
+    # Accepted, but nothing where data was expected
+    (200, {"code": 0, "message": "SUCCESS", "data": None}, True, RESPONSE_DEVICE_OFFLINE),
+    (200, {"code": 0, "message": "SUCCESS", "data": {}}, True, RESPONSE_DEVICE_OFFLINE),
+    (200, {"code": 10003, "message": "Device offline", "data": None}, False, RESPONSE_DEVICE_OFFLINE),
+    (200, {"code": 10003, "message": "device is not online"}, True, RESPONSE_DEVICE_OFFLINE),
+    (200, {"code": 11000, "message": "token expired", "data": None}, False, RESPONSE_AUTH_EXPIRED),
+    (200, {"code": 11001, "message": "Unauthorized"}, False, RESPONSE_AUTH_EXPIRED),
+    (401, {"code": 0, "message": "SUCCESS", "data": SHADOW}, True, RESPONSE_AUTH_EXPIRED),
+    (403, None, False, RESPONSE_AUTH_EXPIRED),
+    (429, {"code": 0, "message": "SUCCESS", "data": SHADOW}, True, RESPONSE_TRANSIENT),
+    (502, None, False, RESPONSE_TRANSIENT),
+    (200, None, False, RESPONSE_TRANSIENT),  # Not JSON
+    (200, ["not", "an", "object"], False, RESPONSE_TRANSIENT),
+    (500, {"code": 10001, "message": "system error"}, False, RESPONSE_TRANSIENT),
+    (200, {"code": 10001, "message": "system error"}, False, RESPONSE_FATAL),
+    # A wrong password is fatal even though its message mentions logging in
+    (200, {"code": 16019, "message": "login failed, wrong password"}, True, RESPONSE_FATAL),
+])
+def test_classify_response(status_code, body, expect_data, expected):
+    assert classify_response(status_code, body, expect_data) == expected
+
+
+@pytest.mark.parametrize(("err", "expected"), [
+    (TimeoutError(), RESPONSE_TRANSIENT),
+    (ConnectionResetError(), RESPONSE_TRANSIENT),
+    (OSError("network unreachable"), RESPONSE_TRANSIENT),
+    (ValueError("bad payload"), RESPONSE_FATAL),
+])
+def test_classify_exception(err, expected):
+    assert classify_exception(err) == expected
@@ -0,0 +1,55 @@
+"""Tests for the state transition events."""
+import pytest
+
+from mspa_client.events import (
+    EVENT_FAULT,
+    EVENT_FAULT_CLEARED,
+    EVENT_FILTER_CLEAN,
+    EVENT_FILTER_DIRTY,
+    EVENT_PREHEAT_FINISHED,
+    EVENT_TARGET_TEMPERATURE_REACHED,
+    shadow_transitions,
+)
+
+HEATING = {"is_online": True, "ConnectType": "online", "fault": "OK", "warning": "", "heater": "on",
+           "heat_state": 3, "water_temperature": 37.5, "target_temperature": 38.0}
+
+
+@pytest.mark.parametrize("changes, events", [
+    ({"fault": "E1"}, [(EVENT_FAULT, {"previous": "OK", "new": "E1"})]),
+    ({"warning": "A0"}, [(EVENT_FILTER_DIRTY, {"previous": "", "new": "A0"})]),
+    ({"water_temperature": 38.0},
+     [(EVENT_TARGET_TEMPERATURE_REACHED, {"previous": 37.5, "new": 38.0, "target_temperature": 38.0})]),
+    # Reaching the target with the heater off is not an event
+    ({"water_temperature": 38.0, "heater": "off"}, []),
+    ({"water_temperature": 37.0}, []),
+    ({}, []),
+])
+def test_transitions_from_heating(changes, events):
+    assert shadow_transitions(HEATING, {**HEATING, **changes}) == events
+
+
+def test_cleared_and_changed_faults():
+    faulted = {**HEATING, "fault": "E1", "warning": "A0"}
+    assert shadow_transitions(faulted, HEATING) == [
+        (EVENT_FAULT_CLEARED, {"previous": "E1", "new": "OK"}),
+        (EVENT_FILTER_CLEAN, {"previous": "A0", "new": ""}),
+    ]
+    assert shadow_transitions(faulted, {**faulted, "fault": "E2"}) == [(EVENT_FAULT, {"previous": "E1", "new": "E2"})]
+    # Another warning does not mean the filter was cleaned
+    assert shadow_transitions({**HEATING, "warning": "A1"}, {**HEATING, "warning": "A2"}) == []
+
+
+def test_preheat_finished_only_with_the_heater_on():
+    preheating = {**HEATING, "heat_state": 2}
+    assert shadow_transitions(preheating, HEATING) == [(EVENT_PREHEAT_FINISHED, {"previous": 2, "new": 3})]
+    assert shadow_transitions(preheating, {**HEATING, "heater": "off", "heat_state": 0}) == []
+
+
+@pytest.mark.parametrize("previous, current", [
+    (None, HEATING),
+    ({**HEATING, "is_online": False}, {**HEATING, "fault": "E1"}),
+    (HEATING, {**HEATING, "fault": "E1", "ConnectType": "offline"}),
+])
+def test_nothing_fired_without_a_live_previous_and_current_shadow(previous, current):
+    assert shadow_transitions(previous, current) == []
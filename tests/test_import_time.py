@@ -0,0 +1,33 @@
+"""Tests for the import benchmark (benchmarks/import_time.py)."""
+import importlib.util
+import json
+from pathlib import Path
+
+BENCHMARK = Path(__file__).resolve().parent.parent / "benchmarks" / "import_time.py"
+
+
+def _benchmark():
+    spec = importlib.util.spec_from_file_location("import_time", BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_api_client_imports_without_heavy_dependencies():
+    report, slowest = _benchmark().probe("mspa_api", False, top=3)
+    assert report["ms"] > 0 and report["modules"] > 0
+    # requests loads with the first request, and nothing from Home Assistant at all
+    assert report["heavy"] == []
+    assert report["platforms"] == []
+    assert len(slowest) == 3 and all(line.endswith("ms") for line in slowest)
+
+
+def test_json_report(capsys):
+    benchmark = _benchmark()
+    assert benchmark.main(["--repeat", "1", "--json"]) == 0
+    results = json.loads(capsys.readouterr().out)
+    rows = {row["module"]: row for row in results["imports"]}
+    assert set(rows) == {module or "__init__" for module, _ in benchmark.TARGETS}
+    assert rows["simulator"]["median_ms"] == rows["simulator"]["min_ms"] > 0
+    if not benchmark.have_home_assistant():
+        assert rows["coordinator"] == {"module": "coordinator", "skipped": "homeassistant is not installed"}
@@ -0,0 +1,82 @@
+"""Tests for the learned confirmation latency."""
+import random
+
+import pytest
+
+from mspa_client.const import (
+    CONFIRM_DEADLINE,
+    CONFIRM_DEADLINE_MARGIN,
+    CONFIRM_DEADLINE_MAX,
+    CONFIRM_FIRST_POLL,
+    CONFIRM_MIN_SAMPLES,
+    CONFIRM_OBSERVE_WINDOW,
+)
+from mspa_client.latency_model import MSpaConfirmationModel, P2Quantile
+
+
+def test_p2_is_exact_for_the_first_samples():
+    estimate = P2Quantile(0.5)
+    assert estimate.value is None
+    for value in (5.0, 1.0, 3.0):
+        estimate.add(value)
+    assert estimate.value == 3.0
+
+
+@pytest.mark.parametrize("quantile", [0.1, 0.5, 0.95])
+@pytest.mark.parametrize("draw", [
+    lambda rng: rng.uniform(0, 10),
+    lambda rng: rng.lognormvariate(1, 0.6),  # Long-tailed, like real confirmation latency
+])
+def test_p2_tracks_the_true_quantile(quantile, draw):
+    rng = random.Random(0)
+    samples = [draw(rng) for _ in range(5000)]
+    estimate = P2Quantile(quantile)
+    for value in samples:
+        estimate.add(value)
+    ordered = sorted(samples)
+    exact = ordered[int(quantile * (len(ordered) - 1))]
+    spread = ordered[int(0.99 * (len(ordered) - 1))] - ordered[0]
+    assert estimate.count == len(samples)
+    assert abs(estimate.value - exact) < 0.02 * spread
+
+
+def _learn(model, field, latencies):
+    """Send a command per latency and confirm it that long after the reply, by push."""
+    now = 0.0
+    for latency in latencies:
+        model.command_sent({field: 1}, now)
+        model.observe({field: 1}, now + latency, exact=True)
+        now += 200
+
+
+def test_schedule_uses_defaults_until_learned():
+    model = MSpaConfirmationModel()
+    _learn(model, "heater_state", [8.0] * (CONFIRM_MIN_SAMPLES - 1))
+    assert model.schedule(["heater_state"]) == (CONFIRM_FIRST_POLL, CONFIRM_DEADLINE)
+    _learn(model, "heater_state", [8.0])
+    assert model.schedule(["heater_state"]) == (8.0, 8.0 * CONFIRM_DEADLINE_MARGIN)
+
+
+def test_command_follows_its_slowest_field():
+    model = MSpaConfirmationModel()
+    _learn(model, "bubble_level", [1.5] * 10)
+    _learn(model, "temperature_unit", [50.0] * 10)
+    assert model.schedule(["bubble_level"]) == (1.5, 5)  # Deadline raised to the minimum
+    assert model.schedule(["bubble_level", "temperature_unit"]) == (50.0, CONFIRM_DEADLINE_MAX)
+
+
+def test_polled_confirmation_is_timed_between_polls():
+    model = MSpaConfirmationModel()
+    model.command_sent({"heater_state": 1}, 100.0, shadow={"heater_state": 0})
+    model.observe({"heater_state": 0}, 104.0)
+    model.observe({"heater_state": 1}, 110.0)
+    assert model._fields["heater_state"].median.value == pytest.approx(7.0)
+
+
+def test_unchanged_and_unconfirmed_fields_are_not_timed():
+    model = MSpaConfirmationModel()
+    model.command_sent({"heater_state": 1, "filter_state": 1}, 0.0, shadow={"heater_state": 0, "filter_state": 1})
+    assert model.as_dict()["pending"] == ["heater_state"]
+    model.observe({"heater_state": 0}, CONFIRM_OBSERVE_WINDOW + 1)
+    assert model.unconfirmed == 1
+    assert model.as_dict()["fields"] == {} and model.as_dict()["pending"] == []
@@ -0,0 +1,109 @@
+"""Tests for the coordinator's optimistic state overlay (needs Home Assistant)."""
+import asyncio
+import sys
+from json import loads
+from pathlib import Path
+
+import pytest
+
+from mspa_client.cassette import CassetteResponse
+
+pytest.importorskip("homeassistant")
+common = pytest.importorskip("pytest_homeassistant_custom_component.common")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.mspa import mspa_api  # noqa: E402
+from custom_components.mspa.coordinator import MSpaUpdateCoordinator  # noqa: E402
+
+SHADOW = {"is_online": True, "ConnectType": "online", "temperature_unit": 0, "temperature_setting": 76,
+          "water_temperature": 74, "heater_state": 0, "filter_state": 1, "heat_state": 0}
+
+
+class CommandCloud:
+    """Serves a shadow that only changes when the test changes it; can reject commands."""
+
+    def __init__(self):
+        self.shadow = dict(SHADOW)
+        self.reject_commands = False
+        self.commands = []
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        path = "/" + url.split("://", 1)[-1].split("/", 1)[-1]
+        if path == "/api/device/command":
+            self.commands.append(loads(json["desired"])["state"]["desired"])
+            if self.reject_commands:
+                return CassetteResponse(200, {"code": 12345, "message": "device busy", "data": None})
+        data = {
+            "/api/enduser/get_token/": {"token": "t"},
+            "/api/enduser/devices/": {"list": [{"device_id": "d1", "product_id": "p1"}]},
+            "/api/device/thing_shadow/": dict(self.shadow),
+        }.get(path, {})
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": data})
+
+
+def _with_coordinator(monkeypatch, test):
+    """Run test(coordinator, cloud, shown) after a first update; shown collects the heater each listener call saw."""
+    cloud = CommandCloud()
+    monkeypatch.setattr(mspa_api, "RequestsTransport", lambda hass=None: cloud)
+
+    async def run():
+        async with common.async_test_home_assistant() as hass:
+            entry = common.MockConfigEntry(
+                domain="mspa", title="MSpa", unique_id="d1",
+                data={"account_email": "user@example.invalid", "password": "0" * 32, "region": "ROW"},
+            )
+            entry.add_to_hass(hass)
+            coordinator = MSpaUpdateCoordinator(hass, entry)
+            await coordinator.api.async_init()
+            await coordinator._async_update_data()
+            shown = []
+            coordinator.async_add_listener(lambda: shown.append(coordinator.last_data["heater"]))
+            try:
+                await test(coordinator, cloud, shown)
+            finally:
+                await coordinator.supervisor.async_shutdown()
+                await hass.async_stop(force=True)
+
+    asyncio.run(run())
+
+
+async def _update(coordinator):
+    coordinator.api.invalidate_status_cache()
+    await coordinator._async_update_data()
+
+
+def test_overlay_shown_until_confirmed(monkeypatch):
+    async def test(coordinator, cloud, shown):
+        coordinator._set_optimistic({"heater": "on"}, ["heater_state"])
+        assert shown == ["on"]
+        await _update(coordinator)  # Not confirmed yet, still within its deadline
+        assert coordinator.last_data["heater"] == "on"
+        cloud.shadow["heater_state"] = 1
+        await _update(coordinator)
+        assert coordinator._optimistic == {}
+        assert coordinator.last_data["heater"] == "on"
+
+    _with_coordinator(monkeypatch, test)
+
+
+def test_unconfirmed_overlay_expires(monkeypatch):
+    async def test(coordinator, cloud, shown):
+        coordinator._set_optimistic({"heater": "on"}, ["heater_state"])
+        value, _, timeout = coordinator._optimistic["heater"]
+        coordinator._optimistic["heater"] = (value, coordinator.hass.loop.time() - 1, timeout)
+        await _update(coordinator)
+        assert coordinator.last_data["heater"] == "off"
+
+    _with_coordinator(monkeypatch, test)
+
+
+def test_rejected_command_rolls_back_at_once(monkeypatch):
+    async def test(coordinator, cloud, shown):
+        cloud.reject_commands = True
+        with pytest.raises(Exception):
+            await coordinator.set_feature_state("heater", "on")
+        assert cloud.commands and cloud.commands[-1]["heater_state"] == 1
+        assert shown == ["on", "off"]
+        assert coordinator.last_data["heater"] == "off"
+
+    _with_coordinator(monkeypatch, test)
@@ -0,0 +1,52 @@
+"""Tests for the adaptive polling policy."""
+from mspa_client.const import (
+    DEFAULT_SCAN_INTERVAL,
+    ENERGY_MAX_SAMPLE_GAP,
+    OFFLINE_BURST_DURATION,
+    OFFLINE_BURST_INTERVAL,
+    OFFLINE_SCAN_INTERVAL,
+    PUSH_CONSISTENCY_INTERVAL,
+    RAPID_SCAN_INTERVAL,
+)
+from mspa_client.polling import MSpaPollingPolicy
+
+ONLINE = {"is_online": True, "heater": "off", "filter": "on", "heat_state": 0}
+OFFLINE = {**ONLINE, "is_online": False}
+
+
+def test_push_keeps_updates_within_the_energy_sample_gap():
+    policy = MSpaPollingPolicy()
+    policy.push_connected = True
+    now = 0.0
+    interval = policy.update(ONLINE, now, polled=True)
+    polls = 0
+    while now < 2 * PUSH_CONSISTENCY_INTERVAL:
+        assert interval < ENERGY_MAX_SAMPLE_GAP
+        now += interval
+        polled = policy.poll_due(now)
+        polls += polled
+        interval = policy.update(ONLINE, now, polled=polled)
+    # Only the consistency polls fetch; the updates between reuse the pushed shadow
+    assert polls == 2
+
+
+def test_offline_polls_quickly_at_first_then_at_the_heartbeat():
+    policy = MSpaPollingPolicy()
+    policy.update(ONLINE, 0.0)
+    policy.expect_changes({"heater": "on"}, 0.0)
+
+    now = 10.0
+    intervals = []
+    while now < 10.0 + 2 * OFFLINE_BURST_DURATION:
+        intervals.append(policy.update(OFFLINE, now))
+        now += intervals[-1]
+    # Pending changes cannot show up while offline, so no rapid polling
+    assert policy.pending_changes == {}
+    assert RAPID_SCAN_INTERVAL not in intervals
+    burst = OFFLINE_BURST_DURATION // OFFLINE_BURST_INTERVAL
+    assert intervals[:burst] == [OFFLINE_BURST_INTERVAL] * burst
+    assert set(intervals[burst:]) == {OFFLINE_SCAN_INTERVAL}
+
+    # Back to normal on the first online shadow, and a new outage starts a new burst
+    assert policy.update(ONLINE, now) == DEFAULT_SCAN_INTERVAL
+    assert policy.update({**ONLINE, "ConnectType": "offline"}, now + 60) == OFFLINE_BURST_INTERVAL
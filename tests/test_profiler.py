@@ -0,0 +1,71 @@
+"""Tests for the mspa.profile service's profiler."""
+import asyncio
+import re
+import threading
+import tracemalloc
+import types
+
+from mspa_client import profiler
+from mspa_client.shadow import transform_shadow
+
+SHADOW = {"water_temperature": 70, "temperature_setting": 76, "heater_state": 1, "is_online": True}
+
+
+class ProfileHass:
+    """The two things async_profile uses from Home Assistant."""
+
+    def __init__(self, config_dir):
+        self.config = types.SimpleNamespace(path=lambda name: str(config_dir / name))
+        self.executor_threads = set()  # Threads that ran executor jobs
+
+    async def async_add_executor_job(self, target, *args):
+        def run():
+            self.executor_threads.add(threading.get_ident())
+            return target(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+
+
+async def _busy(until):
+    """Integration code running on the loop while it is profiled."""
+    decoded = []
+    while asyncio.get_running_loop().time() < until:
+        decoded.append(transform_shadow(SHADOW))
+        await asyncio.sleep(0)
+    return decoded
+
+
+def test_profile_writes_integration_summary(tmp_path, monkeypatch):
+    hass = ProfileHass(tmp_path)
+    snapshot_threads = []
+    take_snapshot = tracemalloc.take_snapshot
+
+    def recording_snapshot():
+        snapshot_threads.append(threading.get_ident())
+        return take_snapshot()
+
+    monkeypatch.setattr(tracemalloc, "take_snapshot", recording_snapshot)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        busy = asyncio.ensure_future(_busy(loop.time() + 0.3))
+        summary_path, second = await asyncio.gather(
+            profiler.async_profile(hass, 0.3, top=5),
+            profiler.async_profile(hass, 0.3, top=5),
+        )
+        await busy
+        return summary_path, second
+
+    summary_path, second = asyncio.run(run())
+
+    assert second is None  # Only one profile at a time
+    summary = open(summary_path, encoding="utf-8").read()
+    assert summary.startswith("MSpa profile: 0 s window")
+    assert "transform_shadow" in summary
+    top_functions = summary.split("Top 5 integration functions by cumulative time:")[1].split("Top 5 allocation")[0]
+    listed = [line for line in top_functions.splitlines() if re.match(r"\s*[\d/]+\s+\d+\.\d+", line)]
+    assert listed and all(profiler.PACKAGE_DIR in line for line in listed)
+    assert "shadow.py" in summary.split("allocation sites")[1]
+    assert len(list(tmp_path.glob("mspa_profile_*.prof"))) == 1
+    # Tracing is stopped again, and snapshots were taken off the event loop
+    assert not tracemalloc.is_tracing()
+    assert snapshot_threads and set(snapshot_threads) <= hass.executor_threads
@@ -0,0 +1,106 @@
+"""Tests for merging pushed shadow deltas, against the loopback broker."""
+import asyncio
+import json
+import types
+
+from mspa_client.cassette import CassetteResponse
+from mspa_client.mspa_api import MSpaApiClient
+from mspa_client.polling import MSpaPollingPolicy
+from mspa_client.push import LoopbackBroker, LoopbackPushChannel
+from mspa_client.simulator import SimulatedCoordinator, StalenessTracker
+
+TOPIC = "mspa/d1/shadow"
+SHADOW = {"water_temperature": 70, "temperature_setting": 76, "heater_state": 0, "filter_state": 1,
+          "bubble_state": 0, "is_online": True}
+
+
+class StaticCloud:
+    """Answers every request; the shadow only changes when a test changes it."""
+
+    def __init__(self):
+        self.shadow = dict(SHADOW)
+        self.paths = []
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        path = "/" + url.split("://", 1)[-1].split("/", 1)[-1]
+        self.paths.append(path)
+        data = {
+            "/api/enduser/get_token/": {"token": "t"},
+            "/api/enduser/devices/": {"list": [{"device_id": "d1", "product_id": "p1"}]},
+            "/api/device/thing_shadow/": dict(self.shadow),
+        }.get(path, {})
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": data})
+
+
+def _publish(broker, delta):
+    broker.publish(TOPIC, json.dumps({"state": {"reported": delta}}))
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _connected_client():
+    cloud = StaticCloud()
+    api = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=cloud)
+    await api.async_init()
+    broker = LoopbackBroker()
+    api.push = LoopbackPushChannel(broker, TOPIC)
+    return cloud, api, broker
+
+
+def test_delta_merges_into_cached_shadow_and_confirms_commands():
+    async def run():
+        cloud, api, broker = await _connected_client()
+        updates = []
+        api.start_push(updates.append)
+        await _settle()
+        assert api.push_connected
+
+        # Before a full shadow is known a delta is not applied
+        _publish(broker, {"heater_state": 1})
+        await _settle()
+        assert updates == []
+
+        await api.get_hot_tub_status(max_age=0)
+        _publish(broker, {"heater_state": 1})
+        await _settle()
+        assert updates[-1] == {**SHADOW, "heater_state": 1}
+        reads = cloud.paths.count("/api/device/thing_shadow/")
+        assert (await api.get_hot_tub_status())["heater_state"] == 1
+        assert cloud.paths.count("/api/device/thing_shadow/") == reads
+
+        # A command is confirmed by the pushed change, without polling
+        command = asyncio.ensure_future(api.send_device_command({"bubble_state": 1}))
+        await _settle()
+        _publish(broker, {"bubble_state": 1})
+        await asyncio.wait_for(command, 1)
+        assert cloud.paths.count("/api/device/thing_shadow/") == reads
+        await api.async_stop_push()
+
+    asyncio.run(run())
+
+
+def test_coordinator_update_uses_pushed_shadow():
+    async def run():
+        cloud, api, broker = await _connected_client()
+        policy = MSpaPollingPolicy()
+        coordinator = SimulatedCoordinator(api, policy, StalenessTracker(types.SimpleNamespace(changes=[])))
+        api.start_push(coordinator.on_push, coordinator.on_push_state)
+        await _settle()
+        assert policy.push_connected
+
+        await coordinator.update()  # The first update polls
+        reads = cloud.paths.count("/api/device/thing_shadow/")
+        _publish(broker, {"heater_state": 1, "water_temperature": 72})
+        await _settle()
+        await coordinator.update()
+
+        assert cloud.paths.count("/api/device/thing_shadow/") == reads
+        assert coordinator._last_status == {**SHADOW, "heater_state": 1, "water_temperature": 72}
+        # Between consistency polls the coordinator still updates, from the last pushed shadow
+        assert coordinator.interval <= 300
+        await api.async_stop_push()
+
+    asyncio.run(run())
@@ -0,0 +1,30 @@
+"""Tests for the desired-state reconciler."""
+import asyncio
+
+from mspa_client.reconciler import SOURCE_RESTORE, SOURCE_TRACK_UNIT, MSpaStateReconciler
+
+
+class CommandRecorder:
+    def __init__(self):
+        self.commands = []
+
+    async def send_device_command(self, desired, priority=None, confirm=True):
+        self.commands.append(dict(desired))
+
+
+def test_unit_is_sent_before_the_temperature():
+    async def run():
+        api = CommandRecorder()
+        reconciler = MSpaStateReconciler(api)
+        reconciler.set_target(SOURCE_TRACK_UNIT, {"temperature_unit": 0})
+        reconciler.set_target(SOURCE_RESTORE, {"temperature_setting": 76, "heater_state": 1})
+        status = {"temperature_unit": 1, "temperature_setting": 70, "heater_state": 0}
+
+        assert await reconciler.async_reconcile(status) == {"temperature_unit": 0}
+        # Nothing more until the shadow shows the unit
+        assert await reconciler.async_reconcile(status) is None
+        status["temperature_unit"] = 0
+        assert await reconciler.async_reconcile(status) == {"temperature_setting": 76, "heater_state": 1}
+        assert api.commands == [{"temperature_unit": 0}, {"temperature_setting": 76, "heater_state": 1}]
+
+    asyncio.run(run())
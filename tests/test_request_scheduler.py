@@ -0,0 +1,35 @@
+"""Tests for the request budget's pre-emption of background requests."""
+import asyncio
+
+import pytest
+
+from mspa_client.request_scheduler import (
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+    MSpaRequestPreempted,
+    MSpaRequestScheduler,
+)
+
+
+async def _hold_slot(scheduler, release, preemptible):
+    async with scheduler.slot(PRIORITY_POLL, preemptible=preemptible):
+        await release.wait()
+    return "done"
+
+
+def test_user_command_preempts_only_reads():
+    async def run():
+        scheduler = MSpaRequestScheduler(rate=10, burst=10)
+        release = asyncio.Event()
+        read = asyncio.create_task(_hold_slot(scheduler, release, preemptible=True))
+        login = asyncio.create_task(_hold_slot(scheduler, release, preemptible=False))
+        await asyncio.sleep(0)
+
+        await scheduler.acquire(PRIORITY_COMMAND)
+        release.set()
+        with pytest.raises(MSpaRequestPreempted):
+            await read
+        assert await login == "done"
+        assert scheduler.stats["poll"]["preempted"] == 1
+
+    asyncio.run(run())
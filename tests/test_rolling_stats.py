@@ -0,0 +1,49 @@
+"""Tests for the rolling 24-hour statistics."""
+from mspa_client.rolling_stats import FILTER, HEATING, MSpaRollingStats
+
+DAY = 86400
+
+
+def _shadow(temperature=30.0, heating=False):
+    return {
+        "is_online": True,
+        "filter": "on",
+        "heater": "on" if heating else "off",
+        "heat_state": 3 if heating else 0,
+        "water_temperature": temperature,
+    }
+
+
+def test_rapid_polling_still_covers_the_window():
+    stats = MSpaRollingStats()
+    now = 0.0
+    while now <= DAY + 3600:
+        # Heating for the first quarter of every hour, polled every second
+        stats.add_sample(_shadow(heating=now % 3600 < 900), 0.0, now)
+        now += 1.0
+
+    assert stats.covered() == DAY
+    assert stats.as_dict()["segments"] < stats.capacity
+    assert stats.runtime_hours(FILTER) == 24.0
+    assert stats.duty_cycle(HEATING) == 25.0
+
+
+def test_minimum_keeps_short_dips_within_a_segment():
+    stats = MSpaRollingStats()
+    for second, temperature in enumerate([30.0, 29.5, 28.0, 29.5, 30.0, 30.0]):
+        stats.add_sample(_shadow(temperature), 0.0, float(second))
+
+    assert stats.as_dict()["segments"] == 1
+    assert stats.minimum_temperature() == 28.0
+    assert stats.mean() == 29.4
+
+
+def test_sample_without_water_temperature_is_skipped():
+    stats = MSpaRollingStats()
+    stats.add_sample(_shadow(30.0), 0.0, 0.0)
+    stats.add_sample({**_shadow(), "water_temperature": None}, 0.0, 30.0)
+    stats.add_sample(_shadow(31.0), 0.0, 60.0)
+    stats.add_sample(_shadow(31.0), 0.0, 120.0)
+
+    assert stats.minimum_temperature() == 30.0
+    assert stats.covered() == 120.0
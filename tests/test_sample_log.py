@@ -0,0 +1,38 @@
+"""Tests for the binary shadow sample log."""
+import asyncio
+
+from mspa_client.sample_log import HEADER, MSpaSampleLog, read_samples
+
+DAY_START = 1748736000.0  # 2025-06-01T00:00:00Z
+SHADOW = {"is_online": True, "water_temperature": 30.0, "heater": "on", "heat_state": 3}
+
+
+def _log(sample_log, times):
+    for timestamp in times:
+        sample_log.add(SHADOW, 2000.0, timestamp)
+    asyncio.run(sample_log.async_flush())
+
+
+def test_write_after_torn_record_stays_aligned(tmp_path):
+    sample_log = MSpaSampleLog(str(tmp_path))
+    _log(sample_log, [DAY_START, DAY_START + 60, DAY_START + 120])
+    path = tmp_path / "samples_20250601.bin"
+    with open(path, "ab") as log_file:
+        log_file.write(b"\x01" * 10)  # A record cut off mid-write
+
+    _log(sample_log, [DAY_START + 180, DAY_START + 240])
+
+    columns = read_samples(str(tmp_path))
+    assert list(columns["time"]) == [DAY_START + 60 * minute for minute in range(5)]
+    assert set(columns["heat_state"]) == {3}
+
+
+def test_write_after_torn_header_starts_the_file_again(tmp_path):
+    sample_log = MSpaSampleLog(str(tmp_path))
+    path = tmp_path / "samples_20250601.bin"
+    path.write_bytes(b"MSPA")  # Header cut off mid-write
+
+    _log(sample_log, [DAY_START])
+
+    assert path.stat().st_size > HEADER.size
+    assert list(read_samples(str(tmp_path))["time"]) == [DAY_START]
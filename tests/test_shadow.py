@@ -0,0 +1,81 @@
+"""Tests for decoding the thing_shadow."""
+import pytest
+
+from mspa_client.shadow import (
+    CORE_FIELDS,
+    desired_state,
+    expected_changes,
+    project_shadow,
+    projection,
+    transform_shadow,
+)
+
+RAW = {
+    "water_temperature": 75,
+    "temperature_setting": 76,
+    "heater_state": 1,
+    "filter_state": 1,
+    "bubble_state": 0,
+    "bubble_level": 2,
+    "fault": "",
+    "is_online": True,
+    "ConnectType": "online",
+    "heat_state": 3,
+    "temperature_unit": 0,
+    "mcuversion": "1.2",
+}
+
+
+def test_decodes_fields():
+    data = transform_shadow(RAW)
+    assert data["water_temperature"] == 37.5
+    assert data["target_temperature"] == 38.0
+    assert (data["heater"], data["bubble"], data["jet"]) == ("on", "off", "off")
+    assert data["fault"] == "OK"
+    assert data["mcuversion"] == "1.2"
+    assert projection(frozenset({"heater", "fault"}))(RAW) == {"heater": "on", "fault": "OK"}
+
+
+def test_projection_decodes_the_rest_on_access():
+    data = project_shadow(RAW, CORE_FIELDS)
+    assert data.decoded == len(CORE_FIELDS)
+    assert data["mcuversion"] == "1.2"
+    assert data.decoded == len(CORE_FIELDS) + 1
+    assert dict(data) == transform_shadow(RAW)
+
+
+def test_equality_of_views_of_one_shadow_decodes_nothing_more():
+    first, second = project_shadow(RAW, CORE_FIELDS), project_shadow(dict(RAW), CORE_FIELDS)
+    assert first == second
+    assert first.decoded == second.decoded == len(CORE_FIELDS)
+    assert first.overlay({"heater": "off"}) != second
+    assert project_shadow({**RAW, "mcuversion": "1.3"}) != first
+
+
+@pytest.mark.parametrize("fields, bubble_level, desired", [
+    ({"heater": "on", "temperature": 38.5}, 1, {"heater_state": 1, "temperature_setting": 77}),
+    ({"filter": "OFF", "jet": "on"}, 1, {"filter_state": 0, "jet_state": 1}),
+    # Switching the bubbles on keeps the current level unless one is given
+    ({"bubble": "on"}, 2, {"bubble_state": 1, "bubble_level": 2}),
+    ({"bubble": "on", "bubble_level": 3}, 2, {"bubble_state": 1, "bubble_level": 3}),
+    ({"bubble": "off"}, 2, {"bubble_state": 0}),
+    ({"heater": "on", "filter": "on"}, 1, {"heater_state": 1, "filter_state": 1}),
+])
+def test_desired_state(fields, bubble_level, desired):
+    assert desired_state(fields, bubble_level) == desired
+
+
+@pytest.mark.parametrize("fields, message", [
+    ({}, "at least one field"),
+    ({"heater": "auto"}, "heater must be 'on' or 'off'"),
+    ({"heater": "on", "filter": "off"}, "filter off"),
+])
+def test_desired_state_rejects(fields, message):
+    with pytest.raises(ValueError, match=message):
+        desired_state(fields)
+
+
+def test_expected_changes_of_a_desired_state():
+    desired = desired_state({"heater": "on", "bubble": "on", "temperature": 38}, bubble_level=1)
+    assert expected_changes(desired) == {"heater": "on", "bubble": "on", "bubble_level": 1, "target_temperature": 38.0}
+
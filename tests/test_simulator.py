@@ -0,0 +1,21 @@
+"""Tests for the simulated hot tub's report."""
+from mspa_client.simulator import DAY, FixedIntervalPolicy, simulate
+
+
+def test_reported_request_rate_matches_requests_sent():
+    report = simulate(FixedIntervalPolicy(60), days=1, seed=3)
+
+    assert report["requests"] == sum(report["requests_by_path"].values())
+    assert report["requests_per_hour"] == round(report["requests"] / 24, 1)
+    # About one status read a minute (each update also waits for the reply)
+    polls = report["requests_by_path"]["/api/device/thing_shadow/"]
+    assert 0.98 * DAY / 60 <= polls <= 1.02 * DAY / 60
+    assert report["staleness"]["observed"] > 0
+
+
+def test_push_cuts_the_request_rate():
+    polled = simulate(days=1, seed=3)
+    pushed = simulate(days=1, seed=3, push=True)
+
+    assert pushed["requests_per_hour"] * 5 < polled["requests_per_hour"]
+    assert pushed["staleness"]["mean_s"] <= polled["staleness"]["mean_s"]
@@ -0,0 +1,95 @@
+"""Tests for cancelling the integration's tasks on unload."""
+import asyncio
+
+import pytest
+
+from mspa_client.mspa_api import MSpaApiClient
+from mspa_client.supervisor import MSpaSupervisorClosed, MSpaTaskSupervisor
+
+
+def test_shutdown_cancels_tasks_and_operations():
+    async def run():
+        supervisor = MSpaTaskSupervisor()
+        fetch = supervisor.create_task(asyncio.sleep(60), "shadow fetch")
+
+        async def command():
+            try:
+                async with supervisor.operation("set heater"):
+                    await asyncio.sleep(60)
+            except MSpaSupervisorClosed as err:
+                # The caller sees an ordinary error and is not cancelled itself
+                await asyncio.sleep(0)
+                return str(err)
+
+        caller = asyncio.ensure_future(command())
+        await asyncio.sleep(0)
+        leaked = await supervisor.async_shutdown(timeout=1)
+        return fetch, await caller, leaked, supervisor
+
+    fetch, message, leaked, supervisor = asyncio.run(run())
+    assert fetch.cancelled()
+    assert message == "set heater cancelled: the MSpa integration is unloading"
+    assert leaked == []
+    assert supervisor.as_dict()["tasks"] == [] and supervisor.stats["cancelled"] == 2
+
+
+def test_closed_supervisor_refuses_new_work():
+    async def run():
+        supervisor = MSpaTaskSupervisor()
+        await supervisor.async_shutdown()
+        coro = asyncio.sleep(0)
+        with pytest.raises(MSpaSupervisorClosed):
+            supervisor.create_task(coro, "late fetch")
+        assert coro.cr_frame is None  # Closed, not left un-awaited
+        with pytest.raises(MSpaSupervisorClosed):
+            async with supervisor.operation("late command"):
+                pass
+        with pytest.raises(MSpaSupervisorClosed):
+            async with supervisor.http_call("POST /late"):
+                pass
+
+    asyncio.run(run())
+
+
+def test_tasks_that_do_not_stop_are_reported():
+    async def stubborn():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            pass  # Ignores the first cancellation
+        await asyncio.sleep(60)
+
+    class StallingCloud:
+        async def request(self, method, url, headers=None, json=None, timeout=None):
+            await asyncio.sleep(60)
+
+    async def run():
+        supervisor = MSpaTaskSupervisor()
+        supervisor.create_task(stubborn(), "stubborn task")
+        # A request started from the package without going through the supervisor
+        client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=StallingCloud(),
+                               store={"mspa_token": "t"}, supervisor=MSpaTaskSupervisor("other"))
+        untracked = asyncio.ensure_future(client._api_request("POST", "/api/device/thing_shadow/", {}))
+        await asyncio.sleep(0.01)
+        leaked = await supervisor.async_shutdown(timeout=0.05)
+        untracked.cancel()
+        return leaked  # asyncio.run cancels the stubborn task again
+
+    assert asyncio.run(run()) == ["stubborn task", "untracked _api_request"]
+
+
+def test_http_calls_are_capped():
+    async def run():
+        supervisor = MSpaTaskSupervisor(http_concurrency=2)
+        in_flight = []
+
+        async def call(n):
+            async with supervisor.http_call(f"GET /{n}"):
+                in_flight.append(len(supervisor.as_dict()["http_in_flight"]))
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call(n) for n in range(5)))
+        return in_flight, supervisor.stats["http_calls"]
+
+    in_flight, calls = asyncio.run(run())
+    assert max(in_flight) == 2 and calls == 5
@@ -0,0 +1,82 @@
+"""Tests for the update trace spans."""
+import asyncio
+import json
+import logging
+
+import pytest
+
+from mspa_client.cassette import CassetteResponse
+from mspa_client.mspa_api import MSpaApiClient
+from mspa_client.tracing import MSpaTracer, span
+
+
+def test_span_outside_a_trace_does_nothing():
+    with span("fetch", max_age=2) as current:
+        assert current is None
+
+
+def test_nested_spans_and_errors_are_recorded():
+    tracer = MSpaTracer(history=2)
+    with tracer.trace("update", interval=30):
+        with span("fetch") as fetch:
+            with span("POST /api/device/thing_shadow/"):
+                pass
+            fetch.set(cached=False)
+        with pytest.raises(ValueError):
+            with span("reconcile"):
+                raise ValueError("bad target")
+
+    record = tracer.traces[-1]
+    assert (record["name"], record["attrs"]) == ("update", {"interval": 30})
+    fetch, reconcile = record["children"]
+    assert fetch["attrs"] == {"cached": False}
+    assert [child["name"] for child in fetch["children"]] == ["POST /api/device/thing_shadow/"]
+    assert reconcile["error"] == "ValueError"
+    assert record["duration_ms"] >= fetch["duration_ms"] >= 0
+
+    # The history is bounded; the summary covers the traces kept
+    for _ in range(3):
+        with tracer.trace("update"):
+            with span("fetch"):
+                pass
+    assert len(tracer.traces) == 2
+    assert tracer.phase_summary()["update.fetch"]["count"] == 2
+
+
+def test_trace_logged_as_one_json_line(caplog):
+    tracer = MSpaTracer(log_json=True)
+    with caplog.at_level(logging.INFO, logger="mspa_client.trace"):
+        with tracer.trace("update"):
+            with span("transform", fields=3):
+                pass
+    lines = [record.getMessage() for record in caplog.records if record.name == "mspa_client.trace"]
+    assert len(lines) == 1
+    assert json.loads(lines[0])["children"][0]["attrs"] == {"fields": 3}
+
+
+class ShadowCloud:
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        await asyncio.sleep(0.01)
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": {"is_online": True}})
+
+
+def test_api_requests_nest_under_the_phase_that_sent_them():
+    tracer = MSpaTracer()
+    client = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=ShadowCloud(),
+                           store={"mspa_token": "t"})
+
+    async def run():
+        with tracer.trace("update"):
+            with span("fetch"):
+                # The fetch itself runs in a supervisor task started here
+                await client.get_hot_tub_status(max_age=0)
+            with span("adaptive_polling"):
+                pass
+
+    asyncio.run(run())
+    fetch, polling = tracer.traces[-1]["children"]
+    request = fetch["children"][0]
+    assert request["name"] == "POST /api/device/thing_shadow/"
+    assert request["attrs"]["status"] == 200 and request["attrs"]["result"] == "ok"
+    assert request["duration_ms"] >= 10
+    assert "children" not in polling
@@ -0,0 +1,108 @@
+"""Tests that the coordinator and the simulator run the same update cycle."""
+import asyncio
+import sys
+import types
+from json import loads
+from pathlib import Path
+
+import pytest
+
+from mspa_client.cassette import CassetteResponse
+from mspa_client.const import CONF_ALWAYS_ENFORCE_UNIT, CONF_RESTORE_STATE, CONF_TRACK_TEMPERATURE_UNIT
+from mspa_client.mspa_api import MSpaApiClient
+from mspa_client.polling import MSpaPollingPolicy
+from mspa_client.simulator import SimulatedCoordinator, StalenessTracker
+
+OPTIONS = {CONF_RESTORE_STATE: True, CONF_TRACK_TEMPERATURE_UNIT: True, CONF_ALWAYS_ENFORCE_UNIT: False}
+SET_UP = {"is_online": True, "ConnectType": "online", "temperature_unit": 0, "temperature_setting": 76,
+          "water_temperature": 74, "heater_state": 1, "filter_state": 1, "heat_state": 4}
+FACTORY = {**SET_UP, "temperature_unit": 1, "temperature_setting": 70, "heater_state": 0, "filter_state": 0,
+           "heat_state": 0}
+
+# A power cut: the tub goes offline, comes back with factory settings, then
+# shows the unit the integration sent before the rest is restored
+SEQUENCE = [
+    SET_UP,
+    {**SET_UP, "is_online": False, "ConnectType": "offline"},
+    FACTORY,
+    FACTORY,
+    {**FACTORY, "temperature_unit": 0},
+    SET_UP,
+]
+EXPECTED_COMMANDS = [
+    {"temperature_unit": 0},
+    {"temperature_setting": 76, "heater_state": 1, "filter_state": 1},
+]
+
+
+class ScriptedCloud:
+    """Serves whatever shadow the test sets and records the commands sent."""
+
+    def __init__(self):
+        self.shadow = SEQUENCE[0]
+        self.commands = []
+
+    async def request(self, method, url, headers=None, json=None, timeout=None):
+        path = "/" + url.split("://", 1)[-1].split("/", 1)[-1]
+        if path == "/api/device/command":
+            self.commands.append(loads(json["desired"])["state"]["desired"])
+        data = {
+            "/api/enduser/get_token/": {"token": "t"},
+            "/api/enduser/devices/": {"list": [{"device_id": "d1", "product_id": "p1"}]},
+            "/api/device/thing_shadow/": dict(self.shadow),
+        }.get(path, {})
+        return CassetteResponse(200, {"code": 0, "message": "SUCCESS", "data": data})
+
+
+async def _run_sequence(cloud, api, update):
+    """Feed SEQUENCE through update(); return the commands sent."""
+    for shadow in SEQUENCE:
+        cloud.shadow = shadow
+        api.invalidate_status_cache()
+        await update()
+    return cloud.commands
+
+
+def test_simulator_restores_like_the_coordinator():
+    async def run():
+        cloud = ScriptedCloud()
+        api = MSpaApiClient(None, "user@example.invalid", "0" * 32, None, transport=cloud)
+        await api.async_init()
+        coordinator = SimulatedCoordinator(
+            api, MSpaPollingPolicy(), StalenessTracker(types.SimpleNamespace(changes=[])), OPTIONS
+        )
+        commands = await _run_sequence(cloud, api, coordinator.update)
+        return commands, [method for _, method in coordinator.power_cycle.detections]
+
+    commands, detections = asyncio.run(run())
+    assert commands == EXPECTED_COMMANDS
+    assert detections == ["is_online transition (False → True)"]
+
+
+def test_coordinator_matches_the_simulator(monkeypatch):
+    pytest.importorskip("homeassistant")
+    common = pytest.importorskip("pytest_homeassistant_custom_component.common")
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from custom_components.mspa import mspa_api
+    from custom_components.mspa.coordinator import MSpaUpdateCoordinator
+
+    async def run():
+        cloud = ScriptedCloud()
+        monkeypatch.setattr(mspa_api, "RequestsTransport", lambda hass=None: cloud)
+        async with common.async_test_home_assistant() as hass:
+            entry = common.MockConfigEntry(
+                domain="mspa", title="MSpa", unique_id="d1", options=OPTIONS,
+                data={"account_email": "user@example.invalid", "password": "0" * 32, "region": "ROW"},
+            )
+            entry.add_to_hass(hass)
+            coordinator = MSpaUpdateCoordinator(hass, entry)
+            await coordinator.api.async_init()
+            commands = await _run_sequence(cloud, coordinator.api, coordinator._async_update_data)
+            detections = [method for _, method in coordinator.power_cycle.detections]
+            await coordinator.supervisor.async_shutdown()
+            await hass.async_stop(force=True)
+        return commands, detections
+
+    commands, detections = asyncio.run(run())
+    assert commands == EXPECTED_COMMANDS
+    assert detections == ["is_online transition (False → True)"]
@@ -0,0 +1,87 @@
+"""Tests for the coordinator health watchdog."""
+import pytest
+
+from mspa_client.const import (
+    WATCHDOG_BACKOFF_MAX,
+    WATCHDOG_FAILURES,
+    WATCHDOG_INTERVAL,
+    WATCHDOG_STALL_MIN,
+    WATCHDOG_STUCK_REQUEST,
+)
+from mspa_client.watchdog import (
+    PROBLEM_FAILURES,
+    PROBLEM_STALL,
+    PROBLEM_STUCK_REQUEST,
+    STEP_REAUTHENTICATE,
+    STEP_REDISCOVER,
+    STEP_RESET_CONNECTIONS,
+    MSpaWatchdog,
+)
+
+INTERVAL = 30
+
+
+def _failing(watchdog, now=0.0):
+    watchdog.start(now)
+    for _ in range(WATCHDOG_FAILURES):
+        watchdog.update_failed(now)
+
+
+def test_healthy_coordinator_needs_no_recovery():
+    watchdog = MSpaWatchdog()
+    watchdog.start(0.0)
+    watchdog.update_failed(10.0)  # One failure is not a problem yet
+    assert watchdog.check(20.0, INTERVAL, 0.0) is None
+    assert watchdog.as_dict()["problem"] is None
+
+
+@pytest.mark.parametrize("setup, now, request_age, kind", [
+    (_failing, 1.0, 0.0, PROBLEM_FAILURES),
+    (lambda watchdog: watchdog.start(0.0), WATCHDOG_STALL_MIN + 1, 0.0, PROBLEM_STALL),
+    (lambda watchdog: watchdog.start(0.0), 1.0, WATCHDOG_STUCK_REQUEST + 1, PROBLEM_STUCK_REQUEST),
+])
+def test_problems_detected(setup, now, request_age, kind):
+    watchdog = MSpaWatchdog()
+    setup(watchdog)
+    assert watchdog.diagnose(now, INTERVAL, request_age)[0] == kind
+
+
+def test_long_interval_stretches_the_stall_limit():
+    watchdog = MSpaWatchdog()
+    watchdog.start(0.0)
+    assert watchdog.diagnose(WATCHDOG_STALL_MIN + 1, 300, 0.0) is None
+    assert watchdog.diagnose(901, 300, 0.0)[0] == PROBLEM_STALL
+
+
+def test_steps_escalate_then_back_off():
+    watchdog = MSpaWatchdog()
+    _failing(watchdog)
+    steps = []
+    now = 0.0
+    while now < 6 * 3600:
+        step = watchdog.check(now, INTERVAL, 0.0)
+        if step:
+            steps.append((now, step))
+        now += WATCHDOG_INTERVAL
+
+    assert [step for _, step in steps[:4]] == [
+        STEP_RESET_CONNECTIONS, STEP_REAUTHENTICATE, STEP_REDISCOVER, STEP_REDISCOVER,
+    ]
+    assert [at for at, _ in steps[:3]] == [0, WATCHDOG_INTERVAL, 2 * WATCHDOG_INTERVAL]
+    gaps = [later - earlier for (earlier, _), (later, _) in zip(steps[2:], steps[3:])]
+    assert gaps == sorted(gaps) and gaps[0] == WATCHDOG_INTERVAL
+    assert max(gaps) == WATCHDOG_BACKOFF_MAX
+    assert watchdog.stats[f"{PROBLEM_FAILURES}_detected"] == 1
+
+
+def test_success_ends_the_recovery_and_starts_over():
+    watchdog = MSpaWatchdog()
+    _failing(watchdog)
+    assert watchdog.check(0.0, INTERVAL, 0.0) == STEP_RESET_CONNECTIONS
+    assert watchdog.check(WATCHDOG_INTERVAL, INTERVAL, 0.0) == STEP_REAUTHENTICATE
+    watchdog.update_succeeded(45.0)
+    assert watchdog.as_dict()["last_recovery_s"] == 45.0
+    assert watchdog.stats["recoveries"] == 1
+
+    _failing(watchdog, 100.0)
+    assert watchdog.check(100.0, INTERVAL, 0.0) == STEP_RESET_CONNECTIONS
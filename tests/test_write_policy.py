@@ -0,0 +1,34 @@
+"""Tests for the entity write policy."""
+from mspa_client.write_policy import significant_change, write_signature
+
+POWER = {"state": 10}
+
+
+def test_first_write_and_availability_always_written():
+    online = write_signature(True, 1500, {"heater_power": 1500})
+    assert significant_change(None, online, POWER)
+    assert significant_change(online, write_signature(False, 1500, {"heater_power": 1500}), POWER)
+    assert significant_change(write_signature(False, None, {}), online, POWER)
+
+
+def test_state_below_threshold_is_skipped():
+    last = write_signature(True, 1500, {})
+    assert not significant_change(last, write_signature(True, 1505, {}), POWER)
+    assert significant_change(last, write_signature(True, 1510, {}), POWER)
+    # Without a threshold any change is written
+    assert significant_change(last, write_signature(True, 1505, {}), {})
+
+
+def test_attribute_changes_are_written():
+    last = write_signature(True, 1500, {"heater_power": 1500, "bubble_power": 0})
+    assert significant_change(last, write_signature(True, 1500, {"heater_power": 1000, "bubble_power": 500}), POWER)
+    assert significant_change(last, write_signature(True, 1500, {"heater_power": 1500}), POWER)
+    assert not significant_change(last, write_signature(True, 1500, {"heater_power": 1500, "bubble_power": 0}), POWER)
+
+
+def test_attribute_threshold_and_non_numeric_values():
+    thresholds = {"current_temperature": 0.5}
+    last = write_signature(True, "heat", {"current_temperature": 38.0, "hvac_action": "heating"})
+    assert not significant_change(last, write_signature(True, "heat", {"current_temperature": 38.2, "hvac_action": "heating"}), thresholds)
+    assert significant_change(last, write_signature(True, "heat", {"current_temperature": 38.0, "hvac_action": "idle"}), thresholds)
+    assert significant_change(last, write_signature(True, "off", {"current_temperature": 38.0, "hvac_action": "heating"}), thresholds)